@@ -1,36 +1,151 @@
 from datetime import datetime, timedelta
+import hmac
+import logging
+import threading
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, make_transient_to_detached
 import os
 from dotenv import load_dotenv
 
-from app.database import get_db
+from app.cache import TTLCache
+from app.deployment import WEB_WORKERS
+from app.database import get_db, run_db, sync_session
+from app.hashing import hash_password, check_password
 from app.models import User
 from app.schemas import TokenData
 
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # общее хранилище не нужно при USER_CACHE_BACKEND=memory
+    redis_asyncio = None
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Настройки безопасности
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Кеш пользователей, уже проверенных по токену: id -> (token_version, поколение, снимок User)
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+# memory — сброс записи виден только своему воркеру, поэтому при нескольких
+# воркерах кеш отключается; redis — общий счётчик поколений пользователя,
+# который сверяется при каждом попадании в кеш
+USER_CACHE_BACKEND = os.getenv("USER_CACHE_BACKEND", "memory")
+USER_CACHE_REDIS_URL = os.getenv("USER_CACHE_REDIS_URL", "redis://localhost:6379/0")
+# Счётчик поколений живёт намного дольше записей кеша
+USER_CACHE_GENERATION_TTL = 24 * 60 * 60
+
+# Администраторы (служебные маршруты /api/admin): email через запятую
+ADMIN_EMAILS = {
+    email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()
+}
+
+# Токен сборщика метрик (Prometheus) для /metrics и /api/internal/stats;
+# без него служебные метрики доступны только администраторам
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Сообщения о конфликте уникальных индексов users (ix_users_email, ix_users_username)
+CONFLICT_DETAILS = {
+    "username": "Пользователь с таким именем пользователя уже существует",
+    "email": "Пользователь с таким email уже существует",
+}
+
+class LocalGenerations:
+    """Счётчик поколений пользователя в памяти процесса (один воркер).
+
+    Запрос, загрузивший пользователя до чужого commit, не кладёт устаревший
+    снимок в кеш, а положенный раньше сброса — не совпадёт по поколению.
+    Счётчик живёт дольше записей кеша: после его истечения снимков с прежним
+    поколением уже нет.
+    """
+
+    name = "memory"
+
+    def __init__(self, ttl: float):
+        self._counters = TTLCache(maxsize=USER_CACHE_MAX_SIZE, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def peek(self, user_id: int) -> int:
+        return self._counters.get(user_id) or 0
+
+    async def current(self, user_id: int) -> int:
+        return self.peek(user_id)
+
+    async def bump(self, user_id: int) -> None:
+        with self._lock:
+            self._counters.set(user_id, self.peek(user_id) + 1)
+
+
+class SharedGenerations:
+    """Счётчик поколений пользователя в общем хранилище (Redis).
+
+    Запись кеша хранит поколение, прочитанное до загрузки пользователя из БД.
+    invalidate_user увеличивает счётчик, и записи во всех воркерах перестают
+    с ним совпадать.
+    """
+
+    name = "redis"
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "SharedGenerations":
+        if redis_asyncio is None:
+            raise RuntimeError("USER_CACHE_BACKEND=redis требует пакет redis")
+        return cls(redis_asyncio.from_url(url))
+
+    async def current(self, user_id: int) -> int:
+        return int(await self.client.get(f"uc:gen:{user_id}") or 0)
+
+    async def bump(self, user_id: int) -> None:
+        key = f"uc:gen:{user_id}"
+        await self.client.incr(key)
+        await self.client.expire(key, USER_CACHE_GENERATION_TTL)
+
+
+def create_generations(kind: str):
+    if kind == "memory":
+        return LocalGenerations(ttl=USER_CACHE_GENERATION_TTL)
+    if kind == "redis":
+        return SharedGenerations.from_url(USER_CACHE_REDIS_URL)
+    raise ValueError(f"Неизвестный USER_CACHE_BACKEND: {kind}")
+
+
 security = HTTPBearer()
+user_cache = TTLCache(maxsize=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+user_generations = create_generations(USER_CACHE_BACKEND)
+USER_CACHE_ENABLED = user_generations.name != "memory" or WEB_WORKERS == 1
+if not USER_CACHE_ENABLED:
+    logger.warning(
+        "USER_CACHE_BACKEND=memory при %d воркерах: кеш пользователей отключён, "
+        "задайте USER_CACHE_BACKEND=redis", WEB_WORKERS,
+    )
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Проверка пароля"""
-    # bcrypt учитывает только первые 72 байта
-    return pwd_context.verify(plain_password[:72], hashed_password)
+    return check_password(plain_password, hashed_password)[0]
 
 def get_password_hash(password: str) -> str:
     """Хеширование пароля"""
-    # bcrypt поддерживает только первые 72 байта
-    return pwd_context.hash(password[:72])
+    return hash_password(password)
+
+def conflict_detail(error: IntegrityError) -> str:
+    """Какое поле пользователя нарушило уникальность: текст ошибки содержит
+    имя индекса (PostgreSQL) или столбца (SQLite)"""
+    message = str(error.orig)
+    for field, detail in CONFLICT_DETAILS.items():
+        if f"ix_users_{field}" in message or f"users.{field}" in message:
+            return detail
+    return "Пользователь уже существует"
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Создание JWT токена"""
@@ -43,6 +158,13 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def create_user_token(user: User, expires_delta: Optional[timedelta] = None):
+    """Создание JWT токена для пользователя (с id и версией токена)"""
+    return create_access_token(
+        data={"sub": user.email, "uid": user.id, "ver": user.token_version or 0},
+        expires_delta=expires_delta,
+    )
+
 def verify_token(token: str, credentials_exception):
     """Проверка токена"""
     try:
@@ -50,12 +172,66 @@ def verify_token(token: str, credentials_exception):
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
-        token_data = TokenData(email=email)
+        token_data = TokenData(
+            email=email,
+            user_id=payload.get("uid"),
+            version=payload.get("ver") or 0,
+        )
     except JWTError:
         raise credentials_exception
     return token_data
 
-def get_current_user(
+def _snapshot_user(user: User) -> User:
+    """Отсоединённая копия пользователя для хранения в кеше"""
+    snapshot = User(**{
+        attr.key: getattr(user, attr.key) for attr in User.__mapper__.column_attrs
+    })
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+def cache_user(user: User, generation: int) -> None:
+    """Сохранение актуального состояния пользователя в кеше"""
+    if isinstance(user_generations, LocalGenerations) and user_generations.peek(user.id) != generation:
+        # Пока пользователь загружался, его изменили: снимок мог устареть
+        return
+    user_cache.set(user.id, (user.token_version or 0, generation, _snapshot_user(user)))
+
+async def invalidate_user(user_id: int) -> None:
+    """Сброс кеша пользователя во всех воркерах (после commit изменений
+    профиля, аватара, пароля или версии токена)"""
+    user_cache.delete(user_id)
+    try:
+        await user_generations.bump(user_id)
+    except Exception:
+        logger.warning("Не удалось сбросить кеш пользователя %s в других воркерах", user_id, exc_info=True)
+
+async def _cache_generation(user_id: Optional[int]) -> Optional[int]:
+    """Текущее поколение записи кеша; None — кеш не используется для этого запроса"""
+    if not USER_CACHE_ENABLED or user_id is None:
+        return None
+    try:
+        return await user_generations.current(user_id)
+    except Exception:
+        # Без общего счётчика нельзя доверять кешу: пользователь читается из БД
+        logger.warning("Хранилище поколений кеша пользователей недоступно", exc_info=True)
+        return None
+
+def _load_user(db: Session, token_data: TokenData, generation: Optional[int] = None) -> Optional[User]:
+    if token_data.user_id is None:
+        # Токены старого формата содержат только email и действуют как версия 0:
+        # после отзыва (logout-all) они тоже перестают приниматься
+        user = db.query(User).filter(User.email == token_data.email).first()
+    else:
+        user = db.get(User, token_data.user_id)
+    if user is None or (user.token_version or 0) != token_data.version:
+        return None
+    if token_data.user_id is None:
+        return user
+    if generation is not None:
+        cache_user(user, generation)
+    return user
+
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ):
@@ -69,13 +245,37 @@ def get_current_user(
     token = credentials.credentials
     token_data = verify_token(token, credentials_exception)
     
-    user = db.query(User).filter(User.email == token_data.email).first()
+    # Поколение читается до загрузки из БД: изменение, закоммиченное между
+    # чтением и загрузкой, увеличит его, и запись не будет использована
+    generation = await _cache_generation(token_data.user_id)
+    cached = user_cache.get(token_data.user_id) if generation is not None else None
+    if cached is not None and cached[:2] == (token_data.version, generation):
+        # Присоединяем копию снимка к сессии без запроса к БД
+        user = sync_session(db).merge(cached[2], load=False)
+    else:
+        user = await run_db(db, _load_user, token_data, generation)
     if user is None:
         raise credentials_exception
     return user
 
-def get_current_active_user(current_user: User = Depends(get_current_user)):
+async def get_current_active_user(current_user: User = Depends(get_current_user)):
     """Получение активного пользователя"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Неактивный пользователь")
     return current_user
+
+async def get_current_admin(current_user: User = Depends(get_current_active_user)):
+    """Пользователь из списка ADMIN_EMAILS"""
+    if current_user.email.lower() not in ADMIN_EMAILS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав")
+    return current_user
+
+async def get_internal_access(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Доступ к служебным метрикам: токен METRICS_TOKEN или администратор"""
+    if METRICS_TOKEN and hmac.compare_digest(credentials.credentials.encode(), METRICS_TOKEN.encode()):
+        return None
+    current_user = await get_current_active_user(await get_current_user(credentials, db))
+    return await get_current_admin(current_user)
@@ -0,0 +1,190 @@
+import asyncio
+import fcntl
+import hashlib
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Tuple
+
+import aiofiles
+from dotenv import load_dotenv
+from fastapi import HTTPException, UploadFile
+from PIL import Image, ImageOps
+
+load_dotenv()
+
+AVATAR_DIR = os.getenv("AVATAR_DIR", "uploads/avatars")
+AVATAR_URL_PREFIX = "/uploads/avatars"
+AVATAR_MAX_BYTES = int(os.getenv("AVATAR_MAX_BYTES", str(5 * 1024 * 1024)))
+AVATAR_MAX_PIXELS = int(os.getenv("AVATAR_MAX_PIXELS", str(40_000_000)))
+AVATAR_SIZES = [int(s) for s in os.getenv("AVATAR_SIZES", "64,256").split(",")]
+AVATAR_WORKERS = int(os.getenv("AVATAR_WORKERS", "2"))
+# Сколько ждать загрузку аватара того же пользователя в другом запросе, с
+AVATAR_LOCK_TIMEOUT = float(os.getenv("AVATAR_LOCK_TIMEOUT", "30"))
+# Файлов блокировок в AVATAR_DIR: пользователи делят их по остатку от id
+AVATAR_LOCK_STRIPES = 256
+CHUNK_SIZE = 64 * 1024
+
+# Форматы миниатюр: WebP для современных браузеров, JPEG как запасной вариант
+FORMATS = {"webp": ("WEBP", {"quality": 85, "method": 4}), "jpg": ("JPEG", {"quality": 85, "optimize": True})}
+
+# Pillow отпускает GIL при декодировании и масштабировании, поэтому пула потоков достаточно
+_executor = ThreadPoolExecutor(max_workers=AVATAR_WORKERS, thread_name_prefix="avatar")
+
+
+# Запас на заголовки multipart сверх размера самого файла
+UPLOAD_REQUEST_LIMIT = AVATAR_MAX_BYTES + 64 * 1024
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Файл слишком большой (максимум {AVATAR_MAX_BYTES // (1024 * 1024)} МБ)"
+    )
+
+
+async def receive_upload(file: UploadFile) -> Tuple[str, str]:
+    """Потоковая запись загрузки во временный файл с ограничением размера.
+
+    Возвращает путь к временному файлу и sha256 содержимого.
+    """
+    os.makedirs(AVATAR_DIR, exist_ok=True)
+    tmp_path = os.path.join(AVATAR_DIR, f".upload-{uuid.uuid4().hex}")
+    digest = hashlib.sha256()
+    received = 0
+    try:
+        async with aiofiles.open(tmp_path, "wb") as out:
+            while chunk := await file.read(CHUNK_SIZE):
+                received += len(chunk)
+                if received > AVATAR_MAX_BYTES:
+                    raise _too_large()
+                digest.update(chunk)
+                await out.write(chunk)
+    except BaseException:
+        _remove(tmp_path)
+        raise
+    if received == 0:
+        _remove(tmp_path)
+        raise HTTPException(status_code=400, detail="Пустой файл")
+    return tmp_path, digest.hexdigest()
+
+
+def variant_name(stem: str, size: int, ext: str) -> str:
+    return f"{stem}_{size}.{ext}"
+
+
+def _largest_path(stem: str) -> str:
+    # Появляется последним: если он есть, на месте и все остальные варианты
+    return os.path.join(AVATAR_DIR, variant_name(stem, max(AVATAR_SIZES), "webp"))
+
+
+def discard_upload(tmp_path: str) -> None:
+    """Удаление временного файла загрузки (повторный вызов безопасен)"""
+    _remove(tmp_path)
+
+
+@asynccontextmanager
+async def avatar_lock(user_id: int) -> AsyncIterator[None]:
+    """Загрузки аватара одного пользователя по очереди во всех воркерах хоста.
+
+    Нарезка, запись URL и удаление прежних аватаров выполняются под
+    блокировкой файла в AVATAR_DIR: иначе очистка одного запроса удаляла бы
+    миниатюры параллельного, и в БД оставался бы URL несуществующего файла.
+    """
+    os.makedirs(AVATAR_DIR, exist_ok=True)
+    fd = os.open(os.path.join(AVATAR_DIR, f".lock-{user_id % AVATAR_LOCK_STRIPES}"), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        deadline = time.monotonic() + AVATAR_LOCK_TIMEOUT
+        # Без блокирующего ожидания: поток пула не занимается на время чужой нарезки
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() > deadline:
+                    raise HTTPException(
+                        status_code=409, detail="Аватар уже загружается, повторите позже")
+                await asyncio.sleep(0.05)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+def _render_variants(src_path: str, stem: str) -> List[str]:
+    """Декодирование, проверка и нарезка квадратных миниатюр всех размеров"""
+    try:
+        with Image.open(src_path) as image:
+            if image.width * image.height > AVATAR_MAX_PIXELS:
+                raise HTTPException(status_code=400, detail="Слишком большое изображение")
+            image = ImageOps.exif_transpose(image).convert("RGB")
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(status_code=400, detail="Файл должен быть изображением")
+
+    # Все варианты сначала пишутся во временные файлы и переносятся на место
+    # только вместе; самый крупный WebP — последним
+    staged = []
+    try:
+        for size in AVATAR_SIZES:
+            thumb = ImageOps.fit(image, (size, size), Image.LANCZOS)
+            for ext, (fmt, options) in FORMATS.items():
+                tmp = os.path.join(AVATAR_DIR, f".render-{uuid.uuid4().hex}")
+                staged.append((tmp, os.path.join(AVATAR_DIR, variant_name(stem, size, ext))))
+                thumb.save(tmp, fmt, **options)
+    except BaseException:
+        for tmp, _ in staged:
+            _remove(tmp)
+        raise
+    largest = _largest_path(stem)
+    staged.sort(key=lambda item: item[1] == largest)
+    for tmp, path in staged:
+        os.replace(tmp, path)
+    return [path for _, path in staged]
+
+
+async def process_avatar(tmp_path: str, user_id: int, content_hash: str) -> Dict[str, str]:
+    """Создание миниатюр с именами по хешу содержимого; возвращает URL вариантов"""
+    stem = f"{user_id}_{content_hash[:16]}"
+    try:
+        # Тот же файл уже загружался — миниатюры готовы
+        if not os.path.exists(_largest_path(stem)):
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(_executor, _render_variants, tmp_path, stem)
+    finally:
+        _remove(tmp_path)
+    return {
+        f"{size}.{ext}": f"{AVATAR_URL_PREFIX}/{variant_name(stem, size, ext)}"
+        for size in AVATAR_SIZES for ext in FORMATS
+    }
+
+
+def primary_url(variants: Dict[str, str]) -> str:
+    return variants[f"{max(AVATAR_SIZES)}.webp"]
+
+
+def cleanup_superseded(user_id: int, current_url: str) -> int:
+    """Удаление прежних аватаров пользователя (включая старые файлы вида {id}_{username}.ext)"""
+    current_stem = os.path.basename(current_url).rsplit("_", 1)[0]
+    removed = 0
+    try:
+        names = os.listdir(AVATAR_DIR)
+    except FileNotFoundError:
+        return 0
+    for name in names:
+        if name.startswith(f"{user_id}_") and not name.startswith(f"{current_stem}_"):
+            _remove(os.path.join(AVATAR_DIR, name))
+            removed += 1
+    return removed
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -1,21 +1,267 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, Optional, Tuple
+import asyncio
+import itertools
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
+from app.db_pool import PoolMetrics, instrument_engine, pool_options, pool_stats
+from app.metrics import METRICS_ENABLED, db_routing_total
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://finlingo:finlingo123@db:5432/finlingo")
 
-engine = create_engine(DATABASE_URL)
+# Режим работы с БД: sync — psycopg2 в threadpool, async — asyncpg в event loop
+DB_MODE = os.getenv("DB_MODE", "sync")
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def _async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(DATABASE_URL)
+
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "2"))
+
+# Реплики только для чтения: URL через запятую; пусто — всё идёт в основную БД
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# Сколько секунд после своей записи клиент читает из основной БД (запас на отставание реплик)
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+PRIMARY_COOKIE = "db_primary_until"
+READ_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+pool_metrics = PoolMetrics()
+
+engine = create_engine(DATABASE_URL, **pool_options(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = (
+    create_async_engine(ASYNC_DATABASE_URL, **pool_options(ASYNC_DATABASE_URL, is_async=True))
+    if DB_MODE == "async" else None
+)
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    if async_engine is not None else None
+)
+
+# Пул, через который идут запросы приложения в текущем режиме
+active_engine = async_engine.sync_engine if async_engine is not None else engine
+instrument_engine(active_engine, pool_metrics)
+
+def _create_replica_engine(url: str):
+    if DB_MODE == "async":
+        url = _async_url(url)
+        return create_async_engine(url, **pool_options(url, is_async=True))
+    return create_engine(url, **pool_options(url))
+
+# Движки реплик в текущем режиме и их синхронные ядра (для событий и метрик)
+replica_pool_metrics = [PoolMetrics() for _ in DATABASE_REPLICA_URLS]
+replica_engines = [_create_replica_engine(url) for url in DATABASE_REPLICA_URLS]
+replica_sync_engines = [getattr(replica, "sync_engine", replica) for replica in replica_engines]
+for _sync_engine, _metrics in zip(replica_sync_engines, replica_pool_metrics):
+    instrument_engine(_sync_engine, _metrics)
+
 Base = declarative_base()
 
-def get_db():
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def use_primary(endpoint):
+    """Маршрут чтения, который может писать в БД, всегда идёт в основную БД"""
+    endpoint.use_primary = True
+    return endpoint
+
+class ReplicaRouter:
+    """Выбор БД для запроса: основная или одна из реплик.
+
+    Запросы на запись и маршруты с use_primary идут в основную БД, остальные
+    чтения — в реплики по кругу. После успешной записи клиент получает cookie
+    PRIMARY_COOKIE (см. ReadYourWritesMiddleware) и, пока она не истекла,
+    читает из основной БД: так он видит свои изменения, даже если реплика
+    отстаёт, а запрос попал в другой воркер.
+    """
+
+    def __init__(self, replicas: list, window: float):
+        self.replicas = replicas
+        self.window = window
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+        self.decisions: Dict[str, int] = {}
+
+    def _recent_write(self, request: Request) -> bool:
+        try:
+            return float(request.cookies.get(PRIMARY_COOKIE, "")) > time.time()
+        except ValueError:
+            return False
+
+    def choose(self, request: Request) -> Tuple[Optional[object], str]:
+        """Движок реплики (None — основная БД) и причина выбора"""
+        if request.method not in READ_METHODS:
+            return None, "write"
+        if getattr(request.scope.get("endpoint"), "use_primary", False):
+            return None, "primary_route"
+        if self._recent_write(request):
+            return None, "recent_write"
+        return self.next_replica(), "read"
+
+    def next_replica(self):
+        """Следующая реплика по кругу; None, если реплик нет"""
+        if not self.replicas:
+            return None
+        return self.replicas[next(self._turn) % len(self.replicas)]
+
+    def route(self, request: Request):
+        replica, reason = self.choose(request)
+        target = "primary" if replica is None else "replica"
+        with self._lock:
+            key = f"{target}:{reason}"
+            self.decisions[key] = self.decisions.get(key, 0) + 1
+        if METRICS_ENABLED:
+            db_routing_total.inc((target, reason))
+        return replica
+
+    def stats(self) -> dict:
+        with self._lock:
+            decisions = dict(self.decisions)
+        return {
+            "replicas": len(self.replicas),
+            "read_your_writes_seconds": self.window,
+            "decisions": decisions,
+            "pools": [
+                pool_stats(sync_engine, metrics)
+                for sync_engine, metrics in zip(replica_sync_engines, replica_pool_metrics)
+            ],
+        }
+
+db_router = ReplicaRouter(replica_engines, READ_YOUR_WRITES_SECONDS)
+
+def get_routed_sync_db(request: Request):
+    replica = db_router.route(request)
+    db = SessionLocal(bind=replica) if replica is not None else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_routed_async_db(request: Request):
+    replica = db_router.route(request)
+    async with (AsyncSessionLocal(bind=replica) if replica is not None else AsyncSessionLocal()) as db:
+        yield db
+
+# С репликами сессия запроса выбирается по методу и недавней записи клиента
+if replica_engines:
+    get_db = get_routed_async_db if DB_MODE == "async" else get_routed_sync_db
+else:
+    get_db = get_async_db if DB_MODE == "async" else get_sync_db
+
+def sync_session(db) -> Session:
+    """Синхронная сессия, лежащая под зависимостью get_db"""
+    return db.sync_session if isinstance(db, AsyncSession) else db
+
+async def run_db(db, fn, *args, **kwargs):
+    """Выполнение синхронной функции fn(session, ...) над сессией запроса.
+
+    В режиме sync функция выполняется в threadpool, в режиме async — через
+    AsyncSession.run_sync на драйвере asyncpg, без занятия потоков.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+async def release_db(db) -> None:
+    """Возврат соединения сессии в пул до конца запроса (для долгих потоков)"""
+    if isinstance(db, AsyncSession):
+        await db.close()
+    else:
+        await run_in_threadpool(db.close)
+
+def dialect_insert(db: Session, table):
+    """INSERT с поддержкой ON CONFLICT для диалекта текущей сессии (PostgreSQL/SQLite)"""
+    if db.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(table)
+
+def get_pool_stats() -> dict:
+    """Состояние пула соединений текущего режима"""
+    return pool_stats(active_engine, pool_metrics)
+
+def _ping(sync_engine):
+    with sync_engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+def _warm_up_sync(connections: int):
+    opened = []
+    try:
+        for _ in range(connections):
+            connection = engine.connect()
+            opened.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        for connection in opened:
+            connection.close()
+
+async def _warm_up_async(connections: int):
+    opened = []
+    try:
+        for _ in range(connections):
+            connection = await async_engine.connect()
+            opened.append(connection)
+            await connection.execute(text("SELECT 1"))
+    finally:
+        for connection in opened:
+            await connection.close()
+
+async def warm_up_pool(connections: int) -> None:
+    """Открытие соединений пула заранее: первые запросы воркера не ждут
+    подключения к БД. Соединения удерживаются одновременно, иначе пул
+    выдавал бы одно и то же"""
+    if connections <= 0:
+        return
+    if async_engine is not None:
+        await _warm_up_async(connections)
+    else:
+        await run_in_threadpool(_warm_up_sync, connections)
+
+class DatabaseUnavailable(Exception):
+    pass
+
+async def _ping_async():
+    async with async_engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+async def check_database() -> None:
+    """Проверка доступности БД; при исчерпанном пуле ошибка возникает сразу, без ожидания"""
+    if get_pool_stats().get("exhausted"):
+        raise DatabaseUnavailable("пул соединений исчерпан")
+    try:
+        if async_engine is not None:
+            await asyncio.wait_for(_ping_async(), timeout=HEALTH_CHECK_TIMEOUT)
+        else:
+            await asyncio.wait_for(run_in_threadpool(_ping, engine), timeout=HEALTH_CHECK_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise DatabaseUnavailable("БД не ответила вовремя")
+    except Exception as e:
+        raise DatabaseUnavailable(f"БД недоступна ({type(e).__name__})")
@@ -0,0 +1,116 @@
+import os
+import threading
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+from app.deployment import per_worker
+
+load_dotenv()
+
+# Соединений с БД на все воркеры хоста (у PostgreSQL по умолчанию
+# max_connections=100, часть нужна миграциям, администрированию и другим хостам)
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "60"))
+# Настройки пула соединений одного воркера: по умолчанию его доля
+# DB_MAX_CONNECTIONS, треть — постоянные соединения, остальное — overflow
+_WORKER_CONNECTIONS = per_worker(DB_MAX_CONNECTIONS, minimum=2)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE") or max(1, _WORKER_CONNECTIONS // 3))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW") or _WORKER_CONNECTIONS - DB_POOL_SIZE)
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "5"))
+# Сколько соединений каждый воркер открывает при старте, до первого запроса
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", "2"))
+
+
+class PoolMetrics:
+    """Счётчики событий пула"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        # Выдачи, после которых свободных соединений не осталось: следующий
+        # запрос будет ждать в очереди пула
+        self.saturated = 0
+        self.timeouts = 0
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "saturated": self.saturated,
+                "timeouts": self.timeouts,
+            }
+
+
+def pool_options(url: str, is_async: bool = False) -> dict:
+    """Параметры create_engine для пула соединений из переменных окружения"""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if not is_async:
+        options["connect_args"] = {"connect_timeout": DB_CONNECT_TIMEOUT}
+    else:
+        options["connect_args"] = {"timeout": DB_CONNECT_TIMEOUT}
+    return options
+
+
+def _capacity(pool: QueuePool) -> int:
+    # Все пулы создаются с pool_options, поэтому лимит overflow — из настроек
+    return pool.size() + max(DB_MAX_OVERFLOW, 0)
+
+
+def _saturated(pool: QueuePool) -> bool:
+    return DB_MAX_OVERFLOW >= 0 and pool.checkedout() >= _capacity(pool)
+
+
+def instrument_engine(sync_engine, metrics: PoolMetrics) -> None:
+    """Подписка на события пула"""
+    pool = sync_engine.pool
+
+    def on_checkout(*args):
+        metrics.incr("checkouts")
+        if isinstance(pool, QueuePool) and _saturated(pool):
+            metrics.incr("saturated")
+
+    event.listen(sync_engine, "checkout", on_checkout)
+    event.listen(sync_engine, "checkin", lambda *args: metrics.incr("checkins"))
+    event.listen(sync_engine, "connect", lambda *args: metrics.incr("connects"))
+    event.listen(sync_engine, "invalidate", lambda *args: metrics.incr("invalidations"))
+
+
+def pool_stats(sync_engine, metrics: PoolMetrics) -> dict:
+    """Текущее состояние пула и накопленные счётчики"""
+    pool = sync_engine.pool
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "max_overflow": DB_MAX_OVERFLOW,
+            "capacity": _capacity(pool),
+            "in_use": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "exhausted": _saturated(pool),
+        })
+    stats.update(metrics.snapshot())
+    return stats
@@ -0,0 +1,20 @@
+"""Число процессов-воркеров приложения на одном хосте.
+
+Ресурсы, которые каждый воркер открывает сам (пул соединений с БД, пул
+bcrypt), по умолчанию делятся между воркерами, чтобы их сумма не зависела от
+числа ядер. gunicorn.conf.py записывает вычисленное число воркеров в
+WEB_CONCURRENCY до импорта приложения; uvicorn --workers по умолчанию берёт
+его из той же переменной.
+"""
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+WEB_WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY") or 1))
+
+
+def per_worker(total: int, minimum: int = 1) -> int:
+    """Доля общего на хост ресурса для одного воркера"""
+    return max(minimum, total // WEB_WORKERS)
@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional
+
+from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert
+
+from app.database import async_engine, engine
+from app.models import LearningEvent
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Буфер учебных событий: ёмкость, размер пачки и интервал записи
+EVENT_BUFFER_SIZE = int(os.getenv("EVENT_BUFFER_SIZE", "10000"))
+EVENT_BATCH_SIZE = int(os.getenv("EVENT_BATCH_SIZE", "500"))
+EVENT_FLUSH_INTERVAL = float(os.getenv("EVENT_FLUSH_INTERVAL", "1.0"))
+# Сколько ждать записи остатка при остановке воркера, с
+EVENT_SHUTDOWN_TIMEOUT = float(os.getenv("EVENT_SHUTDOWN_TIMEOUT", "10"))
+# Retry-After для клиентов, когда буфер переполнен
+EVENT_RETRY_AFTER = int(os.getenv("EVENT_RETRY_AFTER", "5"))
+
+# Пауза между попытками при недоступной БД растёт до этого значения, с
+MAX_RETRY_DELAY = 30.0
+
+
+def _write_sync(statement) -> None:
+    with engine.begin() as connection:
+        connection.execute(statement)
+
+
+class EventLog:
+    """Буфер учебных событий с записью пачками в фоне.
+
+    Маршруты только кладут событие в очередь — без запроса к БД. Фоновая задача
+    пишет пачку одним многострочным INSERT, когда набралось batch_size событий
+    или прошло flush_interval секунд. Очередь ограничена: при переполнении
+    события отклоняются (offer возвращает False) и учитываются в dropped, так
+    что запись аналитики не тормозит запросы и не съедает память при
+    недоступной БД. При остановке воркера остаток записывается.
+    """
+
+    def __init__(self, capacity: int, batch_size: int, flush_interval: float):
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._events = deque()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.accepted = 0
+        self.dropped = 0
+        self.written = 0
+        self.flushes = 0
+        self.failures = 0
+        self.last_flush_ms = 0.0
+
+    def emit(self, user_id: int, event_type: str, *, topic_slug: Optional[str] = None,
+             lesson_number: Optional[int] = None, task_number: Optional[int] = None,
+             payload: Optional[dict] = None) -> bool:
+        return self.offer([{
+            "user_id": user_id,
+            "event_type": event_type,
+            "topic_slug": topic_slug,
+            "lesson_number": lesson_number,
+            "task_number": task_number,
+            "payload": payload,
+            "occurred_at": datetime.now(timezone.utc),
+        }])
+
+    def offer(self, rows: list) -> bool:
+        """Постановка событий в очередь: все или ни одного"""
+        with self._lock:
+            if len(self._events) + len(rows) > self.capacity:
+                self.dropped += len(rows)
+                return False
+            self._events.extend(rows)
+            self.accepted += len(rows)
+            full = len(self._events) >= self.batch_size
+        if full:
+            self._notify()
+        return True
+
+    def _notify(self) -> None:
+        loop, wake = self._loop, self._wake
+        if loop is None or wake is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            wake.set()
+        else:
+            # События из threadpool (режим sync)
+            loop.call_soon_threadsafe(wake.set)
+
+    def _take(self) -> list:
+        with self._lock:
+            count = min(self.batch_size, len(self._events))
+            return [self._events.popleft() for _ in range(count)]
+
+    def _requeue(self, rows: list) -> None:
+        # Незаписанная пачка возвращается в начало очереди; если за время сбоя
+        # очередь заполнилась новыми событиями, не поместившееся отбрасывается
+        with self._lock:
+            keep = rows[:max(self.capacity - len(self._events), 0)]
+            self.dropped += len(rows) - len(keep)
+            self._events.extendleft(reversed(keep))
+
+    async def _write(self, rows: list) -> None:
+        statement = insert(LearningEvent).values(rows)
+        if async_engine is not None:
+            async with async_engine.begin() as connection:
+                await connection.execute(statement)
+        else:
+            await run_in_threadpool(_write_sync, statement)
+
+    async def flush(self) -> int:
+        """Запись всего накопленного пачками; возвращает число записанных событий"""
+        written = 0
+        while True:
+            rows = self._take()
+            if not rows:
+                return written
+            started = time.perf_counter()
+            try:
+                await self._write(rows)
+            except BaseException:
+                self._requeue(rows)
+                raise
+            self.flushes += 1
+            self.written += len(rows)
+            self.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+            written += len(rows)
+
+    async def _run(self) -> None:
+        delay = self.flush_interval
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+                delay = self.flush_interval
+            except Exception:
+                self.failures += 1
+                delay = min(delay * 2, MAX_RETRY_DELAY)
+                logger.warning("Не удалось записать учебные события, повтор через %.1f с", delay, exc_info=True)
+        await self.flush()
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float) -> None:
+        """Остановка фоновой задачи с записью остатка очереди"""
+        task, self._task = self._task, None
+        if task is None:
+            return
+        self._stopping = True
+        self._wake.set()
+
+        async def finish():
+            await task
+            # События, поставленные после последней записи фоновой задачи
+            await self.flush()
+
+        try:
+            await asyncio.wait_for(finish(), timeout=timeout)
+        except Exception:
+            logger.error("Учебные события не записаны при остановке: %d", len(self._events), exc_info=True)
+        finally:
+            self._loop = self._wake = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            buffered = len(self._events)
+        return {
+            "buffered": buffered,
+            "capacity": self.capacity,
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval,
+            "accepted": self.accepted,
+            "dropped": self.dropped,
+            "written": self.written,
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+
+event_log = EventLog(
+    capacity=EVENT_BUFFER_SIZE,
+    batch_size=EVENT_BATCH_SIZE,
+    flush_interval=EVENT_FLUSH_INTERVAL,
+)
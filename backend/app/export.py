@@ -0,0 +1,131 @@
+import csv
+import io
+import json
+import os
+from datetime import date, datetime, time, timedelta
+from typing import AsyncIterator, Iterator, Optional, Sequence
+
+from dotenv import load_dotenv
+from sqlalchemy import func, select
+from sqlalchemy.sql import Select
+
+from app.database import async_engine, db_router, engine
+from app.models import LessonProgress, User, UserLives
+
+try:
+    import orjson
+except ImportError:  # без orjson — стандартный json
+    orjson = None
+
+load_dotenv()
+
+# Сколько строк курсор отдаёт за раз: память выгрузки не зависит от числа строк
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))
+
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+COLUMNS = (
+    "user_id", "email", "username", "full_name", "is_active", "registered_at",
+    "current_lives", "max_lives", "topic_slug", "lesson_number", "status", "progress_changed_at",
+)
+
+
+def export_query(topic: Optional[str] = None, since: Optional[date] = None, until: Optional[date] = None) -> Select:
+    """Пользователи с жизнями и прогрессом: строка на запись прогресса.
+
+    Без фильтров в выгрузку попадают и пользователи без прогресса (с пустыми
+    столбцами урока); фильтры по теме и дате (since/until включительно, по
+    времени последнего изменения урока) оставляют только подходящие уроки.
+    """
+    changed_at = func.coalesce(LessonProgress.updated_at, LessonProgress.created_at)
+    filtered = topic is not None or since is not None or until is not None
+    query = (
+        select(
+            User.id, User.email, User.username, User.full_name, User.is_active, User.created_at,
+            UserLives.current_lives, UserLives.max_lives,
+            LessonProgress.topic_slug, LessonProgress.lesson_number, LessonProgress.status, changed_at,
+        )
+        .select_from(User)
+        .outerjoin(UserLives, UserLives.user_id == User.id)
+        .join(LessonProgress, LessonProgress.user_id == User.id, isouter=not filtered)
+        .order_by(User.id, LessonProgress.topic_slug, LessonProgress.lesson_number)
+    )
+    if topic is not None:
+        query = query.where(LessonProgress.topic_slug == topic)
+    if since is not None:
+        query = query.where(changed_at >= datetime.combine(since, time.min))
+    if until is not None:
+        query = query.where(changed_at < datetime.combine(until + timedelta(days=1), time.min))
+    return query
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+class CsvEncoder:
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+
+    def _flush(self) -> bytes:
+        data = self._buffer.getvalue().encode()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def header(self) -> bytes:
+        self._writer.writerow(COLUMNS)
+        return self._flush()
+
+    def rows(self, rows: Sequence[tuple]) -> bytes:
+        self._writer.writerows([[_plain(value) for value in row] for row in rows])
+        return self._flush()
+
+
+class NdjsonEncoder:
+    def header(self) -> bytes:
+        return b""
+
+    def rows(self, rows: Sequence[tuple]) -> bytes:
+        if orjson is not None:
+            return b"".join(orjson.dumps(dict(zip(COLUMNS, row))) + b"\n" for row in rows)
+        return "".join(
+            json.dumps(dict(zip(COLUMNS, map(_plain, row))), ensure_ascii=False) + "\n" for row in rows
+        ).encode()
+
+
+ENCODERS = {"csv": CsvEncoder, "ndjson": NdjsonEncoder}
+
+
+def _stream_sync(sync_engine, statement: Select, encoder) -> Iterator[bytes]:
+    # stream_results — серверный курсор (psycopg2), yield_per — чтение пачками
+    with sync_engine.connect() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE).execute(statement)
+        yield encoder.header()
+        for rows in result.partitions():
+            yield encoder.rows(rows)
+
+
+async def _stream_async(source, statement: Select, encoder) -> AsyncIterator[bytes]:
+    # AsyncConnection.stream открывает серверный курсор asyncpg
+    async with source.connect() as connection:
+        result = await connection.stream(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        yield encoder.header()
+        async for rows in result.partitions():
+            yield encoder.rows(rows)
+
+
+def export_stream(fmt: str, topic: Optional[str] = None, since: Optional[date] = None,
+                  until: Optional[date] = None):
+    """Тело выгрузки по частям для StreamingResponse.
+
+    Строки читаются курсором пачками по EXPORT_BATCH_SIZE и сразу кодируются,
+    поэтому память не растёт с размером выгрузки. Соединение занято до конца
+    передачи; при наличии реплик выгрузка читается из реплики.
+    """
+    statement = export_query(topic, since, until)
+    encoder = ENCODERS[fmt]()
+    source = db_router.next_replica() or async_engine or engine
+    if async_engine is not None:
+        return _stream_async(source, statement, encoder)
+    return _stream_sync(source, statement, encoder)
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.deployment import per_worker
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Настройки пула хеширования паролей.
+# Модуль не импортирует базу данных: он загружается в процессах-воркерах пула.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "process")  # process | thread
+# По умолчанию половина ядер хоста на все воркеры приложения (не меньше одного на воркер)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS") or per_worker((os.cpu_count() or 2) // 2))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE") or PASSWORD_HASH_WORKERS * 8)
+PASSWORD_HASH_RETRY_AFTER = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", "2"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+
+def hash_password(password: str) -> str:
+    """Хеширование пароля"""
+    # bcrypt учитывает только первые 72 байта
+    return pwd_context.hash(password[:72])
+
+
+def check_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Проверка пароля; вторым значением возвращается новый хеш, если сменилась стоимость bcrypt"""
+    ok = pwd_context.verify(plain_password[:72], hashed_password)
+    if ok and pwd_context.needs_update(hashed_password):
+        return True, hash_password(plain_password)
+    return ok, None
+
+
+def create_executor(kind: str, workers: int) -> Executor:
+    """Пул для bcrypt: процессы (по умолчанию) или потоки"""
+    if kind == "thread":
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+class PasswordHasherPool:
+    """Отдельный пул для bcrypt с ограниченной очередью.
+
+    Хеширование не занимает общий threadpool Starlette; при переполнении очереди
+    запрос сразу отклоняется с 503 и заголовком Retry-After.
+    """
+
+    def __init__(self, kind: str, workers: int, max_queue: int, retry_after: int):
+        self.kind = kind
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.restarts = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = create_executor(self.kind, self.workers)
+        return self._executor
+
+    def _replace_broken(self, broken: Executor) -> None:
+        """Новый пул вместо сломанного: процесс-воркер погиб (например, OOM),
+        и ProcessPoolExecutor больше не принимает задачи"""
+        with self._lock:
+            if self._executor is not broken:
+                # Пул уже пересоздал параллельный запрос
+                return
+            self._executor = None
+            self.restarts += 1
+        logger.error("Пул хеширования паролей сломан (погиб процесс-воркер), создаётся заново")
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self.in_flight >= self.max_queue:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Сервер перегружен, повторите попытку позже",
+                    headers={"Retry-After": str(self.retry_after)},
+                )
+            self.in_flight += 1
+
+    def _release(self, elapsed: float) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+            self.latency_total += elapsed
+            self.latency_max = max(self.latency_max, elapsed)
+
+    async def run(self, fn, *args):
+        self._admit()
+        started = time.perf_counter()
+        try:
+            # Одна повторная попытка в новом пуле, если прежний сломан
+            for attempt in range(2):
+                executor = self._get_executor()
+                try:
+                    return await asyncio.wrap_future(executor.submit(fn, *args))
+                except BrokenProcessPool:
+                    self._replace_broken(executor)
+                    if attempt:
+                        raise
+        finally:
+            self._release(time.perf_counter() - started)
+
+    def warm_up(self) -> None:
+        """Запуск воркеров заранее, чтобы первый логин не ждал их старта"""
+        executor = self._get_executor()
+        for _ in range(self.workers):
+            executor.submit(pwd_context.identify, "")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            completed = self.completed
+            return {
+                "executor": self.kind,
+                "workers": self.workers,
+                "bcrypt_rounds": BCRYPT_ROUNDS,
+                "queue_depth": self.in_flight,
+                "max_queue": self.max_queue,
+                "completed": completed,
+                "rejected": self.rejected,
+                "restarts": self.restarts,
+                "latency_avg_ms": round(self.latency_total / completed * 1000, 2) if completed else 0.0,
+                "latency_max_ms": round(self.latency_max * 1000, 2),
+            }
+
+
+hasher_pool = PasswordHasherPool(
+    kind=PASSWORD_HASH_EXECUTOR,
+    workers=PASSWORD_HASH_WORKERS,
+    max_queue=PASSWORD_HASH_MAX_QUEUE,
+    retry_after=PASSWORD_HASH_RETRY_AFTER,
+)
+
+
+async def hash_password_async(password: str) -> str:
+    """Хеширование пароля в отдельном пуле"""
+    return await hasher_pool.run(hash_password, password)
+
+
+async def check_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Проверка пароля в отдельном пуле"""
+    return await hasher_pool.run(check_password, plain_password, hashed_password)
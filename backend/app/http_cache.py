@@ -0,0 +1,43 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+
+# Пользовательские данные: кешировать только в браузере и всегда перепроверять
+PRIVATE_REVALIDATE = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """Слабый ETag из произвольного набора версий"""
+    digest = hashlib.sha1(":".join(str(p) for p in parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def user_etag(user) -> str:
+    """Версия данных пользователя: пользователь уже загружен аутентификацией,
+    поэтому тег вычисляется без запроса к БД. Изменяемые поля профиля входят
+    в тег, так как updated_at в SQLite хранится с точностью до секунды"""
+    return make_etag(
+        "user", user.id, user.updated_at or user.created_at, user.token_version or 0,
+        user.email, user.username, user.full_name, user.phone, user.avatar_url,
+    )
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Проверка заголовка If-None-Match (с учётом списка значений и *)"""
+    return etag_in_header(request.headers.get("if-none-match"), etag)
+
+
+def etag_in_header(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [c.strip() for c in header.split(",")]
+    # Слабое сравнение: префикс W/ не учитывается
+    bare = etag[2:] if etag.startswith("W/") else etag
+    return "*" in candidates or any(
+        (c[2:] if c.startswith("W/") else c) == bare for c in candidates
+    )
+
+
+def not_modified(etag: str, cache_control: str = PRIVATE_REVALIDATE) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
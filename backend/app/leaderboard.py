@@ -0,0 +1,148 @@
+import os
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import func, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.cache import TTLCache
+from app.database import dialect_insert
+from app.models import LeaderboardBucket, LeaderboardScore, User
+
+load_dotenv()
+
+# Максимальный размер топа и время кеширования топа в процессе
+LEADERBOARD_TOP_MAX = int(os.getenv("LEADERBOARD_TOP_MAX", "100"))
+LEADERBOARD_CACHE_TTL = float(os.getenv("LEADERBOARD_CACHE_TTL", "10"))
+
+ALL_TIME = "all"
+PERIODS = ("week", "all")
+
+# Топ одинаков для всех пользователей: (ключ периода, limit) -> тело ответа
+top_cache = TTLCache(maxsize=64, ttl=LEADERBOARD_CACHE_TTL)
+
+
+def week_start(today: Optional[date] = None) -> date:
+    today = today or date.today()
+    return today - timedelta(days=today.weekday())
+
+
+def period_key(period: str, today: Optional[date] = None) -> str:
+    """Ключ периода в таблицах рейтинга: "all" или понедельник недели"""
+    return ALL_TIME if period == ALL_TIME else week_start(today).isoformat()
+
+
+def record_completion(db: Session, user_id: int, today: Optional[date] = None) -> None:
+    """Учёт пройденного урока за всё время и за текущую неделю.
+
+    Выполняется в транзакции обновления прогресса, до commit: счётчик
+    пользователя увеличивается upsert'ом, а сам пользователь переходит из
+    корзины completed-1 в корзину completed.
+    """
+    periods = (ALL_TIME, period_key("week", today))
+    scores = LeaderboardScore.__table__
+    insert = dialect_insert(db, scores).values(
+        [{"period": period, "user_id": user_id, "completed": 1} for period in periods]
+    )
+    upsert = insert.on_conflict_do_update(
+        index_elements=["period", "user_id"],
+        set_={"completed": scores.c.completed + 1, "updated_at": func.now()},
+    ).returning(scores.c.period, scores.c.completed)
+    # Порядок строк постоянный, чтобы параллельные транзакции брали блокировки одинаково
+    totals = sorted(db.execute(upsert).all())
+
+    buckets = LeaderboardBucket.__table__
+    previous = [(period, completed - 1) for period, completed in totals if completed > 1]
+    if previous:
+        db.execute(
+            update(buckets)
+            .where(tuple_(buckets.c.period, buckets.c.completed).in_(previous))
+            .values(users=buckets.c.users - 1)
+        )
+    insert = dialect_insert(db, buckets).values(
+        [{"period": period, "completed": completed, "users": 1} for period, completed in totals]
+    )
+    db.execute(insert.on_conflict_do_update(
+        index_elements=["period", "completed"],
+        set_={"users": buckets.c.users + 1},
+    ))
+
+
+def _ranks(db: Session, key: str) -> Tuple[Dict[int, int], int]:
+    """Место для каждого значения счёта и число участников рейтинга"""
+    rows = (
+        db.query(LeaderboardBucket.completed, LeaderboardBucket.users)
+        .filter(LeaderboardBucket.period == key, LeaderboardBucket.users > 0)
+        .order_by(LeaderboardBucket.completed.desc())
+        .all()
+    )
+    ranks, ahead = {}, 0
+    for completed, users in rows:
+        ranks[completed] = ahead + 1
+        ahead += users
+    return ranks, ahead
+
+
+def _entries(db: Session, key: str, condition, descending: bool, limit: int) -> List[tuple]:
+    # При равном счёте порядок по user_id; оба столбца идут в одном
+    # направлении, поэтому выборка — чтение индекса рейтинга подряд
+    position = tuple_(LeaderboardScore.completed, LeaderboardScore.user_id)
+    order = (
+        (LeaderboardScore.completed.desc(), LeaderboardScore.user_id.desc()) if descending
+        else (LeaderboardScore.completed.asc(), LeaderboardScore.user_id.asc())
+    )
+    query = (
+        db.query(LeaderboardScore.user_id, LeaderboardScore.completed, User.username, User.avatar_url)
+        .join(User, User.id == LeaderboardScore.user_id)
+        .filter(LeaderboardScore.period == key)
+    )
+    if condition is not None:
+        query = query.filter(condition(position))
+    return query.order_by(*order).limit(limit).all()
+
+
+def _body(period: str, key: str, total: int, ranks: Dict[int, int], rows) -> dict:
+    return {
+        "period": period,
+        "period_start": None if key == ALL_TIME else key,
+        "total": total,
+        "items": [
+            {"rank": ranks.get(completed), "user_id": user_id, "username": username,
+             "avatar_url": avatar_url, "completed": completed}
+            for user_id, completed, username, avatar_url in rows
+        ],
+    }
+
+
+def top(db: Session, period: str, limit: int) -> dict:
+    key = period_key(period)
+    cached = top_cache.get((key, limit))
+    if cached is not None:
+        return cached
+    ranks, total = _ranks(db, key)
+    body = _body(period, key, total, ranks, _entries(db, key, None, True, limit))
+    top_cache.set((key, limit), body)
+    return body
+
+
+def position(db: Session, period: str, user: User, around: int) -> dict:
+    """Место пользователя и around участников выше и ниже него"""
+    key = period_key(period)
+    mine = (
+        db.query(LeaderboardScore.completed)
+        .filter(LeaderboardScore.period == key, LeaderboardScore.user_id == user.id)
+        .scalar()
+    )
+    ranks, total = _ranks(db, key)
+    rows = []
+    if mine:
+        me = (mine, user.id)
+        if around:
+            rows += reversed(_entries(db, key, lambda p: p > me, False, around))
+        rows.append((user.id, mine, user.username, user.avatar_url))
+        if around:
+            rows += _entries(db, key, lambda p: p < me, True, around)
+    body = _body(period, key, total, ranks, rows)
+    body.update(rank=ranks.get(mine) if mine else None, completed=mine or 0)
+    return body
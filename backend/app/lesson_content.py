@@ -0,0 +1,191 @@
+import glob
+import hashlib
+import json
+import os
+import sys
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CONTENT_DIR = os.getenv("CONTENT_DIR", os.path.join(os.path.dirname(__file__), "content"))
+CONTENT_CACHE_MAX_AGE = int(os.getenv("CONTENT_CACHE_MAX_AGE", "300"))
+
+TASK_TYPES = ("multiple_choice", "highlight", "dropdown", "matching")
+
+
+class ContentError(ValueError):
+    """Ошибка в файлах контента уроков"""
+
+
+class ContentPayload(NamedTuple):
+    body: bytes
+    etag: str
+
+
+def _dump(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _payload(obj) -> ContentPayload:
+    body = _dump(obj)
+    return ContentPayload(body=body, etag=f'"{hashlib.sha1(body).hexdigest()[:16]}"')
+
+
+def highlight_spans(text: str, highlights: List[dict], where: str = "") -> List[dict]:
+    """Расчёт смещений выделений в тексте задания.
+
+    Фразы ищутся по порядку: каждая — после конца предыдущей, поэтому
+    повторяющиеся в тексте фразы получают свои вхождения, а спаны не пересекаются.
+    """
+    spans = []
+    position = 0
+    for highlight in highlights:
+        phrase = highlight.get("text") or ""
+        start = text.find(phrase, position) if phrase else -1
+        if start < 0:
+            raise ContentError(f"{where}: фраза выделения {highlight.get('id')} не найдена в тексте: {phrase!r}")
+        end = start + len(phrase)
+        spans.append({**highlight, "startIndex": start, "endIndex": end})
+        position = end
+    return spans
+
+
+def _unique_ids(items: List[dict], where: str, what: str) -> set:
+    ids = [item.get("id") for item in items]
+    if None in ids or len(set(ids)) != len(ids):
+        raise ContentError(f"{where}: у {what} должны быть уникальные id")
+    return set(ids)
+
+
+def _prepare_task(task: dict, where: str) -> dict:
+    """Проверка задания и предрасчёт данных для клиента"""
+    task_type = task.get("type")
+    if task_type not in TASK_TYPES:
+        raise ContentError(f"{where}: неизвестный тип задания {task_type!r}")
+    if not task.get("title"):
+        raise ContentError(f"{where}: нет заголовка")
+
+    if task_type == "multiple_choice":
+        answer_ids = _unique_ids(task.get("answers") or [], where, "ответов")
+        correct = task.get("correct_answers") or []
+        if not correct or not set(correct) <= answer_ids:
+            raise ContentError(f"{where}: correct_answers ссылаются на несуществующие ответы")
+    elif task_type == "highlight":
+        highlights = task.get("highlights") or []
+        _unique_ids(highlights, where, "выделений")
+        task = {**task, "highlights": highlight_spans(task.get("text") or "", highlights, where)}
+    elif task_type == "dropdown":
+        option_ids = _unique_ids(task.get("options") or [], where, "вариантов")
+        items = task.get("items") or []
+        _unique_ids(items, where, "пунктов")
+        for item in items:
+            if item.get("correct") not in option_ids:
+                raise ContentError(f"{where}: пункт {item.get('id')} ссылается на несуществующий вариант")
+    return task
+
+
+def prepare_topic(data: dict, source: str) -> Tuple[str, dict, Dict[int, dict]]:
+    """Проверка файла темы. Возвращает slug, оглавление и уроки по номерам"""
+    slug = data.get("slug")
+    if not slug:
+        raise ContentError(f"{source}: не указан slug темы")
+    lessons: Dict[int, dict] = {}
+    for lesson in data.get("lessons") or []:
+        number = lesson.get("number")
+        where = f"{slug}/урок {number}"
+        if not isinstance(number, int) or number in lessons:
+            raise ContentError(f"{where}: номер урока должен быть уникальным целым числом")
+        if not lesson.get("title"):
+            raise ContentError(f"{where}: нет заголовка")
+        tasks = [
+            _prepare_task(task, f"{where}/задание {index}")
+            for index, task in enumerate(lesson.get("tasks") or [], start=1)
+        ]
+        lessons[number] = {
+            "number": number,
+            "title": lesson["title"],
+            "body_html": lesson.get("body_html") or "",
+            "tasks": tasks,
+        }
+
+    numbers = sorted(lessons)
+    for current, following in zip(numbers, numbers[1:] + [None]):
+        lessons[current]["next_lesson"] = following
+    index = {
+        "slug": slug,
+        "lessons": [
+            {"number": n, "title": lessons[n]["title"], "task_count": len(lessons[n]["tasks"])}
+            for n in numbers
+        ],
+    }
+    return slug, index, lessons
+
+
+class ContentCatalog:
+    """Контент уроков и заданий в памяти процесса.
+
+    Читается из JSON-файлов (по файлу на тему) при старте: смещения выделений
+    рассчитываются и проверяются один раз, а для оглавления темы и каждого
+    урока хранятся готовые JSON-тела с ETag.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._indexes: Optional[Dict[str, ContentPayload]] = None
+        self._lessons: Dict[Tuple[str, int], ContentPayload] = {}
+
+    def load(self) -> None:
+        indexes: Dict[str, ContentPayload] = {}
+        lessons: Dict[Tuple[str, int], ContentPayload] = {}
+        for path in sorted(glob.glob(os.path.join(self.directory, "*.json"))):
+            with open(path, encoding="utf-8") as f:
+                try:
+                    data = json.load(f)
+                except json.JSONDecodeError as e:
+                    raise ContentError(f"{path}: некорректный JSON: {e}") from e
+            slug, index, topic_lessons = prepare_topic(data, path)
+            if slug in indexes:
+                raise ContentError(f"{path}: тема {slug} уже описана в другом файле")
+            indexes[slug] = _payload(index)
+            for number, lesson in topic_lessons.items():
+                lessons[(slug, number)] = _payload(lesson)
+        with self._lock:
+            self._indexes = indexes
+            self._lessons = lessons
+
+    def _ensure_loaded(self) -> Dict[str, ContentPayload]:
+        if self._indexes is None:
+            self.load()
+        return self._indexes
+
+    def topic_index(self, slug: str) -> Optional[ContentPayload]:
+        return self._ensure_loaded().get(slug)
+
+    def lesson(self, slug: str, number: int) -> Optional[ContentPayload]:
+        self._ensure_loaded()
+        return self._lessons.get((slug, number))
+
+    def stats(self) -> dict:
+        indexes = self._indexes or {}
+        return {
+            "topics": len(indexes),
+            "lessons": len(self._lessons),
+            "bytes": sum(len(p.body) for p in self._lessons.values()),
+        }
+
+
+content_catalog = ContentCatalog(CONTENT_DIR)
+
+
+if __name__ == "__main__":
+    # Проверка контента перед выкладкой: python -m app.lesson_content
+    try:
+        content_catalog.load()
+    except ContentError as e:
+        print(f"Ошибка контента: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(content_catalog.stats(), ensure_ascii=False))
@@ -0,0 +1,361 @@
+import asyncio
+import json
+import logging
+import os
+from typing import AsyncIterator, Callable, Dict, Optional, Set
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+
+from app.deployment import WEB_WORKERS
+from app.metrics import METRICS_ENABLED, live_connections_total, live_events_total
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # общий канал не нужен при LIVE_BACKEND=memory
+    redis_asyncio = None
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# memory — события доходят только до подключений этого воркера;
+# redis — рассылка через pub/sub всем воркерам и экземплярам
+LIVE_BACKEND = os.getenv("LIVE_BACKEND", "memory")
+LIVE_REDIS_URL = os.getenv("LIVE_REDIS_URL", "redis://localhost:6379/0")
+LIVE_CHANNEL = os.getenv("LIVE_CHANNEL", "finlingo:live")
+# Ограничения подключений на воркер и на пользователя
+LIVE_MAX_CONNECTIONS = int(os.getenv("LIVE_MAX_CONNECTIONS", "5000"))
+LIVE_MAX_PER_USER = int(os.getenv("LIVE_MAX_PER_USER", "5"))
+# Комментарий-пинг в простаивающий поток: держит соединение через прокси
+# и выявляет отключившихся клиентов
+LIVE_HEARTBEAT_SECONDS = float(os.getenv("LIVE_HEARTBEAT_SECONDS", "25"))
+# Неотправленных событий на подключение; при переполнении клиент получает resync
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "32"))
+# Пауза перед переподключением клиента (поле retry в SSE), мс
+LIVE_RETRY_MS = int(os.getenv("LIVE_RETRY_MS", "5000"))
+LIVE_RETRY_AFTER = int(os.getenv("LIVE_RETRY_AFTER", "10"))
+
+# Служебные элементы очереди подключения
+HEARTBEAT = object()
+CLOSE = object()
+RESYNC = {"type": "resync"}
+
+
+def format_event(event: dict) -> bytes:
+    """Событие в формате text/event-stream: имя — тип события, данные — JSON"""
+    data = json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+    return f"event: {event['type']}\ndata: {data}\n\n".encode()
+
+
+class Subscription:
+    """Подключение пользователя: ограниченная очередь неотправленных событий"""
+
+    __slots__ = ("user_id", "queue")
+
+    def __init__(self, user_id: int, queue_size: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def put(self, item) -> bool:
+        """False, если очередь переполнена и сброшена (клиент не успевает читать)"""
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            # Пропущенные события не досылаются: клиент перечитает состояние
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            return False
+
+
+class MemoryBackend:
+    """События остаются в процессе: подходит для одного воркера"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._deliver: Optional[Callable[[int, dict], None]] = None
+
+    async def start(self, deliver: Callable[[int, dict], None], resync: Callable[[], None]) -> None:
+        self._deliver = deliver
+
+    def publish(self, user_id: int, event: dict) -> None:
+        if self._deliver is not None:
+            self._deliver(user_id, event)
+
+    async def stop(self) -> None:
+        self._deliver = None
+
+    def stats(self) -> dict:
+        return {}
+
+
+class SharedChannelBackend:
+    """Рассылка событий всем воркерам через один канал pub/sub (Redis).
+
+    Каждый воркер получает все сообщения канала и доставляет их своим
+    подключениям; свои публикации воркер тоже получает из канала, поэтому
+    порядок событий у всех подключений одинаковый. Подойдёт любой клиент с
+    асинхронными publish() и pubsub() как у redis.asyncio — например,
+    локальная замена в тестах.
+    """
+
+    name = "redis"
+
+    def __init__(self, client, channel: str):
+        self.client = client
+        self.channel = channel
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._pending: Set[asyncio.Task] = set()
+        self.publish_errors = 0
+        self.listen_errors = 0
+
+    @classmethod
+    def from_url(cls, url: str, channel: str) -> "SharedChannelBackend":
+        if redis_asyncio is None:
+            raise RuntimeError("LIVE_BACKEND=redis требует пакет redis")
+        return cls(redis_asyncio.from_url(url), channel)
+
+    async def start(self, deliver: Callable[[int, dict], None], resync: Callable[[], None]) -> None:
+        # Подписка — в фоновой задаче: недоступный Redis не мешает старту воркера
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self._listener = asyncio.create_task(self._listen(deliver, resync))
+
+    async def _listen(self, deliver: Callable[[int, dict], None], resync: Callable[[], None]) -> None:
+        delay = 1.0
+        failed = False
+        while True:
+            try:
+                await self._pubsub.subscribe(self.channel)
+                if failed:
+                    # Пока канал был недоступен, события могли потеряться
+                    resync()
+                    failed = False
+                async for message in self._pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    data = json.loads(message["data"])
+                    deliver(data["user_id"], data["event"])
+                    delay = 1.0
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                failed = True
+                self.listen_errors += 1
+                logger.warning("Канал живых обновлений недоступен, повтор через %.0f с", delay, exc_info=True)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    def publish(self, user_id: int, event: dict) -> None:
+        # Публикация не задерживает ответ маршрута: отправка идёт отдельной задачей
+        task = asyncio.create_task(self._send(json.dumps({"user_id": user_id, "event": event})))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _send(self, message: str) -> None:
+        try:
+            await self.client.publish(self.channel, message)
+        except Exception:
+            self.publish_errors += 1
+            logger.warning("Не удалось опубликовать живое обновление", exc_info=True)
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        pubsub, self._pubsub = self._pubsub, None
+        if pubsub is not None:
+            try:
+                await pubsub.unsubscribe(self.channel)
+            finally:
+                # aclose() появился в redis 5.0.1, close() в новых версиях устарел
+                close = getattr(pubsub, "aclose", None) or pubsub.close
+                await close()
+
+    def stats(self) -> dict:
+        return {"publish_errors": self.publish_errors, "listen_errors": self.listen_errors}
+
+
+def create_backend(kind: str):
+    if kind == "memory":
+        return MemoryBackend()
+    if kind == "redis":
+        return SharedChannelBackend.from_url(LIVE_REDIS_URL, LIVE_CHANNEL)
+    raise ValueError(f"Неизвестный LIVE_BACKEND: {kind}")
+
+
+class LiveBroker:
+    """Живые обновления жизней и прогресса для открытых вкладок пользователя.
+
+    Маршруты публикуют изменение после commit (publish не ждёт доставки), брокер
+    раскладывает его по очередям подключений этого пользователя. Простаивающее
+    подключение — это корутина, ждущая свою очередь: таймеров на подключение
+    нет, пинги раскладывает одна общая задача, поэтому тысячи открытых потоков
+    на воркер обходятся дёшево. Число подключений ограничено на воркер и на
+    пользователя; клиент, не успевающий читать, получает resync.
+    """
+
+    def __init__(self, backend, max_connections: int, max_per_user: int, heartbeat: float, queue_size: int):
+        self.backend = backend
+        self.max_connections = max_connections
+        self.max_per_user = max_per_user
+        self.heartbeat = heartbeat
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.connections = 0
+        self.published = 0
+        self.delivered = 0
+        self.rejected = 0
+        self.resyncs = 0
+
+    def admit(self, user_id: int) -> None:
+        """503/429 до начала потока, если подключений слишком много или воркер останавливается"""
+        if self._closing or self.connections >= self.max_connections:
+            self._reject("worker_limit")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Слишком много подключений, повторите позже",
+                headers={"Retry-After": str(LIVE_RETRY_AFTER)},
+            )
+        if len(self._subscribers.get(user_id, ())) >= self.max_per_user:
+            self._reject("user_limit")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Слишком много открытых подключений пользователя",
+                headers={"Retry-After": str(LIVE_RETRY_AFTER)},
+            )
+
+    def _reject(self, reason: str) -> None:
+        self.rejected += 1
+        if METRICS_ENABLED:
+            live_connections_total.inc((reason,))
+
+    def _subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(subscription)
+        self.connections += 1
+        if METRICS_ENABLED:
+            live_connections_total.inc(("accepted",))
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.user_id)
+        if subscribers is None or subscription not in subscribers:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.user_id]
+        self.connections -= 1
+
+    def publish(self, user_id: int, event: dict) -> None:
+        """Изменение для всех подключений пользователя (во всех воркерах при общем канале)"""
+        self.published += 1
+        if METRICS_ENABLED:
+            live_events_total.inc((event["type"],))
+        try:
+            self.backend.publish(user_id, event)
+        except Exception:
+            logger.warning("Не удалось опубликовать живое обновление", exc_info=True)
+
+    def _deliver(self, user_id: int, event: dict) -> None:
+        for subscription in self._subscribers.get(user_id, ()):
+            if subscription.put(event):
+                self.delivered += 1
+            else:
+                self.resyncs += 1
+
+    def _resync_all(self) -> None:
+        for subscribers in list(self._subscribers.values()):
+            for subscription in subscribers:
+                subscription.put(RESYNC)
+        self.resyncs += self.connections
+
+    async def _heartbeats(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            for subscribers in list(self._subscribers.values()):
+                for subscription in subscribers:
+                    # В очереди уже есть событие — пинг не нужен
+                    if subscription.queue.empty():
+                        subscription.queue.put_nowait(HEARTBEAT)
+
+    async def stream(self, user_id: int) -> AsyncIterator[bytes]:
+        """Тело ответа text/event-stream; подключение снимается при отключении клиента"""
+        subscription = self._subscribe(user_id)
+        try:
+            yield f"retry: {LIVE_RETRY_MS}\n: connected\n\n".encode()
+            while True:
+                item = await subscription.queue.get()
+                if item is CLOSE:
+                    return
+                if item is HEARTBEAT:
+                    yield b": ping\n\n"
+                else:
+                    yield format_event(item)
+        finally:
+            self._unsubscribe(subscription)
+
+    async def start(self) -> None:
+        self._closing = False
+        if self.backend.name == "memory" and WEB_WORKERS > 1:
+            logger.error(
+                "LIVE_BACKEND=memory при %d воркерах: события доходят только до подключений "
+                "воркера, обработавшего запрос. Задайте LIVE_BACKEND=redis", WEB_WORKERS,
+            )
+        await self.backend.start(self._deliver, self._resync_all)
+        self._heartbeat_task = asyncio.create_task(self._heartbeats())
+
+    def close_streams(self) -> None:
+        """Завершение открытых потоков: сервер не ждёт их при остановке воркера,
+        а клиенты переподключаются к другому воркеру"""
+        self._closing = True
+        for subscribers in list(self._subscribers.values()):
+            for subscription in subscribers:
+                # Неотправленные события не нужны: после переподключения клиент перечитает состояние
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.queue.put_nowait(CLOSE)
+
+    async def stop(self) -> None:
+        self.close_streams()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        try:
+            await self.backend.stop()
+        except Exception:
+            logger.warning("Канал живых обновлений закрыт с ошибкой", exc_info=True)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "connections": self.connections,
+            "users": len(self._subscribers),
+            "max_connections": self.max_connections,
+            "max_per_user": self.max_per_user,
+            "published": self.published,
+            "delivered": self.delivered,
+            "rejected": self.rejected,
+            "resyncs": self.resyncs,
+            **self.backend.stats(),
+        }
+
+
+live_broker = LiveBroker(
+    create_backend(LIVE_BACKEND),
+    max_connections=LIVE_MAX_CONNECTIONS,
+    max_per_user=LIVE_MAX_PER_USER,
+    heartbeat=LIVE_HEARTBEAT_SECONDS,
+    queue_size=LIVE_QUEUE_SIZE,
+)
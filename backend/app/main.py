@@ -1,7 +1,16 @@
+import time
+
+# Начало импорта приложения — для замера времени до готовности воркера
+IMPORT_STARTED = time.perf_counter()
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import Session
+import logging
 import os
 from dotenv import load_dotenv
 
@@ -9,18 +18,103 @@ from app.database import get_db
 from app.routers import auth, users, lives
 from app.routers import topics as topics_router
 from app.routers import progress as progress_router
-from app.models import Base
-from app.database import engine
+from app.routers import content as content_router
+from app.routers import leaderboard as leaderboard_router
+from app.routers import events as events_router
+from app.routers import admin as admin_router
+from app.routers import live as live_router
+from app.database import check_database, get_pool_stats, warm_up_pool, DatabaseUnavailable
+from app.db_pool import DB_POOL_WARMUP
+from app.auth import USER_CACHE_ENABLED, get_internal_access, user_cache, user_generations
+from app.hashing import hasher_pool
+from app.schema import ensure_schema
+from app.avatars import UPLOAD_REQUEST_LIMIT, AVATAR_DIR, AVATAR_URL_PREFIX
+from app.user_import import IMPORT_MAX_BYTES
+from app.middleware import BodySizeLimitMiddleware, CompressionMiddleware, ReadYourWritesMiddleware
+from app.responses import DefaultResponse
+from app.metrics import METRICS_ENABLED, MetricsMiddleware, instrument_queries, render_metrics
+from app.database import (
+    PRIMARY_COOKIE, READ_METHODS, READ_YOUR_WRITES_SECONDS, active_engine, db_router, pool_metrics,
+    replica_sync_engines,
+)
+from app.static_files import UploadStaticFiles
+from app.topic_catalog import topic_catalog
+from app.lesson_content import content_catalog
+from app.event_log import EVENT_SHUTDOWN_TIMEOUT, event_log
+from app.rate_limit import auth_limiter
+from app.live_updates import live_broker
+from app.database import SessionLocal
 
 load_dotenv()
 
-# Создаем таблицы
-Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
+# Журнал сервера (uvicorn/gunicorn): сообщения о старте видны без настройки логирования
+server_logger = logging.getLogger("uvicorn.error")
+
+# Применять миграции при старте (для docker-compose); в продакшене можно
+# выключить и запускать `alembic upgrade head` отдельным шагом
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "true").lower() in ("1", "true", "yes")
+
+# Сжатие ответов (Brotli/gzip) начиная с COMPRESSION_MIN_SIZE байт
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+# Время импорта, старта (lifespan) и от начала импорта до готовности, мс
+startup_timings = {}
+
+def load_topic_catalog():
+    try:
+        with SessionLocal() as db:
+            topic_catalog.load(db)
+    except Exception:
+        # Каталог подгрузится при первом запросе
+        logger.warning("Не удалось загрузить каталог тем при старте", exc_info=True)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Старт воркера: всё, что обращается к БД и внешним ресурсам, выполняется
+    здесь, а не при импорте модуля"""
+    started = time.perf_counter()
+    # Ошибка в контенте уроков должна остановить старт, а не всплыть у пользователя
+    content_catalog.load()
+    if AUTO_MIGRATE:
+        ensure_schema()
+    try:
+        await warm_up_pool(DB_POOL_WARMUP)
+    except Exception:
+        logger.warning("Не удалось открыть соединения с БД при старте", exc_info=True)
+    load_topic_catalog()
+    hasher_pool.warm_up()
+    event_log.start()
+    await live_broker.start()
+
+    ready = time.perf_counter()
+    startup_timings.update(
+        startup_ms=round((ready - started) * 1000, 1),
+        import_to_ready_ms=round((ready - IMPORT_STARTED) * 1000, 1),
+    )
+    server_logger.info(
+        "Воркер %d готов: импорт %.0f мс, старт %.0f мс, от импорта до готовности %.0f мс",
+        os.getpid(), startup_timings["import_ms"], startup_timings["startup_ms"],
+        startup_timings["import_to_ready_ms"],
+    )
+    try:
+        yield
+    finally:
+        # Открытые потоки закрываются: клиенты переподключатся к другому воркеру
+        await live_broker.stop()
+        # Остаток журнала событий записывается до остановки воркера
+        await event_log.stop(EVENT_SHUTDOWN_TIMEOUT)
+        hasher_pool.shutdown()
 
 app = FastAPI(
     title="Fingram API",
     description="API для обучения бытовым темам",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=DefaultResponse,
+    lifespan=lifespan,
 )
 
 # Настройка CORS
@@ -37,12 +131,65 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Ограничение размера загрузки аватара до разбора multipart и файла когорты
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={
+        "/api/users/upload-avatar": UPLOAD_REQUEST_LIMIT,
+        "/api/admin/users/import": IMPORT_MAX_BYTES,
+    },
+)
+
+# С репликами: после своей записи клиент какое-то время читает из основной БД
+if replica_sync_engines:
+    app.add_middleware(
+        ReadYourWritesMiddleware,
+        cookie_name=PRIMARY_COOKIE,
+        window=READ_YOUR_WRITES_SECONDS,
+        read_methods=READ_METHODS,
+    )
+
+if COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=COMPRESSION_MIN_SIZE,
+        gzip_level=GZIP_LEVEL,
+        brotli_quality=BROTLI_QUALITY,
+    )
+
+# Метрики по маршрутам (внешний слой: время учитывает всю обработку)
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+instrument_queries(active_engine)
+for replica in replica_sync_engines:
+    instrument_queries(replica)
+
+# Пул не выдал соединение за DB_POOL_TIMEOUT: 503 вместо 500, клиент повторит
+# запрос. Таймауты пулов реплик тоже учитываются в счётчике основного пула
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request, exc):
+    pool_metrics.incr("timeouts")
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "База данных перегружена, повторите запрос позже"},
+        headers={"Retry-After": "1"},
+    )
+
 # Подключение роутеров
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(users.router, prefix="/api/users", tags=["users"])
 app.include_router(lives.router, prefix="/api/lives", tags=["lives"])
 app.include_router(topics_router.router, prefix="/api/topics", tags=["topics"])
 app.include_router(progress_router.router, prefix="/api/progress", tags=["progress"])
+app.include_router(content_router.router, prefix="/api/content", tags=["content"])
+app.include_router(leaderboard_router.router, prefix="/api/leaderboard", tags=["leaderboard"])
+app.include_router(events_router.router, prefix="/api/events", tags=["events"])
+app.include_router(admin_router.router, prefix="/api/admin", tags=["admin"])
+app.include_router(live_router.router, prefix="/api/live", tags=["live"])
+
+# Загруженные аватары: ETag/304, Range и immutable-кеш для имён с хешем
+os.makedirs(AVATAR_DIR, exist_ok=True)
+app.mount(AVATAR_URL_PREFIX, UploadStaticFiles(directory=AVATAR_DIR), name="avatars")
 
 @app.get("/")
 async def root():
@@ -50,4 +197,36 @@ async def root():
 
 @app.get("/api/health")
 async def health_check():
+    try:
+        await check_database()
+    except DatabaseUnavailable as e:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "unhealthy", "detail": str(e)},
+        )
     return {"status": "healthy"}
+
+@app.get("/api/internal/stats", dependencies=[Depends(get_internal_access)])
+async def internal_stats():
+    """Внутренние метрики: пул соединений, кеш пользователей, пул хеширования паролей"""
+    return {
+        "db_pool": get_pool_stats(),
+        "db_routing": db_router.stats(),
+        "user_cache": {**user_cache.stats(), "backend": user_generations.name, "enabled": USER_CACHE_ENABLED},
+        "topic_catalog": topic_catalog.stats(),
+        "content": content_catalog.stats(),
+        "password_hashing": hasher_pool.stats(),
+        "event_log": event_log.stats(),
+        "rate_limit": auth_limiter.stats(),
+        "live": live_broker.stats(),
+        "startup": startup_timings,
+    }
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(get_internal_access)])
+async def metrics():
+    """Метрики в текстовом формате Prometheus (по процессу-воркеру)"""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return render_metrics(get_pool_stats())
+
+startup_timings["import_ms"] = round((time.perf_counter() - IMPORT_STARTED) * 1000, 1)
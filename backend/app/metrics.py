@@ -0,0 +1,242 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+from starlette.responses import Response
+
+load_dotenv()
+
+logger = logging.getLogger("app.sql")
+
+# Метрики запросов в формате Prometheus (/metrics); при выключении middleware
+# не подключается, а SQL-хуки нужны только для журнала медленных запросов
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Порог медленного SQL-запроса в мс (0 — не журналировать)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+class RequestStats:
+    """SQL-запросы в рамках одного HTTP-запроса"""
+
+    __slots__ = ("scope", "queries", "db_time")
+
+    def __init__(self, scope=None):
+        self.scope = scope
+        self.queries = 0
+        self.db_time = 0.0
+
+    @property
+    def route(self) -> str:
+        return _route_label(self.scope) if self.scope is not None else "-"
+
+
+# Контекст копируется в threadpool и в run_sync, поэтому хуки курсора
+# видят объект текущего HTTP-запроса
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str]):
+        self.name, self.help, self.label_names = name, help_text, tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        lines += [f"{self.name}{_labels(self.label_names, k)} {v}" for k, v in items]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name, self.help, self.label_names = name, help_text, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # labels -> [счётчики по корзинам..., +Inf, сумма]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+requests_total = Counter(
+    "http_requests_total", "Число HTTP-запросов", ("method", "route", "status"))
+request_duration = Histogram(
+    "http_request_duration_seconds", "Время обработки запроса", ("method", "route"), LATENCY_BUCKETS)
+request_queries = Histogram(
+    "http_request_db_queries", "SQL-запросов на HTTP-запрос", ("method", "route"), QUERY_COUNT_BUCKETS)
+request_db_time = Histogram(
+    "http_request_db_seconds", "Суммарное время SQL на HTTP-запрос", ("method", "route"), LATENCY_BUCKETS)
+slow_queries_total = Counter(
+    "db_slow_queries_total", "SQL-запросы дольше SLOW_QUERY_MS", ("route",))
+rate_limited_total = Counter(
+    "rate_limited_total", "Запросы, отклонённые ограничением частоты", ("action", "key"))
+db_routing_total = Counter(
+    "db_routing_total", "Выбор БД для запроса: основная или реплика и причина", ("target", "reason"))
+live_events_total = Counter(
+    "live_events_total", "Опубликованные живые обновления", ("type",))
+live_connections_total = Counter(
+    "live_connections_total", "Подключения к потоку живых обновлений: принятые и отклонённые", ("result",))
+
+
+# Долгоживущие потоки: их длительность — время подключения клиента, а не
+# обработки, и в гистограмме задержек она забивала бы верхние корзины
+STREAMING_ROUTES = {"/api/live/stream"}
+
+
+def _route_label(scope) -> str:
+    # FastAPI кладёт найденный маршрут в scope: шаблон пути вместо конкретного URL
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path:
+        return path
+    return "static" if scope.get("endpoint") is not None else "unmatched"
+
+
+class MetricsMiddleware:
+    """Задержка, код ответа, число SQL-запросов и время в БД по маршрутам"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # scope дополняется роутером, поэтому маршрут определяется лениво
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        status = "500"
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request.reset(token)
+            route = stats.route
+            if route != "/metrics":
+                labels = (scope["method"], route)
+                requests_total.inc((scope["method"], route, status))
+                if route not in STREAMING_ROUTES:
+                    request_duration.observe(labels, elapsed)
+                request_queries.observe(labels, stats.queries)
+                request_db_time.observe(labels, stats.db_time)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Время начала хранится в контексте выполнения: если запрос упал,
+    # after_cursor_execute не вызывается, и контекст уходит вместе с ошибкой
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += elapsed
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        route = stats.route if stats is not None else "-"
+        if METRICS_ENABLED:
+            slow_queries_total.inc((route,))
+        logger.warning("Медленный запрос %.1f мс [%s]: %s", elapsed * 1000, route, " ".join(statement.split())[:1000])
+
+
+def instrument_queries(sync_engine) -> None:
+    """Подписка на выполнение SQL: счётчики запроса и журнал медленных запросов"""
+    if not METRICS_ENABLED and not SLOW_QUERY_MS:
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _pool_lines(pool: dict) -> list:
+    gauges = {
+        "db_pool_size": ("Размер пула", pool.get("size")),
+        "db_pool_in_use": ("Занятые соединения", pool.get("in_use")),
+        "db_pool_idle": ("Свободные соединения", pool.get("idle")),
+        "db_pool_overflow": ("Соединения сверх размера пула", pool.get("overflow")),
+    }
+    counters = {
+        "db_pool_checkouts_total": ("Выдачи соединений из пула", pool.get("checkouts")),
+        "db_pool_connects_total": ("Новые подключения к БД", pool.get("connects")),
+        "db_pool_invalidations_total": ("Сброшенные соединения", pool.get("invalidations")),
+        "db_pool_saturated_total": ("Выдачи, после которых пул заполнен", pool.get("saturated")),
+        "db_pool_timeouts_total": ("Таймауты ожидания соединения", pool.get("timeouts")),
+    }
+    lines = []
+    for kind, metrics in (("gauge", gauges), ("counter", counters)):
+        for name, (help_text, value) in metrics.items():
+            if value is None:
+                continue
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+    return lines
+
+
+def render_metrics(pool: dict) -> Response:
+    lines = []
+    for metric in (requests_total, request_duration, request_queries, request_db_time, slow_queries_total,
+                   rate_limited_total, db_routing_total, live_events_total, live_connections_total):
+        lines += metric.render()
+    lines += _pool_lines(pool)
+    return Response(content="\n".join(lines) + "\n", media_type=CONTENT_TYPE)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean, Text, ForeignKey, Index, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -15,6 +15,8 @@ class User(Base):
     avatar_url = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False)
+    # Увеличивается при деактивации/отзыве токенов: старые токены перестают действовать
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -25,7 +27,7 @@ class UserLives(Base):
     __tablename__ = "user_lives"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), unique=True, index=True, nullable=False)
     current_lives = Column(Integer, default=3, nullable=False)
     max_lives = Column(Integer, default=3, nullable=False)
     last_reset_date = Column(DateTime(timezone=True), server_default=func.now())
@@ -51,6 +53,15 @@ class Topic(Base):
 
 class LessonProgress(Base):
     __tablename__ = "lesson_progress"
+    __table_args__ = (
+        # Уникальность урока у пользователя; покрывающий индекс для выборок по (user_id, topic_slug)
+        Index(
+            "uq_lesson_progress_user_topic_lesson",
+            "user_id", "topic_slug", "lesson_number",
+            unique=True,
+            postgresql_include=["status"],
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -58,4 +69,60 @@ class LessonProgress(Base):
     lesson_number = Column(Integer, nullable=False)
     status = Column(String, default="locked", nullable=False)  # locked | active | completed
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+# Рейтинг: счётчики пройденных уроков, обновляются при прохождении урока
+
+class LeaderboardScore(Base):
+    """Число пройденных уроков пользователя за период.
+
+    period — "all" или дата понедельника недели (YYYY-MM-DD): новая неделя
+    начинается с нового ключа, сбрасывать ничего не нужно.
+    """
+    __tablename__ = "leaderboard_scores"
+    __table_args__ = (
+        # Топ и соседи по рейтингу — диапазонное чтение индекса в пределах периода
+        Index("ix_leaderboard_scores_rank", "period", "completed", "user_id"),
+    )
+
+    period = Column(String(10), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    completed = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class LeaderboardBucket(Base):
+    """Сколько пользователей набрали ровно completed уроков за период.
+
+    Место в рейтинге = 1 + число пользователей с большим счётом: сумма по
+    корзинам, которых не больше, чем различных значений счёта (уроков), а не
+    пользователей.
+    """
+    __tablename__ = "leaderboard_buckets"
+
+    period = Column(String(10), primary_key=True)
+    completed = Column(Integer, primary_key=True)
+    users = Column(Integer, default=0, nullable=False)
+
+
+class LearningEvent(Base):
+    """Журнал учебных событий (только добавление): начало и прохождение урока,
+    списание жизни, ответ на задание.
+
+    Записывается пачками из буфера в памяти (app.event_log); внешнего ключа на
+    users нет, чтобы история переживала удаление пользователя и вставка не
+    проверяла ссылки.
+    """
+    __tablename__ = "learning_events"
+    __table_args__ = (
+        Index("ix_learning_events_user_occurred", "user_id", "occurred_at"),
+    )
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    event_type = Column(String(32), nullable=False)
+    topic_slug = Column(String, nullable=True)
+    lesson_number = Column(Integer, nullable=True)
+    task_number = Column(Integer, nullable=True)
+    payload = Column(JSON(none_as_null=True), nullable=True)
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,214 @@
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, Request, status
+
+from app.metrics import METRICS_ENABLED, rate_limited_total
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # общее хранилище не нужно при RATE_LIMIT_BACKEND=memory
+    redis_asyncio = None
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+# memory — корзины в памяти процесса (лимит действует на каждый воркер отдельно);
+# redis — общие корзины для всех воркеров и экземпляров
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+# Сколько ключей хранит корзина в памяти (защита от перебора IP)
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+
+class Limit(NamedTuple):
+    """Корзина токенов: burst попыток подряд, дальше — rate попыток в секунду"""
+    burst: int
+    rate: float
+
+
+def parse_limit(value: str) -> Limit:
+    """"N/SECONDS": N попыток сразу, затем восстановление N токенов за SECONDS"""
+    count, _, seconds = value.partition("/")
+    count, seconds = int(count), float(seconds or 60)
+    return Limit(burst=count, rate=count / seconds)
+
+
+# Правила: действие -> {тип ключа: лимит}. За одним IP бывает целый класс
+# (NAT школы), поэтому лимиты по IP рассчитаны на десятки людей; перебор
+# паролей одного аккаунта сдерживает строгий лимит по email
+RULES: Dict[str, Dict[str, Limit]] = {
+    "login": {
+        "ip": parse_limit(os.getenv("RATE_LIMIT_LOGIN_IP", "120/60")),
+        "email": parse_limit(os.getenv("RATE_LIMIT_LOGIN_EMAIL", "5/60")),
+    },
+    "register": {
+        "ip": parse_limit(os.getenv("RATE_LIMIT_REGISTER_IP", "60/300")),
+        "email": parse_limit(os.getenv("RATE_LIMIT_REGISTER_EMAIL", "3/300")),
+    },
+}
+
+
+class MemoryBackend:
+    """Корзины в памяти процесса; старые ключи вытесняются по LRU"""
+
+    name = "memory"
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def acquire(self, key: str, limit: Limit) -> float:
+        """0, если токен взят, иначе сколько секунд ждать следующего"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (limit.burst, now))
+            tokens = min(limit.burst, tokens + (now - updated) * limit.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / limit.rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def stats(self) -> dict:
+        return {"keys": len(self._buckets), "max_keys": self.max_keys}
+
+
+# Атомарное списание токена в Redis; время — часы Redis, общие для всех воркеров
+TOKEN_BUCKET_SCRIPT = """
+local burst = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class SharedStoreBackend:
+    """Корзины в общем хранилище (Redis): лимит общий для всех воркеров.
+
+    Подойдёт любой клиент с асинхронным eval(script, numkeys, *keys_and_args)
+    совместимым с Redis — например, локальная замена в тестах.
+    """
+
+    name = "redis"
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "SharedStoreBackend":
+        if redis_asyncio is None:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis требует пакет redis")
+        return cls(redis_asyncio.from_url(url))
+
+    async def acquire(self, key: str, limit: Limit) -> float:
+        wait = await self.client.eval(TOKEN_BUCKET_SCRIPT, 1, key, limit.burst, limit.rate)
+        return float(wait)
+
+    def stats(self) -> dict:
+        return {}
+
+
+def create_backend(kind: str):
+    if kind == "memory":
+        return MemoryBackend(RATE_LIMIT_MAX_KEYS)
+    if kind == "redis":
+        return SharedStoreBackend.from_url(RATE_LIMIT_REDIS_URL)
+    raise ValueError(f"Неизвестный RATE_LIMIT_BACKEND: {kind}")
+
+
+def _email_key(email: str) -> str:
+    # В ключах хранилища не держим адреса в открытом виде
+    return hashlib.sha1(email.strip().lower().encode()).hexdigest()[:20]
+
+
+class RateLimiter:
+    """Ограничение попыток входа и регистрации по IP клиента и по email.
+
+    Проверка выполняется до обращения к БД и bcrypt: отклонённый запрос не
+    тратит ни соединение, ни процессорное время на хеширование. Если общее
+    хранилище недоступно, запрос пропускается (ошибка учитывается в stats).
+    """
+
+    def __init__(self, backend, rules: Dict[str, Dict[str, Limit]], enabled: bool = True):
+        self.backend = backend
+        self.rules = rules
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.rejected: Dict[str, int] = {}
+        self.backend_errors = 0
+
+    async def _acquire(self, key: str, limit: Limit) -> float:
+        try:
+            return await self.backend.acquire(key, limit)
+        except Exception:
+            with self._lock:
+                self.backend_errors += 1
+            logger.warning("Хранилище лимитов недоступно, запрос пропущен", exc_info=True)
+            return 0.0
+
+    async def check(self, action: str, request: Request, email: Optional[str] = None) -> None:
+        """429 с Retry-After, если для IP или email исчерпан лимит действия"""
+        if not self.enabled:
+            return
+        rules = self.rules[action]
+        keys = {"ip": request.client.host if request.client else "unknown"}
+        if email:
+            keys["email"] = _email_key(email)
+        for kind, value in keys.items():
+            wait = await self._acquire(f"rl:{action}:{kind}:{value}", rules[kind])
+            if wait > 0:
+                self._reject(action, kind)
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Слишком много попыток, повторите позже",
+                    headers={"Retry-After": str(math.ceil(wait))},
+                )
+
+    def _reject(self, action: str, kind: str) -> None:
+        with self._lock:
+            name = f"{action}:{kind}"
+            self.rejected[name] = self.rejected.get(name, 0) + 1
+        if METRICS_ENABLED:
+            rate_limited_total.inc((action, kind))
+
+    def stats(self) -> dict:
+        with self._lock:
+            rejected = dict(self.rejected)
+        return {
+            "enabled": self.enabled,
+            "backend": self.backend.name,
+            "rejected": rejected,
+            "backend_errors": self.backend_errors,
+            **self.backend.stats(),
+        }
+
+
+auth_limiter = RateLimiter(create_backend(RATE_LIMIT_BACKEND), RULES, enabled=RATE_LIMIT_ENABLED)
@@ -0,0 +1,46 @@
+import os
+from typing import Any, Mapping, Optional, Type
+
+from dotenv import load_dotenv
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # без orjson — стандартный json
+    orjson = None
+
+load_dotenv()
+
+# Быстрая сериализация ответов (orjson) как класс ответа по умолчанию
+FAST_JSON = os.getenv("FAST_JSON", "true").lower() in ("1", "true", "yes")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON-ответ через orjson: быстрее stdlib json и сразу выдаёт UTF-8"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+DefaultResponse = FastJSONResponse if FAST_JSON and orjson is not None else JSONResponse
+
+
+def model_response(schema: Type[BaseModel], obj, headers: Optional[Mapping[str, str]] = None) -> Response:
+    """Ответ по схеме без валидации — для горячих маршрутов.
+
+    FastAPI при response_model заново валидирует возвращённый объект (для
+    пользователя это ещё и проверка EmailStr) и кодирует его через
+    jsonable_encoder. Данные ORM-объекта уже прошли проверку при записи, поэтому
+    модель собирается через model_construct и сразу сериализуется pydantic-core.
+    response_model у маршрута остаётся для документации.
+    """
+    if not isinstance(obj, schema):
+        obj = schema.model_construct(**{name: getattr(obj, name) for name in schema.model_fields})
+    return Response(content=obj.model_dump_json(), media_type="application/json", headers=headers)
+
+
+def json_response(content, headers: Optional[Mapping[str, str]] = None) -> Response:
+    """Ответ из dict, собранного маршрутом из столбцов БД: форма уже
+    соответствует схеме, поэтому тело сериализуется без валидации"""
+    return DefaultResponse(content=content, headers=headers)
@@ -0,0 +1,56 @@
+from datetime import date
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.auth import get_current_admin
+from app.database import get_db
+from app.export import FORMATS, export_stream
+from app.models import User
+from app.responses import json_response
+from app.schemas import UserImportResult
+from app.user_import import import_lock, import_users, read_rows
+
+router = APIRouter()
+
+
+@router.post("/users/import", response_model=UserImportResult)
+async def import_cohort(
+    request: Request,
+    admin: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Массовая загрузка пользователей (когорты).
+
+    Тело — CSV с заголовком (email, username, full_name, password, phone),
+    NDJSON или JSON-массив; формат определяется по Content-Type. CSV и NDJSON
+    читаются потоком. Ошибки отдельных строк возвращаются в отчёте.
+    """
+    rows = read_rows(request)
+    if import_lock.locked():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Загрузка пользователей уже выполняется")
+    async with import_lock:
+        return json_response(await import_users(db, rows))
+
+
+@router.get("/export")
+async def export_progress(
+    format: Literal["csv", "ndjson"] = Query("csv"),
+    topic: Optional[str] = Query(None, description="Только уроки темы"),
+    since: Optional[date] = Query(None, description="Уроки, изменённые с этой даты"),
+    until: Optional[date] = Query(None, description="Уроки, изменённые по эту дату включительно"),
+    admin: User = Depends(get_current_admin)
+):
+    """Выгрузка пользователей с жизнями и прогрессом уроков (CSV или NDJSON).
+
+    Ответ передаётся потоком по мере чтения строк курсором БД, поэтому размер
+    выгрузки не ограничен памятью сервера.
+    """
+    filename = f"progress-{date.today().isoformat()}.{format}"
+    return StreamingResponse(
+        export_stream(format, topic, since, until),
+        media_type=FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,42 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from datetime import timedelta
 
-from app.database import get_db
+from app.database import get_db, run_db
 from app.models import User, UserLives
 from app.schemas import UserCreate, UserResponse, Token, UserLogin
 from app.auth import (
-    verify_password, 
-    get_password_hash, 
-    create_access_token, 
+    conflict_detail,
+    create_user_token,
     get_current_active_user,
+    invalidate_user,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
+from app.hashing import hash_password_async, check_password_async
+from app.http_cache import PRIVATE_REVALIDATE, etag_matches, not_modified, user_etag
+from app.responses import model_response
+from app.rate_limit import auth_limiter
 
 router = APIRouter()
 
-@router.post("/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    """Регистрация нового пользователя"""
-    # Проверяем, существует ли пользователь с таким email
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user:
-        raise HTTPException(
-            status_code=400,
-            detail="Пользователь с таким email уже существует"
-        )
-    
-    # Проверяем, существует ли пользователь с таким username
-    db_user = db.query(User).filter(User.username == user.username).first()
-    if db_user:
-        raise HTTPException(
-            status_code=400,
-            detail="Пользователь с таким именем пользователя уже существует"
-        )
-    
-    # Создаем нового пользователя
-    hashed_password = get_password_hash(user.password)
+def _create_user(db: Session, user: UserCreate, hashed_password: str) -> UserResponse:
+    """Пользователь и его жизни — одной транзакцией.
+
+    Отдельных проверок email и username нет: дубликат отклоняют уникальные
+    индексы, и проверка не расходится с параллельной регистрацией.
+    """
     db_user = User(
         email=user.email,
         username=user.username,
@@ -44,28 +35,50 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         phone=user.phone,
         hashed_password=hashed_password
     )
-    
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    
-    # Создаем записи жизней для нового пользователя
-    user_lives = UserLives(
-        user_id=db_user.id,
-        current_lives=3,
-        max_lives=3
-    )
-    db.add(user_lives)
+    try:
+        db.add(db_user)
+        # INSERT ... RETURNING: id и created_at приходят сразу
+        db.flush()
+        # Создаем записи жизней для нового пользователя
+        db.add(UserLives(user_id=db_user.id, current_lives=3, max_lives=3))
+        # Ответ собирается до commit, чтобы не перечитывать пользователя
+        response = UserResponse.model_construct(
+            **{name: getattr(db_user, name) for name in UserResponse.model_fields}
+        )
+        db.commit()
+    except IntegrityError as error:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=conflict_detail(error))
+    return response
+
+@router.post("/register", response_model=UserResponse)
+async def register(user: UserCreate, request: Request, db: Session = Depends(get_db)):
+    """Регистрация нового пользователя"""
+    # Лимит попыток проверяется раньше запросов к БД и bcrypt
+    await auth_limiter.check("register", request, user.email)
+    # bcrypt — в отдельном пуле хеширования, запись — одной транзакцией через run_db
+    hashed_password = await hash_password_async(user.password)
+    return model_response(UserResponse, await run_db(db, _create_user, user, hashed_password))
+
+def _get_user_by_email(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
+def _rehash_password(db: Session, user: User, new_hash: str):
+    user.hashed_password = new_hash
     db.commit()
-    
-    return db_user
 
 @router.post("/login", response_model=Token)
-def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(user_credentials: UserLogin, request: Request, db: Session = Depends(get_db)):
     """Авторизация пользователя"""
-    user = db.query(User).filter(User.email == user_credentials.email).first()
+    await auth_limiter.check("login", request, user_credentials.email)
+    user = await run_db(db, _get_user_by_email, user_credentials.email)
     
-    if not user or not verify_password(user_credentials.password, user.hashed_password):
+    new_hash = None
+    if user:
+        password_ok, new_hash = await check_password_async(
+            user_credentials.password, user.hashed_password
+        )
+    if not user or not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверный email или пароль",
@@ -79,13 +92,34 @@ def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
         )
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
-    )
+    access_token = create_user_token(user, expires_delta=access_token_expires)
+    
+    # Стоимость bcrypt изменилась — сохраняем пароль с новыми параметрами
+    if new_hash:
+        user_id = user.id
+        await run_db(db, _rehash_password, user, new_hash)
+        await invalidate_user(user_id)
     
     return {"access_token": access_token, "token_type": "bearer"}
 
+def _revoke_tokens(db: Session, user_id: int):
+    # Увеличение в самом UPDATE: параллельные отзывы не теряются
+    db.execute(update(User).where(User.id == user_id).values(token_version=User.token_version + 1))
+    db.commit()
+
+@router.post("/logout-all")
+async def logout_all(current_user: User = Depends(get_current_active_user), db: Session = Depends(get_db)):
+    """Отзыв всех выданных токенов пользователя (выход на всех устройствах)"""
+    user_id = current_user.id
+    await run_db(db, _revoke_tokens, user_id)
+    # Без сброса кеша отозванный токен совпадал бы с сохранённой версией до истечения записи
+    await invalidate_user(user_id)
+    return {"message": "Все сеансы завершены"}
+
 @router.get("/me", response_model=UserResponse)
-def read_users_me(current_user: User = Depends(get_current_active_user)):
+async def read_users_me(request: Request, current_user: User = Depends(get_current_active_user)):
     """Получение информации о текущем пользователе"""
-    return current_user
+    etag = user_etag(current_user)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return model_response(UserResponse, current_user, headers={"ETag": etag, "Cache-Control": PRIVATE_REVALIDATE})
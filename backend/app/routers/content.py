@@ -0,0 +1,37 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+
+from app.http_cache import etag_matches, not_modified
+from app.lesson_content import content_catalog, ContentPayload, CONTENT_CACHE_MAX_AGE
+
+router = APIRouter()
+
+CACHE_CONTROL = f"public, max-age={CONTENT_CACHE_MAX_AGE}"
+
+
+def _respond(request: Request, payload: ContentPayload) -> Response:
+    # Готовое тело из каталога контента: без сериализации на каждый запрос
+    if etag_matches(request, payload.etag):
+        return not_modified(payload.etag, CACHE_CONTROL)
+    return Response(
+        content=payload.body,
+        media_type="application/json",
+        headers={"ETag": payload.etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+
+@router.get("/{topic_slug}/lessons")
+async def list_lessons(topic_slug: str, request: Request):
+    """Оглавление темы: номера, заголовки и число заданий уроков"""
+    payload = content_catalog.topic_index(topic_slug)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Тема не найдена")
+    return _respond(request, payload)
+
+
+@router.get("/{topic_slug}/lessons/{lesson_number}")
+async def get_lesson(topic_slug: str, lesson_number: int, request: Request):
+    """Урок целиком: текст и задания с рассчитанными смещениями выделений"""
+    payload = content_catalog.lesson(topic_slug, lesson_number)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Урок не найден")
+    return _respond(request, payload)
@@ -0,0 +1,39 @@
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.auth import get_current_active_user
+from app.event_log import EVENT_RETRY_AFTER, event_log
+from app.models import User
+from app.schemas import EventBatch
+
+router = APIRouter()
+
+
+@router.post("", status_code=status.HTTP_202_ACCEPTED)
+async def post_events(batch: EventBatch, current_user: User = Depends(get_current_active_user)):
+    """Учебные события клиента (ответы на задания, открытие урока).
+
+    События ставятся в буфер и записываются в БД пачкой в фоне; при
+    переполненном буфере клиент получает 503 с Retry-After.
+    """
+    occurred_at = datetime.now(timezone.utc)
+    rows = [
+        {
+            "user_id": current_user.id,
+            "event_type": event.type,
+            "topic_slug": event.topic_slug,
+            "lesson_number": event.lesson_number,
+            "task_number": event.task_number,
+            "payload": event.payload,
+            "occurred_at": occurred_at,
+        }
+        for event in batch.events
+    ]
+    if not event_log.offer(rows):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Сервер перегружен, повторите попытку позже",
+            headers={"Retry-After": str(EVENT_RETRY_AFTER)},
+        )
+    return {"accepted": len(rows)}
@@ -0,0 +1,37 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.auth import get_current_active_user
+from app.database import get_db, run_db
+from app.leaderboard import LEADERBOARD_TOP_MAX, position, top
+from app.models import User
+from app.responses import json_response
+from app.schemas import LeaderboardPositionResponse, LeaderboardResponse
+
+router = APIRouter()
+
+Period = Literal["week", "all"]
+
+
+@router.get("", response_model=LeaderboardResponse)
+async def get_top(
+    period: Period = Query("week", description="week — текущая неделя, all — всё время"),
+    limit: int = Query(10, ge=1, le=LEADERBOARD_TOP_MAX),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Лучшие участники по числу пройденных уроков"""
+    return json_response(await run_db(db, top, period, limit))
+
+
+@router.get("/me", response_model=LeaderboardPositionResponse)
+async def get_my_position(
+    period: Period = Query("week", description="week — текущая неделя, all — всё время"),
+    around: int = Query(2, ge=0, le=10, description="Сколько соседей показать выше и ниже"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Место пользователя в рейтинге и соседи по рейтингу"""
+    return json_response(await run_db(db, position, period, current_user, around))
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from app.auth import get_current_active_user
+from app.database import get_db, release_db
+from app.live_updates import live_broker
+from app.models import User
+
+router = APIRouter()
+
+
+@router.get("/stream")
+async def live_stream(
+    current_user: User = Depends(get_current_active_user),
+    db=Depends(get_db),
+):
+    """Поток живых обновлений жизней и прогресса (text/event-stream).
+
+    События: lives (current_lives, max_lives), progress (topic_slug и
+    изменившиеся уроки), resync (клиент отстал — перечитать состояние).
+    В простое приходит комментарий-пинг.
+    """
+    user_id = current_user.id
+    live_broker.admit(user_id)
+    # Поток живёт часами: соединение с БД, взятое для аутентификации,
+    # возвращается в пул до начала ответа
+    await release_db(db)
+    return StreamingResponse(
+        live_broker.stream(user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
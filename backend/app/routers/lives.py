@@ -1,95 +1,182 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import case, func, update
 from sqlalchemy.orm import Session
-from datetime import datetime, date
+from datetime import datetime, date, time, timezone
 
-from app.database import get_db
+from app.database import get_db, run_db, dialect_insert
 from app.models import User, UserLives
 from app.schemas import UserLivesResponse, LivesUpdate
 from app.auth import get_current_active_user
+from app.http_cache import PRIVATE_REVALIDATE, etag_matches, make_etag, not_modified
+from app.responses import model_response
+from app.event_log import event_log
+from app.live_updates import live_broker
 
 router = APIRouter()
 
+DEFAULT_LIVES = 3
+
+# Сутки считаются по UTC и для сброса, и для last_reset_date: часы процесса
+# и часовой пояс БД не влияют на то, когда жизни восстанавливаются
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+def _today() -> date:
+    return _utc_now().date()
+
+def _day_start() -> datetime:
+    """Начало текущих суток (UTC): жизни, сброшенные раньше, считаются восстановленными"""
+    return datetime.combine(_today(), time.min, tzinfo=timezone.utc)
+
+def _utc_date(value: datetime) -> date:
+    # SQLite возвращает время без пояса, но пишем мы его в UTC
+    if value.tzinfo is None:
+        return value.date()
+    return value.astimezone(timezone.utc).date()
+
+def _default_lives(user_id: int) -> UserLives:
+    """Жизни по умолчанию для старых аккаунтов без записи (в БД не сохраняется)"""
+    day_start = _day_start()
+    return UserLives(
+        user_id=user_id, current_lives=DEFAULT_LIVES, max_lives=DEFAULT_LIVES,
+        last_reset_date=day_start, created_at=day_start,
+    )
+
+def _create_lives(db: Session, user_id: int):
+    # Записи жизней нет только у старых аккаунтов: создаём её при первой записи
+    db.execute(
+        dialect_insert(db, UserLives.__table__)
+        .values(user_id=user_id, current_lives=DEFAULT_LIVES, max_lives=DEFAULT_LIVES,
+                last_reset_date=_utc_now())
+        .on_conflict_do_nothing(index_elements=["user_id"])
+    )
+
+def _get_my_lives(db: Session, user_id: int):
+    # Только чтение: без записи в БД маршрут можно отдавать из реплики
+    user_lives = db.query(UserLives).filter(UserLives.user_id == user_id).first()
+    return user_lives or _default_lives(user_id)
+
+def _lives_etag(user_lives: UserLives) -> str:
+    # Дата входит в тег: с новым днём жизни восстанавливаются без записи в БД
+    return make_etag(
+        "lives", user_lives.user_id, user_lives.updated_at or user_lives.created_at,
+        user_lives.current_lives, user_lives.max_lives, user_lives.last_reset_date, _today(),
+    )
+
+def _lives_response(user_lives: UserLives) -> UserLivesResponse:
+    lives = UserLivesResponse.model_validate(user_lives)
+
+    # Новый день: жизни восстановлены. Сброс вычисляется при чтении и
+    # записывается только при следующем использовании жизни
+    if _today() > _utc_date(lives.last_reset_date):
+        lives = lives.model_copy(update={
+            "current_lives": lives.max_lives,
+            "last_reset_date": _day_start(),
+        })
+
+    return lives
+
 @router.get("/my-lives", response_model=UserLivesResponse)
-def get_my_lives(
+async def get_my_lives(
+    request: Request,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Получение информации о жизнях пользователя"""
-    user_lives = db.query(UserLives).filter(UserLives.user_id == current_user.id).first()
-    
-    if not user_lives:
-        # Создаем записи жизней, если их нет
-        user_lives = UserLives(
-            user_id=current_user.id,
-            current_lives=3,
-            max_lives=3
-        )
-        db.add(user_lives)
-        db.commit()
-        db.refresh(user_lives)
-    
-    # Проверяем, нужно ли сбросить жизни (новый день)
-    today = date.today()
-    last_reset = user_lives.last_reset_date.date()
-    
-    if today > last_reset:
-        user_lives.current_lives = user_lives.max_lives
-        user_lives.last_reset_date = datetime.now()
-        db.commit()
-        db.refresh(user_lives)
-    
-    return user_lives
+    user_lives = await run_db(db, _get_my_lives, current_user.id)
+    # Тег — по столбцам уже загруженной строки: 304 без сборки модели ответа
+    etag = _lives_etag(user_lives)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return model_response(
+        UserLivesResponse, _lives_response(user_lives),
+        headers={"ETag": etag, "Cache-Control": PRIVATE_REVALIDATE},
+    )
+
+def _update_my_lives(db: Session, user_id: int, lives_update: LivesUpdate):
+    user_lives = db.query(UserLives).filter(UserLives.user_id == user_id).first()
 
-@router.put("/my-lives", response_model=UserLivesResponse)
-def update_my_lives(
-    lives_update: LivesUpdate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
-):
-    """Обновление жизней пользователя (для админов или внутренней логики)"""
-    user_lives = db.query(UserLives).filter(UserLives.user_id == current_user.id).first()
-    
     if not user_lives:
-        raise HTTPException(
-            status_code=404,
-            detail="Записи жизней не найдены"
-        )
-    
+        _create_lives(db, user_id)
+        user_lives = db.query(UserLives).filter(UserLives.user_id == user_id).one()
+
     # Обновляем поля
     update_data = lives_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(user_lives, field, value)
-    
+
     db.commit()
     db.refresh(user_lives)
-    
+
     return user_lives
 
-@router.post("/use-life")
-def use_life(
+@router.put("/my-lives", response_model=UserLivesResponse)
+async def update_my_lives(
+    lives_update: LivesUpdate,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Использование одной жизни"""
-    user_lives = db.query(UserLives).filter(UserLives.user_id == current_user.id).first()
-    
-    if not user_lives:
-        raise HTTPException(
-            status_code=404,
-            detail="Записи жизней не найдены"
+    """Обновление жизней пользователя (для админов или внутренней логики)"""
+    user_id = current_user.id
+    user_lives = await run_db(db, _update_my_lives, user_id, lives_update)
+    live_broker.publish(user_id, {
+        "type": "lives",
+        "current_lives": user_lives.current_lives,
+        "max_lives": user_lives.max_lives,
+    })
+    return user_lives
+
+def _spend_life(db: Session, user_id: int):
+    # Один условный UPDATE: применяет отложенный дневной сброс и списывает
+    # жизнь, только если она есть. Параллельные запросы не уйдут в минус
+    now = _utc_now()
+    needs_reset = UserLives.last_reset_date < _day_start()
+    available = case((needs_reset, UserLives.max_lives), else_=UserLives.current_lives)
+    return db.execute(
+        update(UserLives)
+        .where(UserLives.user_id == user_id, available > 0)
+        .values(
+            current_lives=available - 1,
+            last_reset_date=case((needs_reset, now), else_=UserLives.last_reset_date),
+            updated_at=func.now(),
         )
-    
-    if user_lives.current_lives <= 0:
+        .returning(UserLives.current_lives, UserLives.max_lives)
+        .execution_options(synchronize_session=False)
+    ).first()
+
+def _use_life(db: Session, user_id: int):
+    result = _spend_life(db, user_id)
+
+    if result is None and not db.query(UserLives.id).filter(UserLives.user_id == user_id).first():
+        _create_lives(db, user_id)
+        result = _spend_life(db, user_id)
+    db.commit()
+
+    if result is None:
         raise HTTPException(
             status_code=400,
             detail="У вас закончились жизни"
         )
-    
-    user_lives.current_lives -= 1
-    db.commit()
-    
+
     return {
         "message": "Жизнь использована",
-        "remaining_lives": user_lives.current_lives,
-        "max_lives": user_lives.max_lives
+        "remaining_lives": result.current_lives,
+        "max_lives": result.max_lives
     }
+
+@router.post("/use-life")
+async def use_life(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Использование одной жизни"""
+    user_id = current_user.id
+    result = await run_db(db, _use_life, user_id)
+    event_log.emit(user_id, "life_spent", payload={"remaining_lives": result["remaining_lives"]})
+    # Другие вкладки пользователя получают новое число жизней без перезапроса
+    live_broker.publish(user_id, {
+        "type": "lives",
+        "current_lives": result["remaining_lives"],
+        "max_lives": result["max_lives"],
+    })
+    return result
@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import and_, case, func, literal, or_
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel
 
-from app.database import get_db
+from app.database import get_db, run_db, dialect_insert
 from app.models import LessonProgress, Topic, User
-from app.schemas import LessonProgressResponse, LessonProgressItem
+from app.schemas import LessonProgressResponse, AllProgressResponse
+from app.topic_catalog import topic_catalog
+from app.http_cache import PRIVATE_REVALIDATE, make_etag, etag_matches, not_modified
 from app.auth import get_current_active_user
+from app.leaderboard import record_completion
+from app.event_log import event_log
+from app.live_updates import live_broker
+from app.responses import json_response
 
 router = APIRouter()
 
@@ -15,118 +22,224 @@ class UpdateProgressRequest(BaseModel):
     status: str  # active | completed
 
 
-@router.get("/{topic_slug}", response_model=LessonProgressResponse)
-def get_topic_progress(
-    topic_slug: str,
+# Статус урока только растёт (locked -> active -> completed), поэтому число
+# уроков по статусам меняется при каждой записи. Время изменения в SQLite
+# хранится с точностью до секунды, и без этих счётчиков ETag не менялся бы
+# при двух записях в одну секунду
+VERSION_STATUSES = ("active", "completed")
+
+
+def _status_counts(statuses) -> tuple:
+    statuses = list(statuses)
+    return tuple(statuses.count(name) for name in VERSION_STATUSES)
+
+
+def _get_all_progress(db: Session, user_id: int, slugs: List[str]):
+    # Один запрос: все темы (LEFT JOIN) с уроками пользователя
+    changed_at = func.coalesce(LessonProgress.updated_at, LessonProgress.created_at)
+    query = (
+        db.query(Topic.slug, LessonProgress.lesson_number, LessonProgress.status, changed_at)
+        .outerjoin(
+            LessonProgress,
+            and_(LessonProgress.topic_slug == Topic.slug, LessonProgress.user_id == user_id),
+        )
+        .order_by(Topic.display_order.asc(), Topic.id.asc(), LessonProgress.lesson_number.asc())
+    )
+    if slugs:
+        query = query.filter(Topic.slug.in_(slugs))
+
+    topics = {slug: [] for slug in slugs}
+    statuses, latest = [], None
+    for slug, lesson_number, status, stamp in query:
+        items = topics.setdefault(slug, [])
+        if lesson_number is None:
+            continue
+        items.append({"lesson_number": lesson_number, "status": status})
+        statuses.append(status)
+        if stamp is not None and (latest is None or stamp > latest):
+            latest = stamp
+
+    etag = make_etag(
+        "progress", user_id, len(topics), len(statuses), *_status_counts(statuses),
+        latest.isoformat() if latest else "",
+    )
+    return {"topics": topics}, etag
+
+
+@router.get("", response_model=AllProgressResponse)
+async def get_all_progress(
+    request: Request,
+    topics: Optional[str] = Query(None, description="Список тем через запятую"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    # Убедимся, что тема существует
-    topic = db.query(Topic).filter(Topic.slug == topic_slug).first()
-    if not topic:
-        # Автосоздавать тему не будем — вернём пустую структуру
-        return {"topic_slug": topic_slug, "items": []}
+    """Прогресс пользователя по всем темам (или по списку ?topics=job,rent)"""
+    slugs = [s.strip() for s in topics.split(",") if s.strip()] if topics else []
+    body, etag = await run_db(db, _get_all_progress, current_user.id, slugs)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return json_response(body, headers={"ETag": etag, "Cache-Control": PRIVATE_REVALIDATE})
+
+
+def _topic_progress_etag(user_id: int, topic_slug: str, rows: int, counts: tuple, latest) -> str:
+    return make_etag("topic-progress", user_id, topic_slug, rows, *counts, latest.isoformat() if latest else "")
+
+
+def _topic_progress_version(db: Session, user_id: int, topic_slug: str) -> str:
+    """ETag темы одним агрегатом (число уроков, их число по статусам и время
+    последнего изменения), без выборки самих уроков"""
+    if not topic_catalog.contains(db, topic_slug):
+        return _topic_progress_etag(user_id, topic_slug, 0, _status_counts([]), None)
+    changed_at = func.coalesce(LessonProgress.updated_at, LessonProgress.created_at)
+    rows, *counts, latest = (
+        db.query(
+            func.count(LessonProgress.id),
+            *(func.count(case((LessonProgress.status == name, 1))) for name in VERSION_STATUSES),
+            func.max(changed_at),
+        )
+        .filter(LessonProgress.user_id == user_id, LessonProgress.topic_slug == topic_slug)
+        .one()
+    )
+    return _topic_progress_etag(user_id, topic_slug, rows, tuple(counts), latest)
 
-    items: List[LessonProgress] = (
-        db.query(LessonProgress)
-        .filter(LessonProgress.user_id == current_user.id, LessonProgress.topic_slug == topic_slug)
+
+def _get_topic_progress(db: Session, user_id: int, topic_slug: str):
+    # Убедимся, что тема существует (по каталогу тем, без запроса к БД)
+    if not topic_catalog.contains(db, topic_slug):
+        # Автосоздавать тему не будем — вернём пустую структуру
+        return {"topic_slug": topic_slug, "items": []}, _topic_progress_etag(
+            user_id, topic_slug, 0, _status_counts([]), None)
+
+    # Только нужные столбцы: без построения ORM-объектов и промежуточных моделей
+    changed_at = func.coalesce(LessonProgress.updated_at, LessonProgress.created_at)
+    rows = (
+        db.query(LessonProgress.lesson_number, LessonProgress.status, changed_at)
+        .filter(LessonProgress.user_id == user_id, LessonProgress.topic_slug == topic_slug)
         .all()
     )
 
-    mapped = [LessonProgressItem(lesson_number=i.lesson_number, status=i.status) for i in items]
-    return {"topic_slug": topic_slug, "items": mapped}
+    items = [{"lesson_number": number, "status": status} for number, status, _ in rows]
+    latest = max((stamp for _, _, stamp in rows if stamp is not None), default=None)
+    counts = _status_counts(status for _, status, _ in rows)
+    return {"topic_slug": topic_slug, "items": items}, _topic_progress_etag(
+        user_id, topic_slug, len(rows), counts, latest)
 
 
-@router.post("/{topic_slug}/lesson/{lesson_number}")
-def update_lesson_progress(
+@router.get("/{topic_slug}", response_model=LessonProgressResponse)
+async def get_topic_progress(
     topic_slug: str,
-    lesson_number: int,
-    request: UpdateProgressRequest,
+    request: Request,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    # Убедимся, что тема существует, если нет - создаём её
-    topic = db.query(Topic).filter(Topic.slug == topic_slug).first()
-    if not topic:
-        # Автоматически создаём тему, если её нет
-        topic_titles = {
-            "rent": "Съем квартиры",
-            "job": "Работа"
-        }
-        topic = Topic(
-            slug=topic_slug,
-            title=topic_titles.get(topic_slug, topic_slug.capitalize()),
-            description=None,
-            display_order=0
-        )
-        db.add(topic)
-        db.commit()
-        db.refresh(topic)
+    # С If-None-Match сначала сверяется версия: при совпадении уроки не читаются
+    if request.headers.get("if-none-match"):
+        etag = await run_db(db, _topic_progress_version, current_user.id, topic_slug)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+    progress, etag = await run_db(db, _get_topic_progress, current_user.id, topic_slug)
+    return json_response(progress, headers={"ETag": etag, "Cache-Control": PRIVATE_REVALIDATE})
 
-    if request.status not in ["active", "completed"]:
-        raise HTTPException(status_code=400, detail="Invalid status. Must be 'active' or 'completed'")
 
-    # Ищем существующий прогресс
-    progress = (
-        db.query(LessonProgress)
-        .filter(
-            LessonProgress.user_id == current_user.id,
-            LessonProgress.topic_slug == topic_slug,
-            LessonProgress.lesson_number == lesson_number
-        )
-        .first()
-    )
+TOPIC_TITLES = {
+    "rent": "Съем квартиры",
+    "job": "Работа"
+}
 
-    if progress:
-        # Обновляем существующий
-        progress.status = request.status
-    else:
-        # Создаём новый
-        progress = LessonProgress(
-            user_id=current_user.id,
-            topic_slug=topic_slug,
-            lesson_number=lesson_number,
-            status=request.status
-        )
-        db.add(progress)
 
-    db.commit()
-    db.refresh(progress)
+def _update_lesson_progress(
+    db: Session,
+    user_id: int,
+    topic_slug: str,
+    lesson_number: int,
+    request: UpdateProgressRequest,
+):
+    if request.status not in ["active", "completed"]:
+        raise HTTPException(status_code=400, detail="Invalid status. Must be 'active' or 'completed'")
 
-    # Если урок отмечен как completed, делаем следующий урок active
-    if request.status == "completed":
-        next_lesson = (
-            db.query(LessonProgress)
-            .filter(
-                LessonProgress.user_id == current_user.id,
-                LessonProgress.topic_slug == topic_slug,
-                LessonProgress.lesson_number == lesson_number + 1
-            )
-            .first()
+    # Убедимся, что тема существует, если нет - создаём её
+    catalog_outdated = False
+    if not topic_catalog.known(db, topic_slug):
+        topic_insert = dialect_insert(db, Topic.__table__).values(
+            slug=topic_slug,
+            title=TOPIC_TITLES.get(topic_slug, topic_slug.capitalize()),
+            description=None,
+            display_order=0
         )
+        db.execute(topic_insert.on_conflict_do_nothing(index_elements=["slug"]))
+        # Тему создал этот запрос или уже создал другой воркер (rowcount 0) —
+        # в обоих случаях её нет в каталоге, и без сброса каждый следующий
+        # запрос по теме повторял бы INSERT
+        catalog_outdated = True
+
+    # Один upsert: текущий урок получает новый статус, а при completed
+    # следующий урок создаётся активным или разблокируется, если был locked.
+    # Пройденный урок статус не меняет (повторное открытие со статусом active
+    # не откатывает его, и урок не засчитывается в рейтинг дважды), поэтому
+    # RETURNING содержит текущий урок, только если он изменился
+    rows = [{"user_id": user_id, "topic_slug": topic_slug,
+             "lesson_number": lesson_number, "status": request.status}]
+    if request.status == "completed":
+        rows.append({"user_id": user_id, "topic_slug": topic_slug,
+                     "lesson_number": lesson_number + 1, "status": "active"})
+
+    table = LessonProgress.__table__
+    insert = dialect_insert(db, table).values(rows)
+    is_current = insert.excluded.lesson_number == lesson_number
+    upsert = insert.on_conflict_do_update(
+        index_elements=["user_id", "topic_slug", "lesson_number"],
+        set_={
+            "status": case((is_current, insert.excluded.status), else_=literal("active")),
+            "updated_at": func.now(),
+        },
+        where=or_(and_(is_current, table.c.status != "completed"), table.c.status == "locked"),
+    ).returning(table.c.lesson_number, table.c.status)
+    changed = dict(db.execute(upsert).all())
+    if changed.get(lesson_number) == "completed":
+        record_completion(db, user_id)
+    db.commit()
+    if catalog_outdated:
+        topic_catalog.invalidate()
 
-        if not next_lesson:
-            # Создаём следующий урок как активный
-            next_progress = LessonProgress(
-                user_id=current_user.id,
-                topic_slug=topic_slug,
-                lesson_number=lesson_number + 1,
-                status="active"
-            )
-            db.add(next_progress)
-            db.commit()
-            db.refresh(next_progress)
-        elif next_lesson.status == "locked":
-            # Если следующий урок был заблокирован, активируем его
-            next_lesson.status = "active"
-            db.commit()
-            db.refresh(next_lesson)
-
-    return {
+    result = {
         "message": "Progress updated",
         "lesson_number": lesson_number,
-        "status": request.status,
-        "next_lesson_activated": request.status == "completed"
+        # Статус в БД: урока нет в RETURNING, только если он уже пройден
+        # (active не откатывает completed)
+        "status": changed.get(lesson_number, "completed"),
+        # Следующий урок создан или разблокирован именно этим запросом
+        "next_lesson_activated": changed.get(lesson_number + 1) == "active",
     }
+    return result, changed
 
 
+@router.post("/{topic_slug}/lesson/{lesson_number}")
+async def update_lesson_progress(
+    topic_slug: str,
+    lesson_number: int,
+    request: UpdateProgressRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    # id до commit: после него атрибуты пользователя истекают
+    user_id = current_user.id
+    result, changed = await run_db(
+        db, _update_lesson_progress, user_id, topic_slug, lesson_number, request
+    )
+    # Только уроки, чей статус действительно изменился (строки RETURNING upsert'а)
+    if changed:
+        live_broker.publish(user_id, {
+            "type": "progress",
+            "topic_slug": topic_slug,
+            "lessons": [
+                {"lesson_number": number, "status": lesson_status}
+                for number, lesson_status in sorted(changed.items())
+            ],
+        })
+    event_log.emit(
+        user_id,
+        "lesson_completed" if request.status == "completed" else "lesson_started",
+        topic_slug=topic_slug,
+        lesson_number=lesson_number,
+    )
+    return result
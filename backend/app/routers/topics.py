@@ -1,23 +1,24 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
 
 from app.database import get_db
-from app.models import Topic
 from app.schemas import TopicResponse
+from app.topic_catalog import topic_catalog, TOPIC_CACHE_MAX_AGE
+from app.http_cache import etag_matches, not_modified
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[TopicResponse])
-def list_topics(db: Session = Depends(get_db)):
-    return db.query(Topic).order_by(Topic.display_order.asc(), Topic.id.asc()).all()
-
-
-
-
-
-
-
-
-
+async def list_topics(request: Request, db: Session = Depends(get_db)):
+    # Готовое тело из каталога тем: без запроса к БД и повторной сериализации
+    catalog = await topic_catalog.current(db)
+    cache_control = f"public, max-age={TOPIC_CACHE_MAX_AGE}"
+    if etag_matches(request, catalog.etag):
+        return not_modified(catalog.etag, cache_control)
+    return Response(
+        content=catalog.body,
+        media_type="application/json",
+        headers={"ETag": catalog.etag, "Cache-Control": cache_control},
+    )
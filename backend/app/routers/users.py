@@ -1,28 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-import shutil
-import os
-from typing import Optional
 
-from app.database import get_db
+from app.avatars import (
+    avatar_lock, cleanup_superseded, discard_upload, primary_url, process_avatar, receive_upload,
+)
+from app.database import get_db, run_db
 from app.models import User
 from app.schemas import UserUpdate, UserResponse
-from app.auth import get_current_active_user
+from app.auth import get_current_active_user, invalidate_user
+from app.http_cache import PRIVATE_REVALIDATE, etag_matches, not_modified, user_etag
+from app.responses import model_response
 
 router = APIRouter()
 
 @router.get("/profile", response_model=UserResponse)
-def get_profile(current_user: User = Depends(get_current_active_user)):
+async def get_profile(request: Request, current_user: User = Depends(get_current_active_user)):
     """Получение профиля пользователя"""
-    return current_user
+    etag = user_etag(current_user)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return model_response(UserResponse, current_user, headers={"ETag": etag, "Cache-Control": PRIVATE_REVALIDATE})
 
-@router.put("/profile", response_model=UserResponse)
-def update_profile(
-    user_update: UserUpdate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
-):
-    """Обновление профиля пользователя"""
+def _update_profile(db: Session, current_user: User, user_update: UserUpdate):
     # Проверяем уникальность email, если он изменяется
     if user_update.email and user_update.email != current_user.email:
         existing_user = db.query(User).filter(User.email == user_update.email).first()
@@ -31,7 +31,7 @@ def update_profile(
                 status_code=400,
                 detail="Пользователь с таким email уже существует"
             )
-    
+
     # Проверяем уникальность username, если он изменяется
     if user_update.username and user_update.username != current_user.username:
         existing_user = db.query(User).filter(User.username == user_update.username).first()
@@ -40,47 +40,64 @@ def update_profile(
                 status_code=400,
                 detail="Пользователь с таким именем пользователя уже существует"
             )
-    
+
     # Обновляем поля
     update_data = user_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(current_user, field, value)
-    
+
     db.commit()
     db.refresh(current_user)
-    
+
     return current_user
 
+@router.put("/profile", response_model=UserResponse)
+async def update_profile(
+    user_update: UserUpdate,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Обновление профиля пользователя"""
+    # id читается до commit: после него атрибуты истекают и обращение к ним
+    # в синхронном режиме стоило бы лишнего SELECT
+    user_id = current_user.id
+    user = await run_db(db, _update_profile, current_user, user_update)
+    await invalidate_user(user_id)
+    return user
+
+def _set_avatar_url(db: Session, current_user: User, avatar_url: str):
+    # Обновляем URL аватара в базе данных
+    current_user.avatar_url = avatar_url
+    db.commit()
+
 @router.post("/upload-avatar")
-def upload_avatar(
+async def upload_avatar(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Загрузка аватара пользователя"""
     # Проверяем тип файла
-    if not file.content_type.startswith("image/"):
+    if not (file.content_type or "").startswith("image/"):
         raise HTTPException(
             status_code=400,
             detail="Файл должен быть изображением"
         )
-    
-    # Создаем директорию для аватаров, если её нет
-    upload_dir = "uploads/avatars"
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    # Генерируем уникальное имя файла
-    file_extension = file.filename.split(".")[-1]
-    filename = f"{current_user.id}_{current_user.username}.{file_extension}"
-    file_path = os.path.join(upload_dir, filename)
-    
-    # Сохраняем файл
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    # Обновляем URL аватара в базе данных
-    avatar_url = f"/uploads/avatars/{filename}"
-    current_user.avatar_url = avatar_url
-    db.commit()
-    
-    return {"message": "Аватар успешно загружен", "avatar_url": avatar_url}
+
+    # Потоковая запись с ограничением размера, затем проверка и нарезка
+    # миниатюр в отдельном пуле; имена файлов — по хешу содержимого
+    tmp_path, content_hash = await receive_upload(file)
+    user_id = current_user.id
+    try:
+        # Нарезка, запись URL и очистка прежних файлов — по очереди для
+        # пользователя: параллельная загрузка не удалит только что записанный аватар
+        async with avatar_lock(user_id):
+            variants = await process_avatar(tmp_path, user_id, content_hash)
+            avatar_url = primary_url(variants)
+            await run_db(db, _set_avatar_url, current_user, avatar_url)
+            await run_in_threadpool(cleanup_superseded, user_id, avatar_url)
+    finally:
+        discard_upload(tmp_path)
+    await invalidate_user(user_id)
+
+    return {"message": "Аватар успешно загружен", "avatar_url": avatar_url, "variants": variants}
@@ -0,0 +1,53 @@
+import os
+
+from sqlalchemy import inspect
+
+from app.database import engine
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+BASELINE_REVISION = "0001_initial_schema"
+
+# Миграции уже применены в этом процессе (или в мастере gunicorn до fork)
+_schema_upgraded = False
+
+
+def alembic_config(connection=None):
+    # alembic импортируется только при миграциях: на импорт приложения он
+    # добавлял ~0,1 с в каждом процессе
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "migrations"))
+    # Логирование настраивает приложение, а не alembic.ini
+    config.attributes["configure_logger"] = False
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def upgrade_schema(target=engine) -> None:
+    """Применение миграций Alembic до последней версии (по умолчанию — к основной БД).
+
+    Базы, созданные раньше через Base.metadata.create_all, сначала
+    помечаются исходной ревизией, после чего к ним применяются остальные.
+    """
+    from alembic import command
+
+    with target.begin() as connection:
+        config = alembic_config(connection)
+        inspector = inspect(connection)
+        if inspector.has_table("users") and not inspector.has_table("alembic_version"):
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, "head")
+
+
+def ensure_schema() -> None:
+    """Миграции не чаще одного раза на процесс.
+
+    При запуске через gunicorn с preload их выполняет мастер до запуска
+    воркеров; воркеры наследуют флаг при fork и не соревнуются за схему.
+    """
+    global _schema_upgraded
+    if not _schema_upgraded:
+        upgrade_schema()
+        _schema_upgraded = True
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr
-from datetime import datetime
-from typing import Optional, List
+import json
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from datetime import date, datetime
+from typing import Any, Optional, List, Dict, Literal
 
 # Схемы для пользователя
 class UserBase(BaseModel):
@@ -37,6 +38,8 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     email: Optional[str] = None
+    user_id: Optional[int] = None
+    version: Optional[int] = None
 
 class UserLogin(BaseModel):
     email: EmailStr
@@ -44,7 +47,7 @@ class UserLogin(BaseModel):
 
 # Схемы для жизней
 class UserLivesResponse(BaseModel):
-    id: int
+    id: Optional[int] = None  # нет, пока запись жизней не создана
     user_id: int
     current_lives: int
     max_lives: int
@@ -82,3 +85,60 @@ class LessonProgressItem(BaseModel):
 class LessonProgressResponse(BaseModel):
     topic_slug: str
     items: List[LessonProgressItem]
+
+class AllProgressResponse(BaseModel):
+    topics: Dict[str, List[LessonProgressItem]]
+
+# Схемы рейтинга
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    username: str
+    avatar_url: Optional[str] = None
+    completed: int
+
+class LeaderboardResponse(BaseModel):
+    period: str  # week | all
+    period_start: Optional[date] = None
+    total: int
+    items: List[LeaderboardEntry]
+
+class LeaderboardPositionResponse(LeaderboardResponse):
+    rank: Optional[int] = None
+    completed: int
+
+# Схемы учебных событий
+
+EVENT_PAYLOAD_MAX_BYTES = 1024
+
+class ClientEvent(BaseModel):
+    type: Literal["lesson_opened", "task_answered"]
+    topic_slug: Optional[str] = Field(None, max_length=64)
+    lesson_number: Optional[int] = Field(None, ge=1)
+    task_number: Optional[int] = Field(None, ge=1)
+    payload: Optional[Dict[str, Any]] = None
+
+    @field_validator("payload")
+    @classmethod
+    def payload_size(cls, value):
+        if value is not None and len(json.dumps(value, ensure_ascii=False)) > EVENT_PAYLOAD_MAX_BYTES:
+            raise ValueError(f"payload больше {EVENT_PAYLOAD_MAX_BYTES} байт")
+        return value
+
+class EventBatch(BaseModel):
+    events: List[ClientEvent] = Field(..., min_length=1, max_length=50)
+
+# Схемы для массовой загрузки пользователей
+class UserImportError(BaseModel):
+    row: int
+    email: Optional[str] = None
+    detail: str
+
+class UserImportResult(BaseModel):
+    total: int
+    created: int
+    failed: int
+    errors: List[UserImportError]
+    errors_truncated: bool
+    elapsed_ms: float
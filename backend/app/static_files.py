@@ -0,0 +1,165 @@
+import mimetypes
+import os
+import re
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+
+import anyio
+from dotenv import load_dotenv
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Receive, Scope, Send
+
+from app.http_cache import etag_in_header
+
+load_dotenv()
+
+UPLOADS_MAX_AGE = int(os.getenv("UPLOADS_MAX_AGE", str(365 * 24 * 3600)))
+
+# Имена вида {user_id}_{хеш содержимого}_{размер}.{ext}: по такому адресу
+# содержимое никогда не меняется, поэтому браузер может не перепроверять его
+HASHED_NAME = re.compile(r"_[0-9a-f]{16}_\d+\.[a-z]+$")
+IMMUTABLE = f"public, max-age={UPLOADS_MAX_AGE}, immutable"
+# Старые файлы без хеша в имени могут быть перезаписаны: кешировать с перепроверкой
+REVALIDATE = "public, no-cache"
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Разбор одиночного диапазона bytes=a-b. Возвращает (начало, длина);
+    None — диапазон невыполним. Несколько диапазонов не поддерживаются (ValueError)"""
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        raise ValueError(header)
+    first, _, last = spec.strip().partition("-")
+    if not first:
+        # Суффикс: последние N байт
+        length = min(int(last), size)
+        return (size - length, length) if length > 0 else None
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return None
+    return start, end - start + 1
+
+
+class UploadFileResponse(Response):
+    """Отдача файла целиком или диапазона байт.
+
+    Если сервер поддерживает ASGI-расширения http.response.zerocopy или
+    http.response.pathsend, файл передаётся без копирования через Python
+    (sendfile); иначе — чтение блоками в пуле потоков.
+    """
+
+    def __init__(self, path: str, status_code: int, headers: dict, media_type: str,
+                 offset: int = 0, length: int = 0, send_body: bool = True):
+        self.path = path
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.offset = offset
+        self.length = length
+        self.send_body = send_body
+        self.init_headers(headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        extensions = scope.get("extensions") or {}
+        whole_file = self.status_code == 200
+        if whole_file and "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": self.path})
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            if "http.response.zerocopy" in extensions:
+                await send({
+                    "type": "http.response.zerocopy",
+                    "file": file.wrapped,
+                    "offset": self.offset,
+                    "count": self.length,
+                    "more_body": False,
+                })
+                return
+            await file.seek(self.offset)
+            remaining = self.length
+            while remaining > 0:
+                chunk = await file.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # Файл укоротился во время отдачи: закрываем тело
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class UploadStaticFiles(StaticFiles):
+    """Раздача пользовательских загрузок.
+
+    Сильный ETag и Last-Modified из stat файла, ответы 304 на условные
+    запросы, Range/If-Range, долгий immutable-кеш для имён с хешем содержимого.
+    """
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope,
+                      status_code: int = 200) -> Response:
+        if status_code != 200 or not stat.S_ISREG(stat_result.st_mode):
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        path = str(full_path)
+        request_headers = Headers(scope=scope)
+        size = stat_result.st_size
+        etag = f'"{stat_result.st_mtime_ns:x}-{size:x}"'
+        last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        headers = {
+            "etag": etag,
+            "last-modified": last_modified,
+            "cache-control": IMMUTABLE if HASHED_NAME.search(os.path.basename(path)) else REVALIDATE,
+            "accept-ranges": "bytes",
+        }
+
+        if self._not_modified(request_headers, etag, stat_result.st_mtime):
+            return Response(status_code=304, headers=headers)
+
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        send_body = scope["method"] != "HEAD"
+        range_header = request_headers.get("range")
+        if range_header and self._range_applies(request_headers, etag, last_modified):
+            try:
+                byte_range = _parse_range(range_header, size)
+            except ValueError:
+                byte_range = (0, size)
+            if byte_range is None:
+                return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+            offset, length = byte_range
+            if length < size:
+                headers["content-range"] = f"bytes {offset}-{offset + length - 1}/{size}"
+                headers["content-length"] = str(length)
+                return UploadFileResponse(path, 206, headers, media_type, offset, length, send_body)
+
+        headers["content-length"] = str(size)
+        return UploadFileResponse(path, 200, headers, media_type, 0, size, send_body)
+
+    @staticmethod
+    def _not_modified(request_headers: Headers, etag: str, mtime: float) -> bool:
+        if "if-none-match" in request_headers:
+            return etag_in_header(request_headers["if-none-match"], etag)
+        since = request_headers.get("if-modified-since")
+        if since:
+            try:
+                return int(mtime) <= parsedate_to_datetime(since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    @staticmethod
+    def _range_applies(request_headers: Headers, etag: str, last_modified: str) -> bool:
+        # If-Range: диапазон отдаётся, только если файл не изменился
+        if_range = request_headers.get("if-range")
+        return if_range is None or if_range in (etag, last_modified)
@@ -0,0 +1,111 @@
+import hashlib
+import os
+import threading
+import time
+from typing import FrozenSet, List, NamedTuple, Optional
+
+from dotenv import load_dotenv
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from app.database import run_db
+from app.models import Topic
+from app.schemas import TopicResponse
+
+load_dotenv()
+
+TOPIC_CATALOG_TTL_SECONDS = float(os.getenv("TOPIC_CATALOG_TTL_SECONDS", "300"))
+TOPIC_CACHE_MAX_AGE = int(os.getenv("TOPIC_CACHE_MAX_AGE", "60"))
+
+_topics_adapter = TypeAdapter(List[TopicResponse])
+
+
+class CatalogSnapshot(NamedTuple):
+    version: str
+    slugs: FrozenSet[str]
+    body: bytes
+    etag: str
+    loaded_at: float
+
+
+class TopicCatalog:
+    """Каталог тем в памяти процесса.
+
+    Загружается при старте и перечитывается по TTL или после изменения тем.
+    Для списка тем хранится готовое JSON-тело и ETag; версия — хеш тела,
+    поэтому она совпадает во всех воркерах с одинаковыми данными.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._stale = True
+        # Счётчик сбросов: invalidate() во время загрузки не теряется
+        self._generation = 0
+        self.reloads = 0
+
+    def load(self, db: Session) -> CatalogSnapshot:
+        with self._lock:
+            generation = self._generation
+        topics = db.query(Topic).order_by(Topic.display_order.asc(), Topic.id.asc()).all()
+        body = _topics_adapter.dump_json(_topics_adapter.validate_python(topics, from_attributes=True))
+        version = hashlib.sha1(body).hexdigest()[:16]
+        snapshot = CatalogSnapshot(
+            version=version,
+            slugs=frozenset(t.slug for t in topics),
+            body=body,
+            etag=f'"{version}"',
+            loaded_at=time.monotonic(),
+        )
+        with self._lock:
+            # Каталог сбросили, пока шёл SELECT: снимок мог не увидеть новую
+            # тему, поэтому в кеш он не попадает и следующий запрос перечитает
+            if self._generation == generation:
+                self._snapshot = snapshot
+                self._stale = False
+            self.reloads += 1
+        return snapshot
+
+    def _fresh(self) -> Optional[CatalogSnapshot]:
+        snapshot = self._snapshot
+        if snapshot is None or self._stale or time.monotonic() - snapshot.loaded_at > self.ttl:
+            return None
+        return snapshot
+
+    async def current(self, db) -> CatalogSnapshot:
+        """Актуальный снимок; при необходимости перечитывается из БД"""
+        return self._fresh() or await run_db(db, self.load)
+
+    def known(self, db: Session, slug: str) -> bool:
+        """Есть ли тема в каталоге (запрос к БД — только если каталог устарел)"""
+        snapshot = self._fresh() or self.load(db)
+        return slug in snapshot.slugs
+
+    def contains(self, db: Session, slug: str) -> bool:
+        """Существует ли тема. Известные темы проверяются без запроса к БД;
+        неизвестный slug перепроверяется в БД (тему мог создать другой воркер)"""
+        if self.known(db, slug):
+            return True
+        exists = db.query(Topic.id).filter(Topic.slug == slug).first() is not None
+        if exists:
+            self.invalidate()
+        return exists
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._stale = True
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version if snapshot else None,
+            "topics": len(snapshot.slugs) if snapshot else 0,
+            "age_s": round(time.monotonic() - snapshot.loaded_at, 1) if snapshot else None,
+            "ttl": self.ttl,
+            "reloads": self.reloads,
+        }
+
+
+topic_catalog = TopicCatalog(ttl=TOPIC_CATALOG_TTL_SECONDS)
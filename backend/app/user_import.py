@@ -0,0 +1,326 @@
+import asyncio
+import codecs
+import csv
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Iterator, List, Optional, Set, Tuple, Union
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, Request, status
+from pydantic import ValidationError
+from sqlalchemy import insert, or_
+from sqlalchemy.orm import Session
+
+from app.auth import CONFLICT_DETAILS
+from app.database import dialect_insert, run_db
+from app.hashing import PASSWORD_HASH_EXECUTOR, create_executor, hash_password
+from app.models import User, UserLives
+from app.schemas import UserCreate
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Массовая загрузка пользователей: размер пачки, число процессов bcrypt,
+# предельный размер тела и сколько ошибок строк возвращать в ответе
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+IMPORT_HASH_WORKERS = int(os.getenv("IMPORT_HASH_WORKERS") or os.cpu_count() or 2)
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(50 * 1024 * 1024)))
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+
+# Content-Type -> формат тела
+FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json": "json",
+}
+CSV_REQUIRED_COLUMNS = ("email", "username", "full_name", "password")
+
+# Строка источника: номер и объект пользователя либо текст ошибки разбора
+Row = Tuple[int, Union[dict, str]]
+
+# Один импорт на воркер: bcrypt и так занимает все ядра
+import_lock = asyncio.Lock()
+
+
+async def _lines(request: Request, keepends: bool = False) -> AsyncIterator[str]:
+    """Строки тела по мере получения, без чтения всего файла в память"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    async for chunk in request.stream():
+        lines = (tail + decoder.decode(chunk)).split("\n")
+        tail = lines.pop()
+        for line in lines:
+            yield line + "\n" if keepends else line.rstrip("\r")
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail if keepends else tail.rstrip("\r")
+
+
+class _PendingLines:
+    """Источник строк для csv.reader, пополняемый по мере получения тела.
+
+    Пустая очередь завершает итерацию, но reader можно продолжать: следующий
+    next() снова читает из очереди.
+    """
+
+    def __init__(self):
+        self.lines: Deque[str] = deque()
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def _csv_records(request: Request) -> AsyncIterator[List[str]]:
+    """Физические строки тела, сгруппированные в записи CSV.
+
+    Поле в кавычках может содержать перевод строки: запись заканчивается на
+    строке, после которой число кавычек чётное (экранированная "" его не
+    меняет). Так reader получает запись целиком и не ждёт продолжения.
+    """
+    record: List[str] = []
+    quotes = 0
+    async for line in _lines(request, keepends=True):
+        record.append(line)
+        quotes += line.count('"')
+        if quotes % 2 == 0:
+            yield record
+            record, quotes = [], 0
+    if record:
+        # Незакрытая кавычка в конце файла: reader разберёт остаток как есть
+        yield record
+
+
+async def _csv_rows(request: Request) -> AsyncIterator[Row]:
+    # Один DictReader на всё тело: первая запись — заголовок, номер строки —
+    # первая физическая строка записи по reader.line_num
+    pending = _PendingLines()
+    reader = csv.DictReader(pending)
+    header = None
+    async for record in _csv_records(request):
+        # Строки из одних пробелов reader пропускает как пустые, не сбивая line_num
+        pending.lines.extend(line if line.strip() else "\n" for line in record)
+        if header is None:
+            try:
+                names = reader.fieldnames
+            except StopIteration:
+                names = None
+            if not names:
+                # Пустые строки до заголовка: заголовок читается со следующей записи
+                reader.fieldnames = None
+                continue
+            header = reader.fieldnames = [name.strip().lower() for name in names]
+            missing = [name for name in CSV_REQUIRED_COLUMNS if name not in header]
+            if missing:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"В заголовке CSV нет столбцов: {', '.join(missing)}",
+                )
+            continue
+        try:
+            item = next(reader)
+        except StopIteration:
+            # Пустая строка
+            continue
+        number = reader.line_num - len(record) + 1
+        # Лишние значения DictReader кладёт под ключ None, недостающие — как None
+        if None in item or None in item.values():
+            yield number, "Число значений не совпадает с заголовком"
+            continue
+        if not item.get("phone"):
+            item["phone"] = None
+        yield number, item
+
+
+async def _ndjson_rows(request: Request) -> AsyncIterator[Row]:
+    number = 0
+    async for line in _lines(request):
+        number += 1
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError:
+            yield number, "Некорректный JSON"
+
+
+async def _json_rows(request: Request) -> AsyncIterator[Row]:
+    # Массив разбирается целиком; для больших когорт подходят CSV и NDJSON
+    try:
+        items = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный JSON")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Ожидается массив пользователей")
+    for number, item in enumerate(items, 1):
+        yield number, item
+
+
+def read_rows(request: Request) -> AsyncIterator[Row]:
+    """Строки источника по Content-Type запроса"""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    kind = FORMATS.get(content_type)
+    if kind is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Поддерживаются форматы: {', '.join(FORMATS)}",
+        )
+    return {"csv": _csv_rows, "ndjson": _ndjson_rows, "json": _json_rows}[kind](request)
+
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'строка'}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+class ImportReport:
+    """Итог загрузки: счётчики и первые max_errors ошибок строк"""
+
+    def __init__(self, max_errors: int):
+        self.max_errors = max_errors
+        self.total = 0
+        self.created = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def fail(self, row: int, email: Optional[str], detail: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "email": email, "detail": detail})
+
+    def result(self, elapsed: float) -> dict:
+        return {
+            "total": self.total,
+            "created": self.created,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "elapsed_ms": round(elapsed * 1000, 1),
+        }
+
+
+def _existing_users(db: Session, emails: List[str], usernames: List[str]) -> Tuple[Set[str], Set[str]]:
+    rows = (
+        db.query(User.email, User.username)
+        .filter(or_(User.email.in_(emails), User.username.in_(usernames)))
+        .all()
+    )
+    return {email for email, _ in rows}, {username for _, username in rows}
+
+
+def _insert_batch(db: Session, users: List[Tuple[UserCreate, str]]) -> Set[str]:
+    """Пользователи пачки одним INSERT и их жизни вторым, в одной транзакции.
+
+    Строки, которые параллельно успели занять email или username, пропускает
+    ON CONFLICT DO NOTHING; возвращаются email созданных пользователей.
+    """
+    table = User.__table__
+    statement = (
+        dialect_insert(db, table)
+        .values([
+            {
+                "email": user.email,
+                "username": user.username,
+                "full_name": user.full_name,
+                "phone": user.phone,
+                "hashed_password": hashed_password,
+            }
+            for user, hashed_password in users
+        ])
+        .on_conflict_do_nothing()
+        .returning(table.c.id, table.c.email)
+    )
+    created = db.execute(statement).all()
+    if created:
+        db.execute(insert(UserLives.__table__).values([
+            {"user_id": user_id, "current_lives": 3, "max_lives": 3} for user_id, _ in created
+        ]))
+    db.commit()
+    return {email for _, email in created}
+
+
+async def _import_batch(db, batch: List[Tuple[int, UserCreate]], executor, report: ImportReport) -> None:
+    # Занятые email и username отсеиваются до bcrypt: хеш для них не нужен
+    emails, usernames = await run_db(
+        db, _existing_users, [user.email for _, user in batch], [user.username for _, user in batch]
+    )
+    pending = []
+    for number, user in batch:
+        if user.email in emails:
+            report.fail(number, user.email, CONFLICT_DETAILS["email"])
+        elif user.username in usernames:
+            report.fail(number, user.email, CONFLICT_DETAILS["username"])
+        else:
+            # Повтор внутри пачки тоже считается конфликтом
+            emails.add(user.email)
+            usernames.add(user.username)
+            pending.append((number, user))
+    if not pending:
+        return
+
+    loop = asyncio.get_running_loop()
+    hashes = await asyncio.gather(*(
+        loop.run_in_executor(executor, hash_password, user.password) for _, user in pending
+    ))
+    created = await run_db(db, _insert_batch, [(user, hashed) for (_, user), hashed in zip(pending, hashes)])
+    for number, user in pending:
+        if user.email in created:
+            report.created += 1
+        else:
+            report.fail(number, user.email, "Пользователь уже существует")
+
+
+async def import_users(db, rows: AsyncIterator[Row]) -> dict:
+    """Загрузка пользователей из потока строк пачками по IMPORT_BATCH_SIZE.
+
+    Пароли пачки хешируются параллельно в отдельном пуле на IMPORT_HASH_WORKERS
+    ядер (пул входа и регистрации не занимается), пользователи и жизни
+    вставляются пачкой и фиксируются после каждой пачки. Ошибочные строки не
+    прерывают загрузку и попадают в отчёт с номером строки.
+    """
+    started = time.perf_counter()
+    report = ImportReport(IMPORT_MAX_ERRORS)
+    executor = create_executor(PASSWORD_HASH_EXECUTOR, IMPORT_HASH_WORKERS)
+    batch: List[Tuple[int, UserCreate]] = []
+    number = 0
+    try:
+        try:
+            async for number, item in rows:
+                report.total += 1
+                if isinstance(item, str):
+                    report.fail(number, None, item)
+                    continue
+                try:
+                    user = UserCreate.model_validate(item)
+                except ValidationError as error:
+                    report.fail(number, item.get("email") if isinstance(item, dict) else None, _describe(error))
+                    continue
+                batch.append((number, user))
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    await _import_batch(db, batch, executor, report)
+                    batch = []
+        except UnicodeDecodeError:
+            # Остаток файла не читается; загруженное до этого места сохраняется
+            report.fail(number + 1, None, "Файл не в кодировке UTF-8, загрузка остановлена")
+        if batch:
+            await _import_batch(db, batch, executor, report)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    result = report.result(time.perf_counter() - started)
+    logger.info(
+        "Импорт пользователей: строк %d, создано %d, ошибок %d за %.0f мс",
+        report.total, report.created, report.failed, result["elapsed_ms"],
+    )
+    return result
@@ -0,0 +1,31 @@
+"""Воркер gunicorn, закрывающий потоки живых обновлений при остановке.
+
+При остановке uvicorn ждёт завершения всех начатых ответов, а поток
+/api/live/stream сам не заканчивается: без закрытия потоков воркер висел бы до
+graceful_timeout и погибал по SIGKILL, не выполнив lifespan (журнал учебных
+событий не дописан).
+"""
+import sys
+
+from gunicorn.arbiter import Arbiter
+from uvicorn.server import Server
+from uvicorn.workers import UvicornWorker
+
+from app.live_updates import live_broker
+
+
+class LiveStreamsServer(Server):
+    async def shutdown(self, sockets=None) -> None:
+        live_broker.close_streams()
+        await super().shutdown(sockets=sockets)
+
+
+class Worker(UvicornWorker):
+    async def _serve(self) -> None:
+        # Как UvicornWorker._serve, но с сервером, закрывающим потоки
+        self.config.app = self.wsgi
+        server = LiveStreamsServer(config=self.config)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
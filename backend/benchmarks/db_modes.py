@@ -0,0 +1,121 @@
+"""Сравнение режимов DB_MODE=sync и DB_MODE=async под нагрузкой.
+
+Для каждого режима запускается отдельный uvicorn, создаётся тестовый
+пользователь, после чего N одновременных клиентов читают жизни и прогресс.
+
+    cd backend
+    python -m benchmarks.db_modes --clients 500 --requests 10
+
+Используется DATABASE_URL из окружения (Postgres для честных цифр).
+Результат печатается в JSON.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+ROUTES = ["/api/lives/my-lives", "/api/progress/job"]
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def start_server(mode: str, port: int) -> subprocess.Popen:
+    env = dict(os.environ, DB_MODE=mode)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+
+
+async def wait_ready(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/api/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Сервер {base_url} не запустился")
+
+
+async def login(client: httpx.AsyncClient) -> dict:
+    name = f"bench_{uuid.uuid4().hex[:8]}"
+    user = {"email": f"{name}@example.com", "username": name, "full_name": name, "password": "bench"}
+    (await client.post("/api/auth/register", json=user)).raise_for_status()
+    response = await client.post("/api/auth/login", json={"email": user["email"], "password": "bench"})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def run_mode(mode: str, port: int, clients: int, requests: int) -> dict:
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(mode, port)
+    try:
+        await wait_ready(base_url)
+        limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+            headers = await login(client)
+            latencies, errors = [], 0
+
+            async def worker(n: int):
+                nonlocal errors
+                for i in range(requests):
+                    started = time.perf_counter()
+                    try:
+                        response = await client.get(ROUTES[(n + i) % len(ROUTES)], headers=headers)
+                        if response.status_code != 200:
+                            errors += 1
+                    except httpx.HTTPError:
+                        errors += 1
+                    latencies.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(n) for n in range(clients)))
+            elapsed = time.perf_counter() - started
+
+        return {
+            "mode": mode,
+            "clients": clients,
+            "requests": len(latencies),
+            "errors": errors,
+            "elapsed_s": round(elapsed, 3),
+            "rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=10, help="запросов на клиента")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--modes", nargs="+", default=["sync", "async"])
+    args = parser.parse_args()
+
+    results = []
+    for offset, mode in enumerate(args.modes):
+        results.append(await run_mode(mode, args.port + offset, args.clients, args.requests))
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
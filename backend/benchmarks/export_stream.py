@@ -0,0 +1,139 @@
+"""Замер потоковой выгрузки /api/admin/export на большом прогрессе.
+
+Скрипт применяет миграции к базе из DATABASE_URL, заполняет её
+пользователями и записями прогресса (по умолчанию миллион строк) и
+выгружает их тем же генератором, что и маршрут: сначала замеряется время и
+скорость, затем отдельным проходом — пик памяти Python (tracemalloc).
+С --compare-all для сравнения выполняется тот же запрос через .all().
+
+    cd backend
+    DATABASE_URL=postgresql://... python -m benchmarks.export_stream --rows 1000000
+    DATABASE_URL=postgresql://... python -m benchmarks.export_stream --no-seed-db --format ndjson
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import time
+import tracemalloc
+
+from sqlalchemy import insert, text
+
+from app.database import SessionLocal, engine
+from app.export import EXPORT_BATCH_SIZE, export_query, export_stream
+from app.hashing import hash_password
+from app.models import LessonProgress, Topic, User, UserLives
+from app.schema import upgrade_schema
+
+TOPICS = ("job", "rent")
+CHUNK = 10000
+
+
+def seed(rows: int, lessons: int) -> int:
+    """Пользователи с прогрессом по двум темам; вставка частями по CHUNK строк"""
+    users = -(-rows // (len(TOPICS) * lessons))
+    hashed = hash_password("export")
+    with engine.begin() as conn:
+        for table in ("leaderboard_buckets", "leaderboard_scores", "learning_events", "lesson_progress",
+                      "user_lives", "topics", "users"):
+            conn.execute(text(f"DELETE FROM {table}"))
+        conn.execute(insert(Topic), [
+            {"slug": slug, "title": slug, "display_order": order} for order, slug in enumerate(TOPICS)
+        ])
+        for start in range(1, users + 1, CHUNK):
+            ids = range(start, min(start + CHUNK, users + 1))
+            conn.execute(insert(User), [
+                {"id": i, "email": f"user{i}@example.com", "username": f"user{i}",
+                 "full_name": f"User {i}", "hashed_password": hashed}
+                for i in ids
+            ])
+            conn.execute(insert(UserLives), [{"user_id": i, "current_lives": 3, "max_lives": 3} for i in ids])
+        progress = (
+            {"user_id": i, "topic_slug": slug, "lesson_number": n, "status": "completed"}
+            for i in range(1, users + 1) for slug in TOPICS for n in range(1, lessons + 1)
+        )
+        batch = []
+        for written, row in enumerate(progress):
+            if written >= rows:
+                break
+            batch.append(row)
+            if len(batch) == CHUNK:
+                conn.execute(insert(LessonProgress), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(LessonProgress), batch)
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT setval('users_id_seq', (SELECT max(id) FROM users))"))
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE"))
+        conn.commit()
+    return users
+
+
+async def consume(stream) -> tuple:
+    """Чтение тела выгрузки целиком: (байт, строк)"""
+    size = lines = 0
+    if inspect.isasyncgen(stream):
+        async for chunk in stream:
+            size += len(chunk)
+            lines += chunk.count(b"\n")
+    else:
+        for chunk in stream:
+            size += len(chunk)
+            lines += chunk.count(b"\n")
+    return size, lines
+
+
+def measure(fmt: str) -> dict:
+    started = time.perf_counter()
+    size, lines = asyncio.run(consume(export_stream(fmt)))
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    asyncio.run(consume(export_stream(fmt)))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "format": fmt,
+        "bytes": size,
+        "lines": lines,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(lines / elapsed),
+        "peak_python_mb": round(peak / 2 ** 20, 1),
+    }
+
+
+def measure_all() -> dict:
+    tracemalloc.start()
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        rows = db.execute(export_query()).all()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"rows": len(rows), "seconds": round(elapsed, 2), "peak_python_mb": round(peak / 2 ** 20, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="записей прогресса в базе")
+    parser.add_argument("--lessons", type=int, default=10, help="уроков на тему у пользователя")
+    parser.add_argument("--format", choices=("csv", "ndjson"), default="csv")
+    parser.add_argument("--no-seed-db", action="store_true", help="не пересоздавать данные в базе")
+    parser.add_argument("--compare-all", action="store_true", help="замерить тот же запрос через .all()")
+    args = parser.parse_args()
+
+    upgrade_schema()
+    result = {"batch_size": EXPORT_BATCH_SIZE}
+    if not args.no_seed_db:
+        started = time.perf_counter()
+        result["users"] = seed(args.rows, args.lessons)
+        result["seed_seconds"] = round(time.perf_counter() - started, 1)
+    result["stream"] = measure(args.format)
+    if args.compare_all:
+        result["all"] = measure_all()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
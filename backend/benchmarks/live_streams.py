@@ -0,0 +1,213 @@
+"""Замер потоков живых обновлений /api/live/stream на тысячах подключений.
+
+Скрипт применяет миграции к базе из DATABASE_URL, добавляет N пользователей,
+запускает uvicorn с одним воркером и открывает по потоку на пользователя.
+Затем потоки простаивают (сервер шлёт только пинги), после чего для части
+пользователей меняются жизни через PUT /api/lives/my-lives, и замеряется
+время от запроса до события в потоке. Печатаются память и процессорное время
+воркера на простаивающих подключениях и задержки доставки p50/p95/p99.
+
+    cd backend
+    DATABASE_URL=postgresql://... python -m benchmarks.live_streams --connections 5000
+
+Нужен лимит открытых файлов больше числа подключений (ulimit -n).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+from sqlalchemy import insert, select
+
+from app.auth import create_access_token
+from app.database import engine
+from app.hashing import hash_password
+from app.models import User, UserLives
+from app.schema import upgrade_schema
+from benchmarks.db_modes import percentile, wait_ready
+
+CHUNK = 10000
+
+
+def seed(count: int) -> list:
+    """Новые пользователи с жизнями; возвращает пары (id, email)"""
+    prefix = f"live_{uuid.uuid4().hex[:8]}"
+    hashed = hash_password("live")
+    with engine.begin() as conn:
+        for start in range(0, count, CHUNK):
+            rows = [
+                {"email": f"{prefix}_{i}@example.com", "username": f"{prefix}_{i}",
+                 "full_name": f"Live {i}", "hashed_password": hashed}
+                for i in range(start, min(start + CHUNK, count))
+            ]
+            conn.execute(insert(User), rows)
+        users = [tuple(row) for row in conn.execute(
+            select(User.id, User.email).where(User.username.like(f"{prefix}_%"))
+        )]
+        for start in range(0, len(users), CHUNK):
+            conn.execute(insert(UserLives), [
+                {"user_id": user_id, "current_lives": 3, "max_lives": 3} for user_id, _ in users[start:start + CHUNK]
+            ])
+    return users
+
+
+def auth_headers(user_id: int, email: str) -> dict:
+    # Тот же формат, что у create_user_token, без загрузки пользователя
+    return {"Authorization": f"Bearer {create_access_token({'sub': email, 'uid': user_id, 'ver': 0})}"}
+
+
+def start_server(port: int, connections: int, heartbeat: float) -> subprocess.Popen:
+    env = dict(
+        os.environ, AUTO_MIGRATE="false", RATE_LIMIT_ENABLED="false", METRICS_ENABLED="false",
+        LIVE_MAX_CONNECTIONS=str(connections + 100), LIVE_HEARTBEAT_SECONDS=str(heartbeat),
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+
+
+def process_usage(pid: int) -> dict:
+    """Память (RSS) и процессорное время процесса по /proc (только Linux)"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            rss_kb = next(int(line.split()[1]) for line in status if line.startswith("VmRSS:"))
+        with open(f"/proc/{pid}/stat") as stat:
+            fields = stat.read().rsplit(")", 1)[1].split()
+        ticks = os.sysconf("SC_CLK_TCK")
+        return {"rss_mb": rss_kb / 1024, "cpu_s": (int(fields[11]) + int(fields[12])) / ticks}
+    except (OSError, StopIteration, ValueError):
+        return {"rss_mb": None, "cpu_s": None}
+
+
+def delta(after, before):
+    return None if after is None or before is None else round(after - before, 3)
+
+
+class Listener:
+    """Поток одного пользователя: пинги и время прихода событий lives"""
+
+    def __init__(self, user_id: int, email: str):
+        self.headers = auth_headers(user_id, email)
+        self.pings = 0
+        self.events = asyncio.Queue()
+        self.connected = asyncio.Event()
+        self.status = None
+
+    async def run(self, client: httpx.AsyncClient, opening: asyncio.Semaphore) -> None:
+        # Подключения открываются волнами: одновременно не больше opening
+        await opening.acquire()
+        try:
+            async with client.stream("GET", "/api/live/stream", headers=self.headers) as response:
+                self.status = response.status_code
+                if response.status_code != 200:
+                    return
+                opening.release()
+                self.connected.set()
+                await self.read(response)
+        finally:
+            if not self.connected.is_set():
+                opening.release()
+                self.connected.set()
+
+    async def read(self, response: httpx.Response) -> None:
+        buffer = ""
+        async for chunk in response.aiter_text():
+            buffer += chunk
+            while "\n\n" in buffer:
+                message, buffer = buffer.split("\n\n", 1)
+                if message.startswith(": ping"):
+                    self.pings += 1
+                elif message.startswith("event: lives"):
+                    self.events.put_nowait(time.perf_counter())
+
+
+async def run(args) -> dict:
+    base_url = f"http://127.0.0.1:{args.port}"
+    users = seed(args.connections)
+    server = start_server(args.port, args.connections, args.heartbeat)
+    try:
+        await wait_ready(base_url)
+        baseline = process_usage(server.pid)
+        limits = httpx.Limits(max_connections=args.connections + 10, max_keepalive_connections=10)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=None) as streams, \
+                httpx.AsyncClient(base_url=base_url, timeout=30.0) as client:
+            listeners = [Listener(user_id, email) for user_id, email in users]
+            started = time.perf_counter()
+            opening = asyncio.Semaphore(args.open_concurrency)
+            tasks = [asyncio.create_task(listener.run(streams, opening)) for listener in listeners]
+            await asyncio.wait_for(asyncio.gather(*(l.connected.wait() for l in listeners)), args.open_timeout)
+            open_s = time.perf_counter() - started
+            rejected = sum(1 for l in listeners if l.status != 200)
+
+            # Простой: только пинги раз в heartbeat секунд
+            connected = process_usage(server.pid)
+            await asyncio.sleep(args.idle)
+            idle = process_usage(server.pid)
+
+            latencies, lost = [], 0
+            for listener in random.sample(listeners, min(args.events, len(listeners))):
+                sent = time.perf_counter()
+                await client.put("/api/lives/my-lives", json={"current_lives": 2}, headers=listener.headers)
+                try:
+                    received = await asyncio.wait_for(listener.events.get(), 5.0)
+                    latencies.append((received - sent) * 1000)
+                except asyncio.TimeoutError:
+                    lost += 1
+
+            pings = sum(l.pings for l in listeners)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        server.terminate()
+        server.wait()
+
+    opened = args.connections - rejected
+    rss_delta = delta(connected["rss_mb"], baseline["rss_mb"])
+    return {
+        "database": os.getenv("DATABASE_URL", "").split("://", 1)[0] or "default",
+        "params": {"connections": args.connections, "idle_s": args.idle, "heartbeat_s": args.heartbeat,
+                   "events": args.events},
+        "opened": opened,
+        "rejected": rejected,
+        "open_s": round(open_s, 2),
+        "rss_mb": {"baseline": baseline["rss_mb"], "connected": connected["rss_mb"], "delta": rss_delta},
+        "rss_kb_per_connection": round(rss_delta * 1024 / opened, 1) if rss_delta and opened else None,
+        "idle_cpu_s": delta(idle["cpu_s"], connected["cpu_s"]),
+        "pings": pings,
+        "delivery_ms": {
+            "p50": round(percentile(latencies, 50), 2) if latencies else None,
+            "p95": round(percentile(latencies, 95), 2) if latencies else None,
+            "p99": round(percentile(latencies, 99), 2) if latencies else None,
+        },
+        "lost": lost,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=2000, help="одновременных потоков (по одному на пользователя)")
+    parser.add_argument("--idle", type=float, default=30.0, help="секунд простоя с пингами")
+    parser.add_argument("--heartbeat", type=float, default=5.0, help="LIVE_HEARTBEAT_SECONDS сервера")
+    parser.add_argument("--events", type=int, default=200, help="изменений жизней для замера доставки")
+    parser.add_argument("--open-concurrency", type=int, default=50, help="одновременно открываемых подключений")
+    parser.add_argument("--open-timeout", type=float, default=120.0, help="секунд на открытие всех потоков")
+    parser.add_argument("--port", type=int, default=8300)
+    args = parser.parse_args()
+
+    upgrade_schema()
+    engine.dispose()
+    result = asyncio.run(run(args))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    sys.exit(1 if result["rejected"] or result["lost"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""Нагрузочный тест пути ученика через HTTP.
+
+Скрипт применяет миграции к базе из DATABASE_URL, заполняет её N
+пользователями с M пройденными уроками по каждой теме, запускает uvicorn
+с app.main:app и в течение заданного времени гоняет виртуальных клиентов
+по сценариям:
+
+    journey   — вход, дашборд (жизни, прогресс, темы), прохождение урока,
+                использование жизни;
+    register  — регистрация нового пользователя и вход;
+    avatar    — вход и загрузка аватара.
+
+По каждому маршруту печатаются пропускная способность и задержки
+p50/p95/p99, результат сохраняется в JSON для сравнения между коммитами.
+
+    cd backend
+    DATABASE_URL=postgresql://... python -m benchmarks.load_journey \\
+        --users 1000 --lessons 10 --clients 50 --duration 60 --output load.json
+
+Без DATABASE_URL используется SQLite (только для проверки сценариев:
+цифры на SQLite с Postgres не сравнимы).
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+from PIL import Image
+
+from benchmarks.db_modes import percentile, wait_ready
+from benchmarks.seed_data import seed
+
+PASSWORD = "loadtest"
+TOPICS = ("job", "rent")
+# Ответы, которые для сценария не являются ошибкой (жизни могут закончиться)
+EXPECTED = {"POST /api/lives/use-life": {200, 400}}
+DEFAULT_MIX = {"journey": 8, "register": 1, "avatar": 1}
+
+
+class Recorder:
+    """Задержки и коды ответов по маршрутам"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+        self.recording = False
+
+    async def call(self, client: httpx.AsyncClient, route: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, "transport"
+        elapsed = time.perf_counter() - started
+        if self.recording:
+            self.latencies[route].append(elapsed)
+            self.statuses[route][str(status)] += 1
+            if status not in EXPECTED.get(route, {200}):
+                self.errors[route] += 1
+        return response
+
+    def report(self, duration: float) -> dict:
+        routes = {}
+        for route in sorted(self.latencies):
+            values = self.latencies[route]
+            routes[route] = {
+                "requests": len(values),
+                "errors": self.errors[route],
+                "rps": round(len(values) / duration, 1),
+                "mean_ms": round(sum(values) / len(values) * 1000, 2),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+                "statuses": dict(self.statuses[route]),
+            }
+        total = sum(len(v) for v in self.latencies.values())
+        return {
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "rps": round(total / duration, 1),
+            "routes": routes,
+        }
+
+
+def avatar_png() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (512, 512), (90, 140, 200)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+async def login(rec: Recorder, client: httpx.AsyncClient, email: str) -> dict:
+    response = await rec.call(client, "POST /api/auth/login", "POST", "/api/auth/login",
+                              json={"email": email, "password": PASSWORD})
+    if response is None or response.status_code != 200:
+        return {}
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def journey(rec: Recorder, client: httpx.AsyncClient, ctx: dict):
+    user_id = random.randint(1, ctx["users"])
+    headers = await login(rec, client, f"user{user_id}@example.com")
+    if not headers:
+        return
+    # Дашборд: жизни, прогресс по темам и список тем
+    await asyncio.gather(
+        rec.call(client, "GET /api/lives/my-lives", "GET", "/api/lives/my-lives", headers=headers),
+        rec.call(client, "GET /api/progress", "GET", "/api/progress",
+                 params={"topics": ",".join(TOPICS)}, headers=headers),
+        rec.call(client, "GET /api/topics/", "GET", "/api/topics/"),
+    )
+    topic = random.choice(TOPICS)
+    await rec.call(client, "GET /api/progress/{topic}", "GET", f"/api/progress/{topic}", headers=headers)
+    lesson = random.randint(1, ctx["lessons"])
+    await rec.call(client, "POST /api/progress/{topic}/lesson/{n}", "POST",
+                   f"/api/progress/{topic}/lesson/{lesson}", json={"status": "completed"}, headers=headers)
+    await rec.call(client, "POST /api/lives/use-life", "POST", "/api/lives/use-life", headers=headers)
+
+
+async def register(rec: Recorder, client: httpx.AsyncClient, ctx: dict):
+    name = f"load_{uuid.uuid4().hex[:12]}"
+    await rec.call(client, "POST /api/auth/register", "POST", "/api/auth/register", json={
+        "email": f"{name}@example.com", "username": name, "full_name": name, "password": PASSWORD,
+    })
+    await login(rec, client, f"{name}@example.com")
+
+
+async def avatar(rec: Recorder, client: httpx.AsyncClient, ctx: dict):
+    user_id = random.randint(1, ctx["users"])
+    headers = await login(rec, client, f"user{user_id}@example.com")
+    if not headers:
+        return
+    await rec.call(client, "POST /api/users/upload-avatar", "POST", "/api/users/upload-avatar",
+                   files={"file": ("avatar.png", ctx["avatar"], "image/png")}, headers=headers)
+
+
+SCENARIOS = {"journey": journey, "register": register, "avatar": avatar}
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"неизвестный сценарий {name}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def start_server(port: int, workers: int, upload_dir: str) -> subprocess.Popen:
+    # Все виртуальные клиенты входят с одного IP: лимит попыток входа выключен
+    env = dict(os.environ, AUTO_MIGRATE="false", AVATAR_DIR=upload_dir, RATE_LIMIT_ENABLED="false")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+    )
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run(args) -> dict:
+    ctx = {"users": args.users, "lessons": args.lessons, "avatar": avatar_png()}
+    scenarios = [SCENARIOS[name] for name in args.mix]
+    weights = list(args.mix.values())
+    rec = Recorder()
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    with tempfile.TemporaryDirectory(prefix="load-avatars-") as upload_dir:
+        server = start_server(args.port, args.workers, upload_dir)
+        try:
+            await wait_ready(base_url)
+            limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+            async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+                stop_at = 0.0
+
+                async def virtual_user():
+                    while time.monotonic() < stop_at:
+                        scenario = random.choices(scenarios, weights)[0]
+                        await scenario(rec, client, ctx)
+
+                # Прогрев: соединения, пулы и кеши; результаты не учитываются
+                stop_at = time.monotonic() + args.warmup
+                await asyncio.gather(*(virtual_user() for _ in range(args.clients)))
+
+                rec.recording = True
+                started = time.monotonic()
+                stop_at = started + args.duration
+                await asyncio.gather(*(virtual_user() for _ in range(args.clients)))
+                elapsed = time.monotonic() - started
+        finally:
+            server.terminate()
+            server.wait()
+
+    return {
+        "commit": git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "database": os.getenv("DATABASE_URL", "").split("://", 1)[0] or "default",
+        "params": {
+            "users": args.users, "lessons": args.lessons, "clients": args.clients,
+            "duration_s": args.duration, "warmup_s": args.warmup, "workers": args.workers,
+            "mix": args.mix,
+        },
+        "elapsed_s": round(elapsed, 2),
+        **rec.report(elapsed),
+    }
+
+
+def print_table(result: dict) -> None:
+    print(f"{'маршрут':<42} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'ошибки':>7}", file=sys.stderr)
+    for route, stats in result["routes"].items():
+        print(f"{route:<42} {stats['rps']:>8} {stats['p50_ms']:>8} {stats['p95_ms']:>8} "
+              f"{stats['p99_ms']:>8} {stats['errors']:>7}", file=sys.stderr)
+    print(f"всего: {result['requests']} запросов, {result['rps']} rps, ошибок {result['errors']}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000, help="пользователей в базе")
+    parser.add_argument("--lessons", type=int, default=10, help="пройденных уроков на тему")
+    parser.add_argument("--clients", type=int, default=50, help="одновременных виртуальных клиентов")
+    parser.add_argument("--duration", type=float, default=60.0, help="секунд измерения")
+    parser.add_argument("--warmup", type=float, default=5.0, help="секунд прогрева")
+    parser.add_argument("--workers", type=int, default=1, help="воркеров uvicorn")
+    parser.add_argument("--port", type=int, default=8200)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="веса сценариев, например journey=8,register=1,avatar=1")
+    parser.add_argument("--seed", type=int, default=None, help="seed генератора для воспроизводимости")
+    parser.add_argument("--no-seed-db", action="store_true", help="не пересоздавать данные в базе")
+    parser.add_argument("--output", help="файл для JSON-результата (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    if not args.no_seed_db:
+        from app.schema import upgrade_schema
+        upgrade_schema()
+        seed(args.users, args.lessons, password=PASSWORD)
+
+    result = asyncio.run(run(args))
+    print_table(result)
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Проверка маршрутизации запросов между основной БД и репликами.
+
+Нужны две локальные БД: основная (DATABASE_URL) и «реплика»
+(DATABASE_REPLICA_URLS) — отдельная база, в которую ничего не реплицируется.
+Скрипт применяет миграции к обеим, проходит шаги через TestClient и по числу
+SQL-запросов в каждой БД проверяет, куда ушёл запрос: запись — в основную,
+чтение — в реплику, чтение сразу после своей записи — в основную. «Реплика»
+не получает изменений, поэтому чтение из неё видно и по ответу: только что
+зарегистрированного пользователя там нет.
+
+    cd backend
+    DATABASE_URL=sqlite:///./primary.db DATABASE_REPLICA_URLS=sqlite:///./replica.db \\
+        python -m benchmarks.replica_routing
+
+Завершается с кодом 1, если хотя бы один запрос ушёл не в ту БД.
+"""
+import sys
+import uuid
+from contextlib import contextmanager
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+
+from app.auth import user_cache
+from app.database import DATABASE_REPLICA_URLS, active_engine, db_router, replica_sync_engines
+from app.schema import upgrade_schema
+
+
+@contextmanager
+def count_queries(engine):
+    """Список SQL-запросов, выполненных через engine внутри блока"""
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+
+
+def main():
+    if not replica_sync_engines:
+        print("DATABASE_REPLICA_URLS не задан: маршрутизировать не на что")
+        sys.exit(2)
+
+    from app.main import app
+
+    upgrade_schema()
+    # Схема «реплики»: в настоящей репликации её переносит сама БД
+    replica_engine = create_engine(DATABASE_REPLICA_URLS[0])
+    upgrade_schema(replica_engine)
+    replica_engine.dispose()
+    name = f"replica_{uuid.uuid4().hex[:10]}"
+    user = {"email": f"{name}@example.com", "username": name, "full_name": name, "password": "replica"}
+    headers = {}
+    failures = 0
+
+    def check(title, expected, method, url, status, **kwargs):
+        nonlocal failures
+        with count_queries(active_engine) as primary, count_queries(replica_sync_engines[0]) as replica:
+            response = client.request(method, url, **kwargs)
+        target = "primary" if primary and not replica else "replica" if replica and not primary else "-"
+        ok = target == expected and response.status_code == status
+        print(f"[{'ok' if ok else 'FAIL'}] {title}: {target} "
+              f"(основная {len(primary)}, реплика {len(replica)}, HTTP {response.status_code})")
+        if not ok:
+            failures += 1
+        return response
+
+    with TestClient(app) as client:
+        check("регистрация", "primary", "POST", "/api/auth/register", 200, json=user)
+        response = check("вход", "primary", "POST", "/api/auth/login", 200,
+                         json={"email": user["email"], "password": user["password"]})
+        headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+        # Сразу после своей записи чтение идёт в основную БД
+        user_cache.clear()
+        check("профиль после записи", "primary", "GET", "/api/auth/me", 200, headers=headers)
+
+        # Окно истекло (cookie нет): чтение идёт в реплику, где пользователя ещё нет
+        client.cookies.clear()
+        user_cache.clear()
+        check("профиль из реплики", "replica", "GET", "/api/auth/me", 401, headers=headers)
+
+        # Запись идёт в основную БД и без cookie
+        check("использование жизни", "primary", "POST", "/api/lives/use-life", 200, headers=headers)
+
+    print("Решения маршрутизации:", db_router.stats()["decisions"])
+    print(f"Запросов не в той БД: {failures}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Заполнение базы для нагрузочных тестов: N пользователей с M пройденными
+уроками по каждой теме. Данные в таблицах пользователей и прогресса
+удаляются.
+"""
+from sqlalchemy import insert, text
+
+from app.database import engine
+from app.hashing import hash_password
+from app.leaderboard import ALL_TIME, period_key
+from app.models import LeaderboardBucket, LeaderboardScore, LessonProgress, Topic, User, UserLives
+
+
+def seed(users: int, lessons: int, password: str) -> None:
+    """Пересоздаёт темы, пользователей user{i}@example.com, их прогресс и рейтинг"""
+    hashed = hash_password(password)
+    with engine.begin() as conn:
+        for table in ("leaderboard_buckets", "leaderboard_scores", "lesson_progress", "user_lives", "topics", "users"):
+            conn.execute(text(f"DELETE FROM {table}"))
+        conn.execute(insert(Topic), [
+            {"slug": "job", "title": "Работа", "display_order": 0},
+            {"slug": "rent", "title": "Съем квартиры", "display_order": 1},
+        ])
+        conn.execute(insert(User), [
+            {"id": i, "email": f"user{i}@example.com", "username": f"user{i}",
+             "full_name": f"User {i}", "hashed_password": hashed}
+            for i in range(1, users + 1)
+        ])
+        conn.execute(insert(UserLives), [
+            {"user_id": i, "current_lives": 3, "max_lives": 3} for i in range(1, users + 1)
+        ])
+        conn.execute(insert(LessonProgress), [
+            {"user_id": i, "topic_slug": slug, "lesson_number": n, "status": "completed"}
+            for i in range(1, users + 1) for slug in ("job", "rent") for n in range(1, lessons + 1)
+        ])
+        # Счётчики рейтинга соответствуют пройденным урокам
+        completed = 2 * lessons
+        conn.execute(insert(LeaderboardScore), [
+            {"period": period, "user_id": i, "completed": completed}
+            for period in (ALL_TIME, period_key("week")) for i in range(1, users + 1)
+        ])
+        conn.execute(insert(LeaderboardBucket), [
+            {"period": period, "completed": completed, "users": users}
+            for period in (ALL_TIME, period_key("week"))
+        ])
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT setval('users_id_seq', (SELECT max(id) FROM users))"))
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE"))
+        conn.commit()
@@ -0,0 +1,167 @@
+"""Сериализация и сжатие ответов: прежний путь против нового.
+
+До: ORM-объекты через response_model (валидация FastAPI, jsonable-кодирование)
+и JSONResponse со stdlib json; для прогресса по теме — промежуточные
+LessonProgressItem на каждую строку, для тем — список Topic на каждый запрос.
+После: ORM-объекты через model_response (без повторной валидации), тела
+прогресса из столбцов БД сразу в orjson (json_response), готовое тело каталога
+тем и FastJSONResponse по умолчанию; плюс размер тела после gzip/Brotli.
+
+База данных не нужна: объекты строятся в памяти, измеряется только
+сериализация — то, что меняется между путями.
+
+    cd backend
+    python -m benchmarks.serialization --lessons 30 --topics 10 --iterations 2000
+"""
+import argparse
+import asyncio
+import json
+import time
+import zlib
+from datetime import datetime
+from functools import lru_cache
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.models import LessonProgress, Topic, User
+from app.responses import FastJSONResponse, json_response, model_response
+from app.schemas import AllProgressResponse, LessonProgressItem, LessonProgressResponse, TopicResponse, UserResponse
+from app.topic_catalog import _topics_adapter
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def make_progress(lessons: int, slug: str = "rent") -> List[LessonProgress]:
+    return [
+        LessonProgress(id=n, user_id=1, topic_slug=slug, lesson_number=n,
+                       status="completed" if n < lessons else "active")
+        for n in range(1, lessons + 1)
+    ]
+
+
+def make_topics(count: int) -> List[Topic]:
+    now = datetime.utcnow()
+    return [
+        Topic(id=n, slug=f"topic-{n}", title=f"Тема {n}", description="Описание темы " * 5,
+              display_order=n, created_at=now, updated_at=now)
+        for n in range(1, count + 1)
+    ]
+
+
+@lru_cache(maxsize=None)
+def response_field(schema):
+    # FastAPI создаёт поле ответа один раз при регистрации маршрута
+    return create_response_field(name="response", type_=schema, mode="serialization")
+
+
+async def fastapi_path(schema, content) -> bytes:
+    """Как FastAPI обрабатывает возвращённый объект при response_model"""
+    encoded = await serialize_response(field=response_field(schema), response_content=content)
+    return JSONResponse(encoded).body
+
+
+def measure(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+async def measure_async(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def wire_sizes(body: bytes) -> dict:
+    sizes = {"raw": len(body), "gzip": len(zlib.compress(body, 6))}
+    if brotli is not None:
+        sizes["br"] = len(brotli.compress(body, quality=5))
+    return sizes
+
+
+async def run(lessons: int, topics: int, iterations: int) -> List[dict]:
+    progress_rows = make_progress(lessons)
+    all_rows = {f"topic-{t}": make_progress(lessons, f"topic-{t}") for t in range(1, topics + 1)}
+    topic_rows = make_topics(topics)
+    user = User(id=1, email="bench@example.com", username="bench", full_name="Bench", phone=None,
+                avatar_url=None, is_active=True, is_verified=False, created_at=datetime.utcnow())
+    catalog_body = _topics_adapter.dump_json(_topics_adapter.validate_python(topic_rows, from_attributes=True))
+
+    # Прогресс по теме: раньше — ORM-объекты и LessonProgressItem на строку
+    def topic_progress_before():
+        items = [LessonProgressItem(lesson_number=i.lesson_number, status=i.status) for i in progress_rows]
+        return fastapi_path(LessonProgressResponse, {"topic_slug": "rent", "items": items})
+
+    rows = [(p.lesson_number, p.status) for p in progress_rows]
+
+    def topic_progress_after():
+        items = [{"lesson_number": n, "status": s} for n, s in rows]
+        return json_response({"topic_slug": "rent", "items": items}).body
+
+    all_body = {
+        "topics": {slug: [{"lesson_number": p.lesson_number, "status": p.status} for p in items]
+                   for slug, items in all_rows.items()}
+    }
+
+    cases = [
+        ("GET /api/progress/{slug}", topic_progress_before, topic_progress_after),
+        ("GET /api/progress",
+         lambda: fastapi_path(AllProgressResponse, all_body),
+         lambda: json_response(all_body).body),
+        ("GET /api/auth/me",
+         lambda: fastapi_path(UserResponse, user),
+         lambda: model_response(UserResponse, user).body),
+        ("GET /api/topics/",
+         lambda: fastapi_path(List[TopicResponse], topic_rows),
+         lambda: catalog_body),
+        ("POST /api/progress/{slug}/lesson/{n} (default_response_class)",
+         lambda: JSONResponse({"message": "Progress updated", "lesson_number": 3,
+                               "status": "completed", "next_lesson_activated": True}).body,
+         lambda: FastJSONResponse({"message": "Progress updated", "lesson_number": 3,
+                                   "status": "completed", "next_lesson_activated": True}).body),
+    ]
+
+    results = []
+    for name, before, after in cases:
+        async def call_before():
+            result = before()
+            if asyncio.iscoroutine(result):
+                result = await result
+            return result
+
+        before_body = await call_before()
+        after_body = after()
+        if json.loads(before_body) != json.loads(after_body):
+            raise AssertionError(f"{name}: тела ответов до и после различаются")
+        before_us = await measure_async(call_before, iterations)
+        after_us = measure(after, iterations)
+        results.append({
+            "route": name,
+            "before_us": round(before_us, 1),
+            "after_us": round(after_us, 1),
+            "speedup": round(before_us / after_us, 1) if after_us else None,
+            "bytes": wire_sizes(after_body),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lessons", type=int, default=30, help="уроков в теме")
+    parser.add_argument("--topics", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    results = asyncio.run(run(args.lessons, args.topics, args.iterations))
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
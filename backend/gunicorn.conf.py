@@ -0,0 +1,66 @@
+"""Продакшен-запуск: gunicorn с uvicorn-воркерами.
+
+    gunicorn app.main:app -c gunicorn.conf.py
+
+Приложение импортируется один раз в мастере (preload_app) и наследуется
+воркерами при fork. Миграции мастер выполняет до запуска воркеров, поэтому
+воркеры не соревнуются за схему; соединения с БД, пул хеширования паролей и
+каталоги открываются в lifespan каждого воркера.
+"""
+import logging
+import os
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_started = time.perf_counter()
+logger = logging.getLogger("gunicorn.error")
+
+
+def _cpu_count() -> int:
+    try:
+        # Учитывает ограничение ядер через taskset/cpuset
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+# Воркер асинхронный, поэтому достаточно одного на ядро
+workers = int(os.getenv("WEB_CONCURRENCY") or _cpu_count())
+# Приложение делит пул БД и пул bcrypt между воркерами (app/deployment.py)
+os.environ["WEB_CONCURRENCY"] = str(workers)
+# UvicornWorker, закрывающий потоки живых обновлений при остановке (app/workers.py)
+worker_class = "app.workers.Worker"
+preload_app = True
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+# Адреса прокси, которым верим в X-Forwarded-For/X-Forwarded-Proto. Только для
+# них адрес клиента (лимиты попыток по IP, журнал) берётся из заголовка; иначе
+# это адрес самого соединения. "*" — только если до приложения нельзя достучаться
+# в обход прокси: иначе клиент подставит в заголовок любой IP
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def on_starting(server):
+    from app.main import AUTO_MIGRATE
+
+    if AUTO_MIGRATE:
+        from app.database import engine
+        from app.schema import ensure_schema
+
+        started = time.perf_counter()
+        ensure_schema()
+        # Соединения мастера не должны достаться воркерам после fork
+        engine.dispose()
+        logger.info("Миграции применены за %.0f мс", (time.perf_counter() - started) * 1000)
+
+
+def when_ready(server):
+    logger.info(
+        "Мастер готов за %.0f мс, воркеров: %d",
+        (time.perf_counter() - _started) * 1000, server.num_workers,
+    )
@@ -0,0 +1,72 @@
+"""Версия токена, уникальность прогресса и жизней, индексы для горячих запросов
+
+Revision ID: 0002_indexes_and_constraints
+Revises: 0001_initial_schema
+Create Date: 2026-10-18 12:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_indexes_and_constraints"
+down_revision: Union[str, None] = "0001_initial_schema"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _existing_indexes(inspector, table: str) -> set:
+    names = {index["name"] for index in inspector.get_indexes(table)}
+    return names | {constraint["name"] for constraint in inspector.get_unique_constraints(table)}
+
+
+def upgrade() -> None:
+    # Базы, созданные через create_all после появления token_version и
+    # уникальности прогресса в моделях, уже содержат часть этих изменений
+    inspector = sa.inspect(op.get_bind())
+    if "token_version" not in {column["name"] for column in inspector.get_columns("users")}:
+        with op.batch_alter_table("users") as batch:
+            batch.add_column(sa.Column("token_version", sa.Integer(), server_default="0", nullable=False))
+
+    # Перед созданием уникальных индексов убираем дубликаты:
+    # для урока оставляем запись с "лучшим" статусом, для жизней — самую раннюю
+    op.execute("""
+        DELETE FROM lesson_progress WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY user_id, topic_slug, lesson_number
+                    ORDER BY CASE status WHEN 'completed' THEN 0 WHEN 'active' THEN 1 ELSE 2 END, id
+                ) AS rn
+                FROM lesson_progress
+            ) ranked WHERE rn > 1
+        )
+    """)
+    op.execute("""
+        DELETE FROM user_lives WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (PARTITION BY user_id ORDER BY id) AS rn
+                FROM user_lives
+            ) ranked WHERE rn > 1
+        )
+    """)
+
+    if "uq_lesson_progress_user_topic_lesson" not in _existing_indexes(inspector, "lesson_progress"):
+        op.create_index(
+            "uq_lesson_progress_user_topic_lesson",
+            "lesson_progress",
+            ["user_id", "topic_slug", "lesson_number"],
+            unique=True,
+            postgresql_include=["status"],
+        )
+    if "ix_user_lives_user_id" not in _existing_indexes(inspector, "user_lives"):
+        op.create_index("ix_user_lives_user_id", "user_lives", ["user_id"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_lives_user_id", table_name="user_lives")
+    op.drop_index("uq_lesson_progress_user_topic_lesson", table_name="lesson_progress")
+    with op.batch_alter_table("users") as batch:
+        batch.drop_column("token_version")
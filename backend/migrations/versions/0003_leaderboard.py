@@ -0,0 +1,69 @@
+"""Счётчики рейтинга по пройденным урокам
+
+Revision ID: 0003_leaderboard
+Revises: 0002_indexes_and_constraints
+Create Date: 2026-10-18 13:00:00
+
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_leaderboard"
+down_revision: Union[str, None] = "0002_indexes_and_constraints"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "leaderboard_scores",
+        sa.Column("period", sa.String(length=10), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("completed", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("period", "user_id"),
+    )
+    op.create_index("ix_leaderboard_scores_rank", "leaderboard_scores", ["period", "completed", "user_id"])
+    op.create_table(
+        "leaderboard_buckets",
+        sa.Column("period", sa.String(length=10), nullable=False),
+        sa.Column("completed", sa.Integer(), nullable=False),
+        sa.Column("users", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("period", "completed"),
+    )
+
+    # Начальные значения из уже пройденных уроков: за всё время и за текущую
+    # неделю (по времени последнего изменения записи)
+    monday = date.today() - timedelta(days=date.today().weekday())
+    op.execute("""
+        INSERT INTO leaderboard_scores (period, user_id, completed)
+        SELECT 'all', user_id, COUNT(*) FROM lesson_progress
+        WHERE status = 'completed' GROUP BY user_id
+    """)
+    op.get_bind().execute(
+        sa.text("""
+            INSERT INTO leaderboard_scores (period, user_id, completed)
+            SELECT :period, user_id, COUNT(*) FROM lesson_progress
+            WHERE status = 'completed' AND COALESCE(updated_at, created_at) >= :since
+            GROUP BY user_id
+        """).bindparams(
+            sa.bindparam("period", monday.isoformat()),
+            sa.bindparam("since", datetime.combine(monday, time.min), type_=sa.DateTime(timezone=True)),
+        )
+    )
+    op.execute("""
+        INSERT INTO leaderboard_buckets (period, completed, users)
+        SELECT period, completed, COUNT(*) FROM leaderboard_scores GROUP BY period, completed
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table("leaderboard_buckets")
+    op.drop_index("ix_leaderboard_scores_rank", table_name="leaderboard_scores")
+    op.drop_table("leaderboard_scores")
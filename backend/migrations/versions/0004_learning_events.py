@@ -0,0 +1,39 @@
+"""Журнал учебных событий
+
+Revision ID: 0004_learning_events
+Revises: 0003_leaderboard
+Create Date: 2026-10-18 14:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_learning_events"
+down_revision: Union[str, None] = "0003_leaderboard"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "learning_events",
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("event_type", sa.String(length=32), nullable=False),
+        sa.Column("topic_slug", sa.String(), nullable=True),
+        sa.Column("lesson_number", sa.Integer(), nullable=True),
+        sa.Column("task_number", sa.Integer(), nullable=True),
+        sa.Column("payload", sa.JSON(), nullable=True),
+        sa.Column("occurred_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_learning_events_user_occurred", "learning_events", ["user_id", "occurred_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_learning_events_user_occurred", table_name="learning_events")
+    op.drop_table("learning_events")
@@ -0,0 +1,89 @@
+"""Общие фикстуры тестов: временная БД, приложение, подсчёт SQL-запросов.
+
+Настройки приложения читаются при импорте модулей, поэтому окружение
+задаётся здесь, до первого импорта app. По умолчанию база — временный файл
+SQLite; другую (например, PostgreSQL) задаёт TEST_DATABASE_URL.
+
+    cd backend
+    pytest
+"""
+import atexit
+import os
+import shutil
+import tempfile
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, List
+
+_tmp_dir = tempfile.mkdtemp(prefix="finlingo-tests-")
+atexit.register(shutil.rmtree, _tmp_dir, ignore_errors=True)
+
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL") or f"sqlite:///{_tmp_dir}/test.db"
+os.environ.update(
+    DATABASE_REPLICA_URLS="",
+    AVATAR_DIR=os.path.join(_tmp_dir, "avatars"),
+    BCRYPT_ROUNDS="4",
+    PASSWORD_HASH_EXECUTOR="thread",
+    RATE_LIMIT_ENABLED="false",
+    WEB_CONCURRENCY="1",
+    USER_CACHE_BACKEND="memory",
+    LIVE_BACKEND="memory",
+)
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+
+@contextmanager
+def _count_queries(engine=None) -> Iterator[List[str]]:
+    from app.database import active_engine
+
+    engine = engine if engine is not None else active_engine
+    statements: List[str] = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(" ".join(statement.split()))
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+
+
+@pytest.fixture(scope="session")
+def count_queries():
+    """Контекстный менеджер: список SQL, выполненных через движок приложения внутри блока.
+
+        with count_queries() as statements:
+            client.get("/api/progress/rent", headers=headers)
+        assert len(statements) <= 2, "\\n".join(statements)
+    """
+    return _count_queries
+
+
+@pytest.fixture(scope="session")
+def application():
+    from app.main import app
+    from app.schema import upgrade_schema
+
+    upgrade_schema()
+    return app
+
+
+@pytest.fixture(scope="session")
+def client(application) -> Iterator[TestClient]:
+    with TestClient(application) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Новый пользователь: заголовок Authorization с его токеном"""
+    name = f"test_{uuid.uuid4().hex[:10]}"
+    user = {"email": f"{name}@example.com", "username": name, "full_name": name, "password": "secret123"}
+    client.post("/api/auth/register", json=user).raise_for_status()
+    response = client.post("/api/auth/login", json={"email": user["email"], "password": user["password"]})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
@@ -0,0 +1,54 @@
+"""Кеш пользователей по токену и отзыв токенов."""
+import asyncio
+
+from sqlalchemy import update
+
+from app import auth
+from app.auth import cache_user, create_access_token, invalidate_user, user_cache
+from app.database import SessionLocal
+from app.models import User
+
+
+def _me(client, headers):
+    return client.get("/api/auth/me", headers=headers)
+
+
+def test_logout_all_revokes_cached_token(client, auth_headers):
+    assert _me(client, auth_headers).status_code == 200
+    # Второй запрос берёт пользователя из кеша
+    assert _me(client, auth_headers).status_code == 200
+
+    assert client.post("/api/auth/logout-all", headers=auth_headers).status_code == 200
+    assert _me(client, auth_headers).status_code == 401
+
+
+def test_legacy_email_token_is_revoked_too(client, auth_headers):
+    email = _me(client, auth_headers).json()["email"]
+    legacy = {"Authorization": f"Bearer {create_access_token({'sub': email})}"}
+    assert _me(client, legacy).status_code == 200
+
+    client.post("/api/auth/logout-all", headers=auth_headers)
+    assert _me(client, legacy).status_code == 401
+
+
+def test_snapshot_loaded_before_invalidation_is_not_cached(client, auth_headers):
+    user_id = _me(client, auth_headers).json()["id"]
+    user_cache.clear()
+
+    # Запрос A прочитал поколение и загрузил пользователя...
+    generation = asyncio.run(auth._cache_generation(user_id))
+    db = SessionLocal()
+    try:
+        stale = db.get(User, user_id)
+        # ...запрос B отозвал токены и сбросил кеш...
+        with SessionLocal() as other:
+            other.execute(update(User).where(User.id == user_id).values(token_version=User.token_version + 1))
+            other.commit()
+        asyncio.run(invalidate_user(user_id))
+        # ...и только потом A кладёт свой снимок в кеш
+        cache_user(stale, generation)
+    finally:
+        db.close()
+
+    assert user_cache.get(user_id) is None
+    assert _me(client, auth_headers).status_code == 401
@@ -0,0 +1,42 @@
+"""Загрузка аватаров: одновременные загрузки одного пользователя."""
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from app.avatars import AVATAR_DIR, AVATAR_SIZES, FORMATS, variant_name
+
+
+def _png(color) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (96, 96), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_parallel_uploads_keep_committed_avatar(client, auth_headers):
+    images = [_png((index * 30, 100, 200)) for index in range(6)]
+
+    def upload(content):
+        return client.post(
+            "/api/users/upload-avatar", files={"file": ("avatar.png", content, "image/png")}, headers=auth_headers)
+
+    with ThreadPoolExecutor(max_workers=len(images)) as pool:
+        responses = list(pool.map(upload, images))
+    assert [response.status_code for response in responses] == [200] * len(images)
+
+    profile = client.get("/api/users/profile", headers=auth_headers).json()
+    stem = os.path.basename(profile["avatar_url"]).rsplit("_", 1)[0]
+    # Все варианты сохранённого аватара на месте, прежние удалены
+    for size in AVATAR_SIZES:
+        for ext in FORMATS:
+            assert os.path.exists(os.path.join(AVATAR_DIR, variant_name(stem, size, ext)))
+    user_files = [name for name in os.listdir(AVATAR_DIR) if name.startswith(f"{profile['id']}_")]
+    assert {name.rsplit("_", 1)[0] for name in user_files} == {stem}
+    assert not [name for name in os.listdir(AVATAR_DIR) if name.startswith((".render-", ".upload-"))]
+
+
+def test_upload_without_content_type_is_rejected(client, auth_headers):
+    response = client.post(
+        "/api/users/upload-avatar", files={"file": ("avatar.png", _png((1, 2, 3)), "")}, headers=auth_headers)
+    assert response.status_code == 400
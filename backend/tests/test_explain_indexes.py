@@ -0,0 +1,146 @@
+"""Запросы роутеров используют индексы.
+
+База заполняется пользователями и прогрессом, новый пользователь проходит
+типичный сценарий через API, а для каждого перехваченного SELECT/UPDATE/DELETE
+выполняется EXPLAIN. Полный просмотр любой из растущих таблиц роняет тест,
+в сообщении — запрос и его план. На SQLite проверяется EXPLAIN QUERY PLAN;
+план PostgreSQL — с TEST_DATABASE_URL=postgresql://...
+"""
+import asyncio
+import json
+import re
+import uuid
+
+import pytest
+from sqlalchemy import event, func, insert, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.database import ASYNC_DATABASE_URL, active_engine, async_engine, engine
+from app.hashing import hash_password
+from app.leaderboard import ALL_TIME, period_key
+from app.models import LeaderboardScore, LessonProgress, Topic, User, UserLives
+
+# Таблицы, которые растут вместе с числом пользователей
+CHECKED_TABLES = {"users", "user_lives", "lesson_progress", "leaderboard_scores"}
+USERS = 500
+LESSONS = 10
+PASSWORD = "explain"
+
+
+def seed(prefix: str) -> int:
+    """Пользователи с прогрессом поверх данных других тестов; возвращает id одного из них"""
+    hashed = hash_password(PASSWORD)
+    with engine.begin() as conn:
+        first = (conn.execute(select(func.max(User.id))).scalar() or 0) + 1
+        ids = range(first, first + USERS)
+        existing = set(conn.execute(select(Topic.slug)).scalars())
+        topics = [{"slug": "job", "title": "Работа", "display_order": 0},
+                  {"slug": "rent", "title": "Съем квартиры", "display_order": 1}]
+        new_topics = [topic for topic in topics if topic["slug"] not in existing]
+        if new_topics:
+            conn.execute(insert(Topic), new_topics)
+        conn.execute(insert(User), [
+            {"id": i, "email": f"{prefix}{i}@example.com", "username": f"{prefix}{i}",
+             "full_name": f"User {i}", "hashed_password": hashed}
+            for i in ids
+        ])
+        conn.execute(insert(UserLives), [{"user_id": i, "current_lives": 3, "max_lives": 3} for i in ids])
+        conn.execute(insert(LessonProgress), [
+            {"user_id": i, "topic_slug": slug, "lesson_number": n, "status": "completed"}
+            for i in ids for slug in ("job", "rent") for n in range(1, LESSONS + 1)
+        ])
+        conn.execute(insert(LeaderboardScore), [
+            {"period": period, "user_id": i, "completed": 2 * LESSONS}
+            for period in (ALL_TIME, period_key("week")) for i in ids
+        ])
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT setval('users_id_seq', (SELECT max(id) FROM users))"))
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE"))
+        conn.commit()
+    return first + USERS // 2
+
+
+def capture_journey(client, prefix: str, user_id: int) -> list:
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if re.match(r"\s*(SELECT|UPDATE|DELETE)\b", statement, re.I) and "FROM" in statement.upper():
+            statements.append((statement, parameters))
+
+    login = {"email": f"{prefix}{user_id}@example.com", "password": PASSWORD}
+    response = client.post("/api/auth/login", json=login)
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    event.listen(active_engine, "before_cursor_execute", before_execute)
+    try:
+        client.post("/api/auth/login", json=login)
+        for path in ("/api/auth/me", "/api/users/profile", "/api/lives/my-lives",
+                     "/api/progress", "/api/progress/job", "/api/topics/",
+                     "/api/leaderboard?period=all", "/api/leaderboard/me?period=all"):
+            client.get(path, headers=headers).raise_for_status()
+        client.post("/api/progress/job/lesson/3", json={"status": "completed"}, headers=headers)
+        client.post("/api/lives/use-life", headers=headers)
+        client.put("/api/users/profile", json={"username": f"{prefix}{user_id}_x",
+                                               "email": f"{prefix}x{user_id}@example.com"}, headers=headers)
+    finally:
+        event.remove(active_engine, "before_cursor_execute", before_execute)
+    return statements
+
+
+def full_scans(conn, statement: str, parameters) -> tuple:
+    """Возвращает (таблицы с полным просмотром, план)"""
+    if conn.dialect.name == "postgresql":
+        plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        scans, stack = [], [plan[0]["Plan"]]
+        while stack:
+            node = stack.pop()
+            if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in CHECKED_TABLES:
+                scans.append(node["Relation Name"])
+            stack.extend(node.get("Plans", []))
+        return scans, json.dumps(plan, indent=2)
+
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+    details = [row[-1] for row in rows]
+    scans = [m.group(1) for d in details for m in [re.match(r"SCAN (\w+)$", d)] if m and m.group(1) in CHECKED_TABLES]
+    return scans, "\n".join(details)
+
+
+def _explain_all(conn, statements: list) -> list:
+    plans = [(statement, *full_scans(conn, statement, parameters)) for statement, parameters in statements]
+    conn.rollback()
+    return plans
+
+
+async def _explain_all_async(statements: list) -> list:
+    # Запросы перехвачены в формате параметров async-драйвера: EXPLAIN через
+    # него же, на отдельном движке (пул приложения привязан к циклу TestClient)
+    explain_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+    try:
+        async with explain_engine.connect() as conn:
+            return await conn.run_sync(_explain_all, statements)
+    finally:
+        await explain_engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def plans(client):
+    prefix = f"explain_{uuid.uuid4().hex[:6]}_"
+    statements = capture_journey(client, prefix, seed(prefix))
+    if async_engine is not None:
+        return asyncio.run(_explain_all_async(statements))
+    with engine.connect() as conn:
+        return _explain_all(conn, statements)
+
+
+def test_journey_queries_use_indexes(plans):
+    assert plans, "сценарий не выполнил ни одного запроса"
+    failures = [
+        f"FULL SCAN {','.join(scans)}: {' '.join(statement.split())}\n{plan}"
+        for statement, scans, plan in plans if scans
+    ]
+    assert not failures, "\n\n".join(failures)
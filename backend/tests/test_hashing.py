@@ -0,0 +1,25 @@
+"""Пул хеширования паролей."""
+import asyncio
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.hashing import PasswordHasherPool, check_password, hash_password
+
+
+def test_process_pool_is_recreated_after_worker_death():
+    pool = PasswordHasherPool(kind="process", workers=1, max_queue=4, retry_after=1)
+    try:
+        hashed = asyncio.run(pool.run(hash_password, "secret123"))
+        # Процесс-воркер погибает, как при OOM: пул больше не принимает задачи
+        with pytest.raises(BrokenProcessPool):
+            pool._get_executor().submit(os._exit, 1).result(timeout=30)
+
+        ok, _ = asyncio.run(pool.run(check_password, "secret123", hashed))
+        assert ok
+        stats = pool.stats()
+        assert stats["restarts"] == 1
+        assert stats["queue_depth"] == 0
+    finally:
+        pool.shutdown()
@@ -0,0 +1,26 @@
+"""Служебные метрики: доступ только администраторам и сборщику метрик."""
+import pytest
+
+from app import auth
+
+ROUTES = ["/api/internal/stats", "/metrics"]
+
+
+@pytest.mark.parametrize("route", ROUTES)
+def test_internal_routes_require_credentials(client, auth_headers, route):
+    assert client.get(route).status_code == 403
+    assert client.get(route, headers=auth_headers).status_code == 403
+
+
+@pytest.mark.parametrize("route", ROUTES)
+def test_admin_can_read_internal_routes(client, auth_headers, monkeypatch, route):
+    email = client.get("/api/auth/me", headers=auth_headers).json()["email"]
+    monkeypatch.setattr(auth, "ADMIN_EMAILS", {email})
+    assert client.get(route, headers=auth_headers).status_code == 200
+
+
+@pytest.mark.parametrize("route", ROUTES)
+def test_metrics_token_grants_access(client, monkeypatch, route):
+    monkeypatch.setattr(auth, "METRICS_TOKEN", "scrape-token")
+    assert client.get(route, headers={"Authorization": "Bearer scrape-token"}).status_code == 200
+    assert client.get(route, headers={"Authorization": "Bearer wrong-token"}).status_code == 401
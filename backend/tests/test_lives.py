@@ -0,0 +1,68 @@
+"""Жизни: чтение без записи и дневной сброс по UTC."""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select, update
+
+from app.database import engine
+from app.models import UserLives
+
+
+def _user_id(client, headers) -> int:
+    response = client.get("/api/auth/me", headers=headers)
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+def _drop_lives(user_id: int):
+    # Как у старых аккаунтов: записи жизней нет
+    with engine.begin() as conn:
+        conn.execute(delete(UserLives).where(UserLives.user_id == user_id))
+
+
+def _lives_rows(user_id: int) -> list:
+    with engine.connect() as conn:
+        return conn.execute(
+            select(UserLives.current_lives).where(UserLives.user_id == user_id)
+        ).scalars().all()
+
+
+def test_get_lives_without_row_does_not_write(client, auth_headers, count_queries):
+    user_id = _user_id(client, auth_headers)
+    _drop_lives(user_id)
+
+    with count_queries() as statements:
+        response = client.get("/api/lives/my-lives", headers=auth_headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["id"] is None
+    assert (body["current_lives"], body["max_lives"]) == (3, 3)
+    assert not [sql for sql in statements if not sql.lstrip().upper().startswith("SELECT")]
+    assert _lives_rows(user_id) == []
+
+
+def test_use_life_creates_missing_row(client, auth_headers):
+    user_id = _user_id(client, auth_headers)
+    _drop_lives(user_id)
+
+    response = client.post("/api/lives/use-life", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["remaining_lives"] == 2
+    assert _lives_rows(user_id) == [2]
+    assert client.get("/api/lives/my-lives", headers=auth_headers).json()["current_lives"] == 2
+
+
+def test_lives_reset_on_new_utc_day(client, auth_headers):
+    user_id = _user_id(client, auth_headers)
+    yesterday = datetime.now(timezone.utc) - timedelta(days=1)
+    with engine.begin() as conn:
+        conn.execute(
+            update(UserLives).where(UserLives.user_id == user_id)
+            .values(current_lives=0, last_reset_date=yesterday)
+        )
+
+    assert client.get("/api/lives/my-lives", headers=auth_headers).json()["current_lives"] == 3
+    response = client.post("/api/lives/use-life", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["remaining_lives"] == 2
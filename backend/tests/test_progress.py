@@ -0,0 +1,74 @@
+"""Прохождение уроков: одновременные запросы и статус в ответе."""
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select
+
+from app.database import engine
+from app.leaderboard import ALL_TIME
+from app.models import LeaderboardScore, LessonProgress
+
+
+def _user_id(client, headers) -> int:
+    response = client.get("/api/auth/me", headers=headers)
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+def _lessons(user_id: int, slug: str) -> dict:
+    with engine.connect() as conn:
+        lessons = {}
+        for number, status in conn.execute(
+            select(LessonProgress.lesson_number, LessonProgress.status)
+            .where(LessonProgress.user_id == user_id, LessonProgress.topic_slug == slug)
+        ):
+            lessons.setdefault(number, []).append(status)
+    return lessons
+
+
+def _completed_all_time(user_id: int):
+    with engine.connect() as conn:
+        return conn.execute(
+            select(LeaderboardScore.completed)
+            .where(LeaderboardScore.user_id == user_id, LeaderboardScore.period == ALL_TIME)
+        ).scalar()
+
+
+def test_parallel_completions_create_one_row_per_lesson(client, auth_headers):
+    user_id = _user_id(client, auth_headers)
+    # Новая тема: запросы заодно соревнуются за её создание
+    slug = f"race_{uuid.uuid4().hex[:8]}"
+    # Двойные клики и повторы из разных вкладок, часть — открытие урока
+    statuses = ["completed"] * 16 + ["active"] * 4
+
+    def post(status):
+        return client.post(f"/api/progress/{slug}/lesson/1", json={"status": status}, headers=auth_headers)
+
+    with ThreadPoolExecutor(max_workers=len(statuses)) as pool:
+        responses = list(pool.map(post, statuses))
+
+    assert [response.status_code for response in responses] == [200] * len(statuses)
+    assert _lessons(user_id, slug) == {1: ["completed"], 2: ["active"]}
+    assert _completed_all_time(user_id) == 1
+    completed = [response.json() for response, status in zip(responses, statuses) if status == "completed"]
+    assert all(body["status"] == "completed" for body in completed)
+    # Следующий урок открыл ровно один запрос
+    assert sum(body["next_lesson_activated"] for body in completed) == 1
+
+
+def test_active_does_not_reopen_completed_lesson(client, auth_headers):
+    user_id = _user_id(client, auth_headers)
+    slug = f"reopen_{uuid.uuid4().hex[:8]}"
+    url = f"/api/progress/{slug}/lesson/1"
+
+    first = client.post(url, json={"status": "completed"}, headers=auth_headers).json()
+    assert first["status"] == "completed" and first["next_lesson_activated"] is True
+
+    reopened = client.post(url, json={"status": "active"}, headers=auth_headers).json()
+    assert reopened["status"] == "completed"
+    assert reopened["next_lesson_activated"] is False
+
+    repeated = client.post(url, json={"status": "completed"}, headers=auth_headers).json()
+    assert repeated["next_lesson_activated"] is False
+    assert _lessons(user_id, slug) == {1: ["completed"], 2: ["active"]}
+    assert _completed_all_time(user_id) == 1
@@ -0,0 +1,126 @@
+"""Бюджеты SQL-запросов по маршрутам.
+
+Для каждого маршрута задан максимум SQL-запросов на один HTTP-запрос,
+включая загрузку пользователя по токену (кеш пользователей перед каждым
+запросом сбрасывается — считается худший случай). После прогревочного
+прохода новый пользователь проходит путь ученика; маршрут сверх бюджета
+роняет свой тест, и в сообщении — весь его SQL, чтобы N+1 был виден сразу.
+"""
+import io
+import uuid
+from typing import Dict, List
+
+import pytest
+from PIL import Image
+
+from app.auth import user_cache
+from app.leaderboard import top_cache
+
+# Маршрут -> максимум SQL-запросов (с учётом аутентификации)
+BUDGETS: Dict[str, int] = {
+    # INSERT пользователя и INSERT жизней в одной транзакции
+    "POST /api/auth/register": 2,
+    "POST /api/auth/login": 1,
+    "GET /api/auth/me": 1,
+    "GET /api/users/profile": 1,
+    "PUT /api/users/profile": 4,
+    "POST /api/users/upload-avatar": 2,
+    "GET /api/lives/my-lives": 2,
+    "POST /api/lives/use-life": 2,
+    "GET /api/topics/": 0,
+    "GET /api/progress": 2,
+    "GET /api/progress/{slug}": 2,
+    # Прохождение урока: upsert прогресса и счётчики рейтинга (счёт + две корзины)
+    "POST /api/progress/{slug}/lesson/{n}": 5,
+    "GET /api/content/{topic}/lessons/{n}": 0,
+    "GET /api/leaderboard": 3,
+    "GET /api/leaderboard/me": 5,
+    # События пишутся фоновой задачей, на запрос — только аутентификация
+    "POST /api/events": 1,
+    # Аутентификация и UPDATE версии токена
+    "POST /api/auth/logout-all": 2,
+}
+
+
+def avatar_png() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), (200, 120, 40)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class Journey:
+    """Шаги пути ученика: (маршрут из BUDGETS, метод, URL, параметры запроса)"""
+
+    def __init__(self):
+        name = f"budget_{uuid.uuid4().hex[:10]}"
+        self.name = name
+        self.user = {"email": f"{name}@example.com", "username": name, "full_name": name, "password": "budget"}
+        self.headers = {}
+
+    def steps(self):
+        auth = self.headers
+        yield "POST /api/auth/register", "POST", "/api/auth/register", {"json": self.user}
+        yield "POST /api/auth/login", "POST", "/api/auth/login", {
+            "json": {"email": self.user["email"], "password": self.user["password"]}}
+        yield "GET /api/auth/me", "GET", "/api/auth/me", {"headers": auth}
+        yield "GET /api/users/profile", "GET", "/api/users/profile", {"headers": auth}
+        yield "PUT /api/users/profile", "PUT", "/api/users/profile", {
+            "headers": auth, "json": {"full_name": "Budget", "username": f"{self.name}_x"}}
+        yield "POST /api/users/upload-avatar", "POST", "/api/users/upload-avatar", {
+            "headers": auth, "files": {"file": ("avatar.png", avatar_png(), "image/png")}}
+        yield "GET /api/lives/my-lives", "GET", "/api/lives/my-lives", {"headers": auth}
+        yield "POST /api/lives/use-life", "POST", "/api/lives/use-life", {"headers": auth}
+        yield "GET /api/topics/", "GET", "/api/topics/", {}
+        yield "POST /api/progress/{slug}/lesson/{n}", "POST", "/api/progress/rent/lesson/1", {
+            "headers": auth, "json": {"status": "completed"}}
+        # Второй урок: пользователь уже в рейтинге и переходит между корзинами
+        yield "POST /api/progress/{slug}/lesson/{n}", "POST", "/api/progress/rent/lesson/2", {
+            "headers": auth, "json": {"status": "completed"}}
+        yield "GET /api/progress", "GET", "/api/progress", {"headers": auth}
+        yield "GET /api/progress/{slug}", "GET", "/api/progress/rent", {"headers": auth}
+        yield "GET /api/content/{topic}/lessons/{n}", "GET", "/api/content/rent/lessons/3", {}
+        yield "GET /api/leaderboard", "GET", "/api/leaderboard", {"headers": auth, "params": {"period": "all"}}
+        yield "GET /api/leaderboard/me", "GET", "/api/leaderboard/me", {"headers": auth, "params": {"period": "all"}}
+        yield "POST /api/events", "POST", "/api/events", {"headers": auth, "json": {"events": [
+            {"type": "task_answered", "topic_slug": "rent", "lesson_number": 1, "task_number": 1,
+             "payload": {"correct": True}}]}}
+        # Последним: после отзыва токен пользователя больше не действует
+        yield "POST /api/auth/logout-all", "POST", "/api/auth/logout-all", {"headers": auth}
+
+
+@pytest.fixture(scope="module")
+def journey_queries(client, count_queries) -> Dict[str, List[dict]]:
+    """Маршрут -> прогоны: код ответа и выполненный SQL"""
+    # Прогон без учёта: темы создаются, каталоги загружаются — дальше
+    # измеряется установившийся режим
+    warmup = Journey()
+    for route, method, url, kwargs in warmup.steps():
+        response = client.request(method, url, **kwargs)
+        if route == "POST /api/auth/login" and response.status_code == 200:
+            warmup.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+    runs: Dict[str, List[dict]] = {}
+    journey = Journey()
+    for route, method, url, kwargs in journey.steps():
+        # Худший случай: пользователь по токену загружается из БД
+        user_cache.clear()
+        top_cache.clear()
+        with count_queries() as statements:
+            response = client.request(method, url, **kwargs)
+        if route == "POST /api/auth/login" and response.status_code == 200:
+            journey.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+        runs.setdefault(route, []).append(
+            {"status": response.status_code, "body": response.text[:200], "statements": list(statements)}
+        )
+    return runs
+
+
+@pytest.mark.parametrize("route", list(BUDGETS))
+def test_route_within_query_budget(route, journey_queries):
+    budget = BUDGETS[route]
+    assert route in journey_queries, f"{route} не пройден в Journey.steps()"
+    for run in journey_queries[route]:
+        assert run["status"] < 400, f"{route}: HTTP {run['status']} {run['body']}"
+        statements = run["statements"]
+        sql = "\n".join(f"    {number}. {statement[:300]}" for number, statement in enumerate(statements, 1))
+        assert len(statements) <= budget, f"{route}: {len(statements)} SQL при бюджете {budget}\n{sql}"
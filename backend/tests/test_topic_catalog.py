@@ -0,0 +1,21 @@
+"""Каталог тем: сброс во время загрузки не теряется."""
+from sqlalchemy import event
+
+from app.database import SessionLocal
+from app.topic_catalog import TopicCatalog
+
+
+def test_invalidate_during_load_keeps_catalog_stale(application):
+    catalog = TopicCatalog(ttl=300)
+    with SessionLocal() as db:
+        # Другой запрос создаёт тему и сбрасывает каталог, пока идёт SELECT
+        @event.listens_for(db, "do_orm_execute")
+        def invalidate_mid_load(state):
+            catalog.invalidate()
+
+        catalog.load(db)
+        assert catalog._fresh() is None
+
+        event.remove(db, "do_orm_execute", invalidate_mid_load)
+        catalog.load(db)
+        assert catalog._fresh() is not None
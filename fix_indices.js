@@ -1,79 +0,0 @@
-// Скрипт для проверки и исправления индексов в заданиях
-
-const tasks = {
-  8: {
-    text: '«Срочно продаю 3-комнатную квартиру с видом на реку. Просторная гостиная, раздельные комнаты, свежий ремонт. Цена снижена до 3 000 000 ₽, только при быстрой сделке. Возможен показ после внесения аванса 50 000 ₽ — для подтверждения серьёзности намерений. Все документы в порядке, оригиналы на регистрации, предоставлю копии. Собственник надёжный, работаем через доверенное лицо. Квартира свободна, подходит под ипотеку. Успейте забронировать, предложение ограничено!»',
-    highlights: [
-      { id: 1, text: 'Цена снижена' },
-      { id: 2, text: 'только при быстрой сделке' },
-      { id: 3, text: 'показ после внесения аванса' },
-      { id: 4, text: 'для подтверждения серьёзности намерений' },
-      { id: 5, text: 'оригиналы на регистрации' },
-      { id: 6, text: 'Успейте забронировать, предложение ограничено' }
-    ]
-  },
-  9: {
-    text: '«Продаётся 1-комнатная квартира в спальном районе. Тихие соседи, рядом магазины, детский сад и транспорт. Все документы заверены и находятся у нотариуса, сделка проводится быстро. Оригиналы сейчас в другом городе, но есть копии — покажу при встрече. При желании можем оформить через знакомого нотариуса, недорого и без проволочек. Осмотр возможен по предварительной договорённости.»',
-    highlights: [
-      { id: 1, text: 'заверены и находятся у нотариуса' },
-      { id: 2, text: 'сделка проводится быстро' },
-      { id: 3, text: 'Оригиналы сейчас в другом городе, но есть копии' },
-      { id: 4, text: 'покажу при встрече' },
-      { id: 5, text: 'через знакомого нотариуса, недорого и без проволочек' },
-      { id: 6, text: 'Осмотр возможен по предварительной договорённости' }
-    ]
-  },
-  10: {
-    text: '«Продаётся уютная 2-комнатная квартира 58 м² в кирпичном доме 1995 года постройки. Квартира чистая, тёплая, в хорошем состоянии: косметический ремонт, стеклопакеты, заменены трубы. Собственник один, в собственности более 5 лет. Выписка ЕГРН и паспорт — при встрече. Осмотр возможен по выходным, торг уместен после просмотра. Тихий двор, рядом школа, магазины, остановка. Подходит под ипотеку, без обременений.»',
-    highlights: [
-      { id: 1, text: 'при встрече' },
-      { id: 2, text: 'Осмотр возможен по выходным' },
-      { id: 3, text: 'Подходит под ипотеку' }
-    ]
-  },
-  11: {
-    text: '«Продаётся элитная 4-комнатная квартира 130 м² с панорамным остеклением и дизайнерским ремонтом. Квартира полностью укомплектована техникой и мебелью. Документы готовы, покажем по запросу после внесения брони. Работаем по доверенности от собственника, оформление у нотариуса. Уникальное предложение для тех, кто ценит комфорт и престиж!»',
-    highlights: [
-      { id: 1, text: 'Квартира полностью укомплектована техникой и мебелью. Документы готовы' },
-      { id: 2, text: 'покажем по запросу после внесения брони' },
-      { id: 3, text: 'Работаем по доверенности от собственника' },
-      { id: 4, text: 'оформление у нотариуса' }
-    ]
-  },
-  12: {
-    text: '«Продаётся 1-комнатная квартира площадью 35 м² с просторной кухней 20 м² и потолками 4 м. Квартира идеально подойдёт под сдачу в аренду. Все замеры производились вручную, поэтому возможны незначительные расхождения. Адрес на карте указан верно, но дом пока не отображается в сервисах — новостройка без регистрации. Документы предоставим на сделке, оформление быстрое.»',
-    highlights: [
-      { id: 1, text: 'производились вручную' },
-      { id: 2, text: 'возможны незначительные расхождения' },
-      { id: 3, text: 'пока не отображается в сервисах — новостройка без регистрации' },
-      { id: 4, text: 'Документы предоставим на сделке' }
-    ]
-  },
-  13: {
-    text: '«Продаётся студия 22 м² после капитального ремонта, с индивидуальным отоплением. Чистая, светлая, окна на юг, тихий двор. Собственник один, без обременений. Все документы в порядке, покажу оригиналы при встрече. Подходит под ипотеку. Осмотр по договорённости, возможен торг при реальном интересе. Отличный вариант для студентов и тех, кто ищет небольшое жильё без лишних хлопот.»',
-    highlights: [
-      { id: 1, text: 'Собственник один' },
-      { id: 2, text: 'покажу оригиналы при встрече' },
-      { id: 3, text: 'Осмотр по договорённости' },
-      { id: 4, text: 'возможен торг при реальном интересе' }
-    ]
-  },
-  14: {
-    text: '«Продаётся 3-комнатная квартира 80 м², вторичка, один собственник, без обременений. Дом кирпичный, тёплый, рядом школа и парк. Выписка ЕГРН и коммунальные чеки предоставляются при осмотре. Осмотр по договорённости, торг уместен. Расчёт через нотариуса или банк, наличные не принимаем. Отличный вариант для семьи, всё готово к заселению.»',
-    highlights: [
-      { id: 1, text: 'чеки предоставляются при осмотре' },
-      { id: 2, text: 'Расчёт через нотариуса или банк, наличные не принимаем' }
-    ]
-  }
-};
-
-Object.keys(tasks).forEach(taskNum => {
-  const task = tasks[taskNum];
-  console.log(`\n=== Задание ${taskNum} ===`);
-  task.highlights.forEach(highlight => {
-    const startIndex = task.text.indexOf(highlight.text);
-    const endIndex = startIndex + highlight.text.length;
-    console.log(`{ id: ${highlight.id}, text: '${highlight.text}', startIndex: ${startIndex}, endIndex: ${endIndex} }`);
-  });
-});
-
@@ -47,7 +47,7 @@ const Navbar = () => {
                 >
                   {user?.avatar_url ? (
                     <img 
-                      src={user.avatar_url} 
+                      src={user.avatar_url.replace(/_256\.webp$/, '_64.webp')} 
                       alt="Аватар" 
                       style={{ width: '100%', height: '100%', borderRadius: '50%' }}
                     />
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useAuth } from '../contexts/AuthContext';
-import { livesAPI, progressAPI } from '../services/api';
+import { livesAPI, progressAPI, liveAPI } from '../services/api';
 import { useNavigate, Link } from 'react-router-dom';
 import { Settings, User, Eye, EyeOff } from 'lucide-react';
 import HoneycombDecoration from '../components/HoneycombDecoration';
@@ -15,9 +15,9 @@ const Dashboard = () => {
   const { user } = useAuth();
   const [lives, setLives] = useState(null);
   const [loading, setLoading] = useState(true);
-  // Прогресс тем из API - хуки должны быть объявлены до любого условного возврата
-  const [jobProgress, setJobProgress] = useState({ current: 0, total: 11, percent: 0 });
-  const [rentProgress, setRentProgress] = useState({ current: 0, total: 11, percent: 0 });
+  // Статусы уроков тем из API ({rent: {1: 'completed', 2: 'active'}, ...}) -
+  // хуки должны быть объявлены до любого условного возврата
+  const [lessonStatuses, setLessonStatuses] = useState({ job: {}, rent: {} });
   const navigate = useNavigate();
   const [showRegisterModal, setShowRegisterModal] = useState(false);
   const [showLoginModal, setShowLoginModal] = useState(false);
@@ -35,31 +35,53 @@ const Dashboard = () => {
 
   const fetchTopicsProgress = async () => {
     try {
-      const [jobRes, rentRes] = await Promise.all([
-        progressAPI.getByTopic('job'),
-        progressAPI.getByTopic('rent'),
-      ]);
-
-      const calc = (items, topic) => {
-        // Для rent есть 5 уроков (1, 2, 3, 4, 5), для job пока нет уроков
-        const total = topic === 'rent' ? 5 : 0;
-        const current = items?.data?.items?.filter(i => i.status === 'completed').length || 0;
-        const percent = total > 0 ? (current / total) * 100 : 0;
-        return { current, total, percent };
-      };
-      setJobProgress(calc(jobRes, 'job'));
-      setRentProgress(calc(rentRes, 'rent'));
+      // Один запрос на прогресс всех тем
+      const res = await progressAPI.getAll(['job', 'rent']);
+      const topics = res.data?.topics || {};
+      const statuses = (items) =>
+        Object.fromEntries((items || []).map(i => [i.lesson_number, i.status]));
+      setLessonStatuses({ job: statuses(topics.job), rent: statuses(topics.rent) });
     } catch (e) {
       console.warn('Не удалось загрузить прогресс тем');
     }
   };
 
+  const calc = (topic) => {
+    // Для rent есть 5 уроков (1, 2, 3, 4, 5), для job пока нет уроков
+    const total = topic === 'rent' ? 5 : 0;
+    const current = Object.values(lessonStatuses[topic]).filter(status => status === 'completed').length;
+    const percent = total > 0 ? (current / total) * 100 : 0;
+    return { current, total, percent };
+  };
+  const jobProgress = calc('job');
+  const rentProgress = calc('rent');
+
   useEffect(() => {
     fetchLives();
     // Подгружаем прогресс тем для прогресс-баров
     fetchTopicsProgress();
   }, []);
 
+  // Изменения из других вкладок и устройств приходят потоком, без перезапроса
+  useEffect(() => {
+    if (!user?.id) return undefined;
+    return liveAPI.subscribe((event) => {
+      if (event.type === 'lives') {
+        setLives(prev => prev && { ...prev, current_lives: event.current_lives, max_lives: event.max_lives });
+      } else if (event.type === 'progress') {
+        setLessonStatuses(prev => {
+          if (!prev[event.topic_slug]) return prev;
+          const lessons = { ...prev[event.topic_slug] };
+          event.lessons.forEach(l => { lessons[l.lesson_number] = l.status; });
+          return { ...prev, [event.topic_slug]: lessons };
+        });
+      } else if (event.type === 'resync') {
+        fetchLives();
+        fetchTopicsProgress();
+      }
+    });
+  }, [user?.id]);
+
   const handleStartCourse = () => {
     if (!user) {
       // Если пользователь не авторизован, показываем форму регистрации
@@ -4,7 +4,7 @@ import { Settings, User, ArrowLeft, ArrowRight } from 'lucide-react';
 import toast from 'react-hot-toast';
 import './Lesson.css';
 import './LessonPage.css';
-import { progressAPI } from '../services/api';
+import { progressAPI, contentAPI, eventsAPI } from '../services/api';
 
 const Lesson = () => {
   const { topic, lessonNumber } = useParams();
@@ -14,12 +14,31 @@ const Lesson = () => {
   const [lessonStatus, setLessonStatus] = useState(null);
   const [isCheckingAccess, setIsCheckingAccess] = useState(true);
   const [allTasksCompleted, setAllTasksCompleted] = useState(false);
+  const [lesson, setLesson] = useState(null);
+  const [isLessonLoading, setIsLessonLoading] = useState(true);
 
   // Прокрутка вверх при изменении урока
   useEffect(() => {
     window.scrollTo({ top: 0, behavior: 'smooth' });
   }, [lessonNumber]);
 
+  // Загрузка контента урока
+  useEffect(() => {
+    const loadLesson = async () => {
+      setIsLessonLoading(true);
+      try {
+        const res = await contentAPI.getLesson(topic, lessonNum);
+        setLesson(res.data);
+        eventsAPI.send([{ type: 'lesson_opened', topic_slug: topic, lesson_number: lessonNum }]);
+      } catch (error) {
+        setLesson(null);
+      } finally {
+        setIsLessonLoading(false);
+      }
+    };
+    loadLesson();
+  }, [topic, lessonNum]);
+
   // Проверка доступности урока
   useEffect(() => {
     const checkLessonAccess = async () => {
@@ -126,28 +145,16 @@ const Lesson = () => {
     checkLessonAccess();
   }, [topic, lessonNum, navigate]);
 
-  // Проверяем, есть ли следующий урок (проверяем реальное существование контента)
-  const hasNextLesson = () => {
-    if (topic === 'rent') {
-      // Проверяем существующие уроки для rent
-      const existingLessons = [1, 2, 3, 4, 5]; // Список существующих уроков
-      return existingLessons.includes(lessonNum + 1);
-    }
-    return false;
-  };
+  // Проверяем, есть ли следующий урок
+  const hasNextLesson = () => Boolean(lesson && lesson.next_lesson);
 
   // Проверяем, есть ли задания для урока
-  const hasTasks = () => {
-    if (topic === 'rent') {
-      // Уроки 3, 4 и 5 имеют задания
-      return lessonNum === 3 || lessonNum === 4 || lessonNum === 5;
-    }
-    return false;
-  };
+  const hasTasks = () => Boolean(lesson && lesson.tasks.length > 0);
 
   // Проверяем, все ли задания урока выполнены
   useEffect(() => {
     const checkAllTasksCompleted = async () => {
+      if (isLessonLoading) return;
       if (!hasTasks()) {
         // Если у урока нет заданий, считаем что все "выполнено"
         setAllTasksCompleted(true);
@@ -172,7 +179,7 @@ const Lesson = () => {
     };
 
     checkAllTasksCompleted();
-  }, [topic, lessonNum]);
+  }, [topic, lessonNum, lesson, isLessonLoading]);
 
   // Обработка завершения урока
   const handleCompleteLesson = async (nextAction = 'next') => {
@@ -221,22 +228,11 @@ const Lesson = () => {
 
   // Получаем контент урока
   const getLessonContent = () => {
-    if (topic === 'rent' && lessonNum === 1) {
-      return getRentLesson1Content();
-    }
-    if (topic === 'rent' && lessonNum === 2) {
-      return getRentLesson2Content();
+    if (!lesson) {
+      return <div>Урок находится в разработке</div>;
     }
-    if (topic === 'rent' && lessonNum === 3) {
-      return getRentLesson3Content();
-    }
-    if (topic === 'rent' && lessonNum === 4) {
-      return getRentLesson4Content();
-    }
-    if (topic === 'rent' && lessonNum === 5) {
-      return getRentLesson5Content();
-    }
-    return <div>Урок находится в разработке</div>;
+    // HTML урока хранится на backend вместе с остальным контентом
+    return <div dangerouslySetInnerHTML={{ __html: lesson.body_html }} />;
   };
 
   return (
@@ -276,7 +272,7 @@ const Lesson = () => {
 
         {/* Основной контент */}
         <div className="lesson-content">
-          {isCheckingAccess ? (
+          {isCheckingAccess || isLessonLoading ? (
             <div style={{ padding: '100px 20px', textAlign: 'center' }}>
               Загрузка...
             </div>
@@ -340,458 +336,4 @@ const Lesson = () => {
   );
 };
 
-// Контент первого урока по съему квартиры
-const getRentLesson1Content = () => {
-  return (
-    <>
-      <h1>Поиск жилища</h1>
-      
-      <p>
-        Поиск жилья — одно из первых серьёзных решений во взрослой жизни. От того, насколько внимательно вы подойдёте к выбору квартиры и заключению договора, зависит не только ваш комфорт, но и безопасность. Мошенники, скрытые условия и устные обещания — частые ловушки для тех, кто снимает жильё впервые.
-      </p>
-
-      <p>
-        Ниже представлены общие правила и советы, тот самый базовый минимум, что нужно сделать перед подписание договора об аренде.
-      </p>
-
-      <h2>1. Подготовка и поиск</h2>
-      
-      <ul>
-        <li>Определите бюджет аренды — не более 30% дохода.</li>
-        <li>Сразу решите, какие условия важны: район, транспорт, наличие мебели, техника, интернет.</li>
-        <li>Проверяйте агрегаторы с проверенными объявлениями: <a href="https://www.cian.ru" target="_blank" rel="noopener noreferrer">Циан</a>, <a href="https://www.avito.ru" target="_blank" rel="noopener noreferrer">Авито</a>, <a href="https://realty.yandex.ru" target="_blank" rel="noopener noreferrer">Яндекс.Недвижимость</a>.</li>
-        <li>Осторожно относитесь к объявлениям с подозрительно низкой ценой или без фото реальной квартиры — вероятен фейк или мошенник.</li>
-      </ul>
-
-      <h2>2. Связь с арендодателем</h2>
-      
-      <ul>
-        <li>Задавайте вопросы заранее: кто собственник, есть ли посредник, входит ли коммуналка.</li>
-        <li>Не переводите деньги до осмотра.</li>
-        <li>Запрашивайте паспортные данные владельца и документы на квартиру (выписка из ЕГРН).</li>
-      </ul>
-
-      <h2>3. Осмотр квартиры</h2>
-      
-      <p>Проверяйте всё своими руками:</p>
-      
-      <ol>
-        <li>Водопровод, кран, сантехника, свет, розетки.</li>
-        <li>Окна, двери, замки, вентиляция.</li>
-        <li>Плиту, холодильник, стиралку.</li>
-      </ol>
-
-      <ul>
-        <li>Обратите внимание на соседей, запахи, шум, состояние подъезда.</li>
-        <li>Составьте чек-лист осмотра, чтобы ничего не забыть.</li>
-      </ul>
-
-      <h2>4. Проверка документов</h2>
-      
-      <ul>
-        <li>Убедитесь, что договор подписывает именно собственник, а не «знакомый».</li>
-        <li>Проверьте выписку из Росреестра (ЕГРН) — можно заказать онлайн.</li>
-        <li>Если сдаёт по доверенности — проверьте срок действия и нотариальное заверение.</li>
-      </ul>
-
-      <h2>5. Договор аренды</h2>
-      
-      <p>Подписывайте договор найма (если физлицо) или аренды (если юрлицо).</p>
-      
-      <p>Важно указать:</p>
-      
-      <ol>
-        <li>срок и стоимость аренды;</li>
-        <li>кто оплачивает коммунальные услуги;</li>
-        <li>условия возврата залога;</li>
-        <li>порядок досрочного расторжения;</li>
-        <li>ответственность сторон.</li>
-      </ol>
-
-      <p>Составьте акт приёма-передачи: зафиксируйте состояние квартиры, мебели и техники, показания счётчиков.</p>
-
-      <h2>6. Финансовые вопросы</h2>
-      
-      <ul>
-        <li>Обычно требуется залог = 1 месяц аренды, возвращается при съезде, если нет повреждений.</li>
-        <li>Не отдавайте деньги без подписанного договора и акта.</li>
-        <li>Если есть агент — оплачивайте услуги после подписания договора.</li>
-      </ul>
-
-      <h2>7. Безопасность и мошенники</h2>
-      
-      <ul>
-        <li>Никогда не переводите предоплату за «бронирование» или «показ» квартиры.</li>
-        <li>Не подписывайте договор с неизвестными посредниками.</li>
-        <li>Проверяйте ФИО арендодателя, адрес и реквизиты.</li>
-      </ul>
-
-      <h2>8. При съезде</h2>
-      
-      <ul>
-        <li>Сделайте новый акт возврата квартиры с фиксированием состояния и счётчиков.</li>
-        <li>Только после этого передавайте ключи и получайте возврат залога.</li>
-      </ul>
-    </>
-  );
-};
-
-// Контент второго урока по съему квартиры
-const getRentLesson2Content = () => {
-  return (
-    <>
-      <h1>Вопрос – копейку бережет</h1>
-      
-      <p>
-        Вопросы, которые нужно задать арендодателю
-      </p>
-
-      <h2>1. Вопросы про саму квартиру</h2>
-      
-      <ul>
-        <li>Сколько лет сдаётся квартира? — понять, не «тестовая» ли это сдача.</li>
-        <li>Можно ли проживать с детьми / животными?</li>
-        <li>Что входит в квартиру? — мебель, техника, посуда, интернет.</li>
-        <li>Работает ли техника? — проверить плиту, стиралку, холодильник.</li>
-        <li>Кто платит за мелкий ремонт, если что-то сломается?</li>
-        <li>Можно ли делать перестановку или вешать полки/картины?</li>
-        <li>Кто ваши соседи? — узнать об окружении и шуме.</li>
-      </ul>
-
-      <h2>2. Вопросы про оплату и залог</h2>
-      
-      <ul>
-        <li>Какая стоимость аренды и входит ли в неё коммуналка?</li>
-        <li>Кто оплачивает счётчики (свет, вода, газ, интернет)?</li>
-        <li>Есть ли залог (депозит)? Как и когда он возвращается?</li>
-        <li>Принимаете ли оплату по безналу или только наличными?</li>
-        <li>Когда нужно вносить оплату — до или после месяца проживания?</li>
-      </ul>
-
-      <h2>3. Вопросы про документы и юридическую чистоту</h2>
-      
-      <ul>
-        <li>Квартира ваша? Можно увидеть документ, подтверждающий собственность (ЕГРН, свидетельство)?</li>
-        <li>Если сдаёте по доверенности — можно посмотреть доверенность?</li>
-        <li>Договор будет оформлен официально?</li>
-        <li>Можно ли включить пункт о возврате залога и срок расторжения?</li>
-        <li>Будет ли составлен акт приёма-передачи квартиры и имущества?</li>
-      </ul>
-
-      <h2>4. Вопросы про сроки и условия проживания</h2>
-      
-      <ul>
-        <li>На какой срок вы готовы заключить договор?</li>
-        <li>Можно ли продлить договор после окончания срока?</li>
-        <li>Как нужно уведомить вас, если я захочу съехать раньше?</li>
-        <li>Как часто вы планируете приезжать в квартиру? (по закону — только по договорённости).</li>
-        <li>Сколько комплектов ключей вы дадите?</li>
-      </ul>
-
-      <h2>5. Вопросы, которые помогут выявить мошенников</h2>
-      
-      <ul>
-        <li>Можно ли посмотреть квартиру лично, прежде чем вносить оплату?</li>
-        <li>Почему такая низкая цена (если ниже рыночной)?</li>
-        <li>Почему торопите с решением?</li>
-        <li>Вы собственник или агент?</li>
-        <li>Можно ли записать номер вашего паспорта в договоре?</li>
-      </ul>
-    </>
-  );
-};
-
-// Контент третьего урока по съему квартиры
-const getRentLesson3Content = () => {
-  return (
-    <>
-      <h1>Документы – базовый минимум</h1>
-      
-      <p>
-        Основные документы, которые должен показать арендодатель
-      </p>
-
-      <h2>1. Паспорт арендодателя</h2>
-      
-      <ul>
-        <li>Сверьте ФИО, дату рождения, прописку.</li>
-        <li>Проверьте, что паспорт действителен, не просрочен и не выглядит подделанным.</li>
-        <li>В договоре найма ФИО должно совпадать с паспортными данными.</li>
-      </ul>
-
-      <h2>2. Документ, подтверждающий право собственности</h2>
-      
-      <ul>
-        <li>Выписка из ЕГРН (Единый государственный реестр недвижимости) — актуальный документ.</li>
-        <li>Проверить можно на сайте <a href="https://rosreestr.gov.ru" target="_blank" rel="noopener noreferrer">rosreestr.gov.ru</a></li>
-      </ul>
-
-      <p>Подойдёт также:</p>
-      
-      <ul>
-        <li>Договор купли-продажи,</li>
-        <li>Свидетельство о праве собственности (старого образца),</li>
-        <li>Договор дарения,</li>
-        <li>Нотариальное свидетельство о вступлении в наследство (Важно: ФИО в этом документе должно совпадать с паспортом арендодателя.)</li>
-      </ul>
-
-      <h2>3. Доверенность (если сдаёт не собственник)</h2>
-      
-      <p>Если квартиру показывает и сдаёт не сам владелец, требуйте:</p>
-      
-      <ul>
-        <li>Нотариально заверенную доверенность с правом сдачи в аренду;</li>
-        <li>Срок действия доверенности должен быть действующим;</li>
-        <li>ФИО доверенного лица в договоре должны совпадать с доверенностью.</li>
-        <li>Сфотографируйте доверенность или перепишите реквизиты.</li>
-      </ul>
-
-      <h2>4. Выписка о зарегистрированных жильцах</h2>
-      
-      <p>
-        В ЖЭУ, МФЦ или через Госуслуги можно получить выписку о лицах, зарегистрированных в квартире. (Важно: убедитесь, что никто не прописан, особенно несовершеннолетние — иначе возможны юридические проблемы при выселении.)
-      </p>
-
-      <h2>5. Счётчики и квитанции</h2>
-      
-      <ul>
-        <li>Запросите последние квитанции по коммунальным услугам: свет, вода, газ, интернет.</li>
-        <li>Проверьте, что:</li>
-      </ul>
-      
-      <ul>
-        <li>нет долгов,</li>
-        <li>показания счётчиков реальные,</li>
-        <li>указаны те же ФИО и адрес.</li>
-      </ul>
-
-      <h2>6. Акт приёма-передачи квартиры и имущества</h2>
-      
-      <p>
-        составляется при подписании договора.
-      </p>
-
-      <p>Указывается:</p>
-      
-      <ul>
-        <li>состояние квартиры,</li>
-        <li>список мебели и техники,</li>
-        <li>показания счётчиков,</li>
-        <li>количество ключей.</li>
-      </ul>
-
-      <p>Подписывается обеими сторонами.</p>
-
-      <h2>Признаки, что что-то не так и нужно быть осторожным</h2>
-      
-      <ul>
-        <li>Арендодатель уклоняется от показа документов.</li>
-        <li>Отказывается заключать письменный договор.</li>
-        <li>Настойчиво просит залог или предоплату до подписания бумаг.</li>
-      </ul>
-    </>
-  );
-};
-
-// Контент четвертого урока по съему квартиры
-const getRentLesson4Content = () => {
-  return (
-    <>
-      <h1>За что уплачено</h1>
-      
-      <p>
-        Что арендодатель обязан оплачивать по закону, а что – перекладывать на него нельзя (даже если это пытаются прописать в договоре)
-      </p>
-
-      <p>
-        Все пункты соответствуют Гражданскому кодексу РФ (ст. 676–681, 682, 683, 687) и Жилищному кодексу РФ.
-      </p>
-
-      <h2>1. Что обязан оплачивать съёмщик (арендатор)</h2>
-
-      <h3>1.1. Арендная плата</h3>
-      
-      <ul>
-        <li>Это основное обязательство арендатора — сумма и периодичность (ежемесячно) должны быть прописаны в договоре.</li>
-        <li>Можно платить наличными, на карту, через банк или по договору.</li>
-      </ul>
-
-      <h3>1.2. Коммунальные услуги по фактическому потреблению</h3>
-      
-      <ul>
-        <li>Вода, газ, электричество, отопление, интернет, вывоз мусора и т.п.</li>
-        <li>Если установлены счётчики — платёж рассчитывается по их показаниям.</li>
-        <li>Эти расходы можно разделить:</li>
-      </ul>
-
-      <ol>
-        <li>либо арендатор платит напрямую по квитанциям,</li>
-        <li>либо компенсирует собственнику по чекам.</li>
-      </ol>
-
-      <p>
-        <strong>Ссылка:</strong> ст. 678 ГК РФ — «Арендатор обязан своевременно вносить плату за жилое помещение и коммунальные услуги, если иное не установлено договором».
-      </p>
-
-      <h3>1.3. Текущий мелкий ремонт</h3>
-      
-      <ul>
-        <li>Сюда относятся небольшие расходы по содержанию жилья, вызванные нормальным использованием:</li>
-      </ul>
-
-      <ol>
-        <li>замена лампочек,</li>
-        <li>прокладка прокладок в кране,</li>
-        <li>ремонт дверных ручек,</li>
-        <li>чистка сифона, мелкий ремонт мебели.</li>
-      </ol>
-
-      <p>
-        <strong>Ссылка:</strong> ст. 681 ГК РФ — арендатор несёт расходы на текущий ремонт, если договором не предусмотрено иное.
-      </p>
-
-      <h2>2. Что съёмщик не обязан оплачивать</h2>
-
-      <h3>2.1. Капитальный ремонт квартиры и оборудования</h3>
-      
-      <ul>
-        <li>Замена электропроводки, батарей, окон, сантехники, плитки, полов, дверей.</li>
-      </ul>
-
-      <p>
-        Даже если договором пытаются «переложить» эти затраты — условие будет ничтожным, т.к. нарушает баланс прав сторон (ст. 16 Закона о защите прав потребителей).
-      </p>
-
-      <h3>2.2. Долги собственника за коммуналку</h3>
-      
-      <ul>
-        <li>Если до вас владелец не платил за ЖКХ — вы не обязаны погашать эти долги.</li>
-        <li>Все задолженности по лицевым счетам до даты вашего въезда — ответственность арендодателя.</li>
-      </ul>
-
-      <h3>2.3. Страховка жилья или налоги</h3>
-      
-      <ul>
-        <li>Арендодатель сам платит налог с дохода от аренды (13% НДФЛ).</li>
-      </ul>
-
-      <h3>2.4. Оплата ремонта, вызванного износом техники</h3>
-      
-      <ul>
-        <li>Если холодильник или бойлер сломался по естественному износу, а не по вашей вине — ремонт или замена за счёт арендодателя.</li>
-        <li>Вы обязаны оплатить ремонт только если поломка по вашей вине (небрежность, неправильное использование).</li>
-      </ul>
-
-      <h3>2.5. Уборка, покраска или косметика перед выездом</h3>
-      
-      <ul>
-        <li>Некоторые владельцы требуют «вернуть в первозданный вид» — это незаконно.</li>
-        <li>Вы обязаны вернуть квартиру в том состоянии, в каком приняли, с учётом нормального износа (ст. 678 ГК РФ).</li>
-        <li>Если были дефекты при въезде, они должны быть зафиксированы в акте приёма-передачи.</li>
-      </ul>
-
-      <h2>3. Ситуации, где часто вводят в заблуждение</h2>
-
-      <table>
-        <thead>
-          <tr>
-            <th>Что пишут в договоре</th>
-            <th>Как по закону</th>
-          </tr>
-        </thead>
-        <tbody>
-          <tr>
-            <td>«Все коммунальные платежи оплачивает арендатор, включая капитальный ремонт»</td>
-            <td>Незаконно — капитальный ремонт оплачивает только собственник жилья.</td>
-          </tr>
-          <tr>
-            <td>«Залог не возвращается, если арендодатель не доволен состоянием квартиры»</td>
-            <td>Незаконно — без составления акта осмотра это невозможно доказать.</td>
-          </tr>
-          <tr>
-            <td>«Арендатор оплачивает услуги сантехника, если что-то течёт»</td>
-            <td>Допустимо, но только если поломка произошла по вине арендатора.</td>
-          </tr>
-          <tr>
-            <td>«Платить за замену бытовой техники»</td>
-            <td>Незаконно — ремонт и замена техники лежат на ответственности владельца.</td>
-          </tr>
-          <tr>
-            <td>«Комиссия агенту 100%, даже если отказался после просмотра»</td>
-            <td>Незаконно — комиссия агенту выплачивается только при заключении сделки.</td>
-          </tr>
-        </tbody>
-      </table>
-
-      <h2>4. Как правильно зафиксировать обязанности в договоре</h2>
-      
-      <p>
-        В разделе «Порядок расчётов и расходов» пропишите:
-      </p>
-
-      <ul>
-        <li>«Арендатор оплачивает ежемесячную арендную плату и коммунальные услуги по счётчикам».</li>
-        <li>«Арендодатель обязуется проводить капитальный ремонт и замену оборудования при естественном износе».</li>
-        <li>«Расходы по текущему ремонту мелких неисправностей несёт арендатор».</li>
-        <li>«При наличии долгов по ЖКХ на момент заселения ответственность несёт арендодатель».</li>
-      </ul>
-    </>
-  );
-};
-
-// Контент пятого урока по съему квартиры
-const getRentLesson5Content = () => {
-  return (
-    <>
-      <h1>Твои права</h1>
-      
-      <p>
-        Что требовать до любой предоплаты – минимально необходимое документы/действия
-      </p>
-
-      <ul>
-        <li>Подписанный письменный договор аренды с полными реквизитами сторон.</li>
-        <li>Акт приёма-передачи с перечнем имущества и показаниями счётчиков (подписанный обеими сторонами).</li>
-        <li>Паспорт лица, которое подписывает договор; выписка ЕГРН собственника (или нотариальная доверенность, если сдаёт не собственник).</li>
-        <li>Платёж — только на указанный в договоре расчётный счёт или через банковский перевод на реквизиты, указанные в договоре (не «на карту друга» без обоснования).</li>
-        <li>Видеозвонок/видео прогулка по квартире в реальном времени перед оплатой; фотографии с датой/временем.</li>
-        <li>Указание точного адреса и возможности регистрации (если нужна прописка).</li>
-      </ul>
-
-      <h2>Практические фразы</h2>
-
-      <h3>Перед осмотром:</h3>
-      
-      <p>
-        «Покажите, пожалуйста, паспорт и документ о праве собственности (выписка ЕГРН) или нотариальную доверенность. Без этих документов я осмотр не запланирую.»
-      </p>
-
-      <h3>Про оплату:</h3>
-      
-      <p>
-        «Я готов(а) внести предоплату после подписания договора и акта приёма-передачи. Перевод будет на реквизиты, указанные в договоре.»
-      </p>
-
-      <h3>При настойчивом требовании перевести заранее:</h3>
-      
-      <p>
-        «Извините, без договора и акта я не буду переводить деньги — это стандартная практика.»
-      </p>
-
-      <h3>Запрос на видео-показ:</h3>
-      
-      <p>
-        «Можно видео-звонок сейчас, чтобы увидеть квартиру в реальном времени и показания счётчиков?»
-      </p>
-
-      <h3>Если предлагают «отдать ключи сейчас»:</h3>
-      
-      <p>
-        «Ключи только после подписанного договора и передачи акта — иначе это слишком рискованно.»
-      </p>
-    </>
-  );
-};
-
 export default Lesson;
-
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useAuth } from '../contexts/AuthContext';
-import { usersAPI, livesAPI } from '../services/api';
+import { usersAPI, livesAPI, liveAPI } from '../services/api';
 import { Upload, Save, BookOpen, Trophy, Clock } from 'lucide-react';
 import LivesBadge from '../components/LivesBadge';
 import toast from 'react-hot-toast';
@@ -28,6 +28,15 @@ const Profile = () => {
     fetchLives();
   }, [user]);
 
+  // Жизни, потраченные в других вкладках, приходят потоком
+  useEffect(() => liveAPI.subscribe((event) => {
+    if (event.type === 'lives') {
+      setLives(prev => prev && { ...prev, current_lives: event.current_lives, max_lives: event.max_lives });
+    } else if (event.type === 'resync') {
+      fetchLives();
+    }
+  }), []);
+
   const fetchLives = async () => {
     try {
       const response = await livesAPI.getMyLives();
@@ -4,549 +4,7 @@ import { Settings, User, ArrowLeft } from 'lucide-react';
 import toast from 'react-hot-toast';
 import './Task.css';
 import './LessonPage.css';
-import { livesAPI, progressAPI } from '../services/api';
-
-// Данные заданий для третьего урока
-const getRentLesson3Tasks = (taskNum) => {
-  const tasks = {
-    1: {
-      type: 'multiple_choice',
-      title: 'Задание 1 Прочитай фрагмент договора и определи, законно ли арендодатель может так поступать.',
-      text: 'Договор №1\n\n«Пункт 7. Прекращение действия договора\n\n7.1. Арендодатель вправе расторгнуть настоящий договор аренды в одностороннем порядке в целях обеспечения надлежащего состояния имущества и соблюдения условий пользования жилым помещением.\n\n7.2. В случае возникновения обстоятельств, требующих освобождения помещения для проведения профилактических, ремонтных либо иных технических мероприятий, Арендодатель уведомляет Арендатора в кратчайший возможный срок, в том числе с использованием устных или электронных средств связи.\n\n7.3. Арендатор обязуется освободить квартиру в течение 24 часов с момента получения соответствующего уведомления и обеспечить беспрепятственный доступ Арендодателя к помещению.\n\n7.4. Арендодатель не несёт ответственности за возможные неудобства, вызванные досрочным прекращением договора, а также не компенсирует стоимость неиспользованного периода проживания, если иное не будет согласовано сторонами отдельно.\n\n7.5. Настоящее условие направлено на обеспечение правомерного использования жилого помещения и не может рассматриваться как ущемляющее права Арендатора.\n\n7.6. Подтверждая согласие с указанными положениями, Арендатор подтверждает, что ознакомлен со всеми условиями расторжения и не имеет к Арендодателю претензий в случае досрочного прекращения договора по инициативе последнего.»',
-      answers: [
-        { id: 1, text: 'Да, если предупредил устно.' },
-        { id: 2, text: 'Нет, расторгнуть можно только с уведомлением за 3 месяца.' },
-        { id: 3, text: 'Да, если арендатор нарушил правила.' }
-      ],
-      correct_answers: [2],
-      multiple: false,
-      reference: {
-        type: 'table',
-        headers: ['Формулировка', 'Почему незаконна'],
-        rows: [
-          ['"в одностороннем порядке"', 'Нарушает ст. 687 ГК РФ — расторжение возможно только по закону и с уведомлением за 3 месяца'],
-          ['"в кратчайший возможный срок / устно"', 'Обходит требование о письменном уведомлении и трёхмесячном сроке'],
-          ['"освободить квартиру в течение 24 часов"', 'Противоречит нормам о защите прав нанимателя (ст. 687 ГК РФ)'],
-          ['"не компенсирует стоимость неиспользованного периода"', 'Нарушает ст. 1102 ГК РФ (неосновательное обогащение)'],
-          ['"не может рассматриваться как ущемляющее права арендатора"', 'Маскирует незаконные пункты под «согласие сторон»'],
-          ['"подтверждает отсутствие претензий"', 'Лишает арендатора права на защиту в суде']
-        ]
-      }
-    },
-    2: {
-      type: 'multiple_choice',
-      title: 'Задание 2 Прочитай фрагмент договора и определи, законно ли арендодатель может так поступать.',
-      text: 'Договор №2\n\n«Пункт 5. Обеспечение сохранности имущества и гарантия исполнения обязательств\n\n1.1. В целях подтверждения добросовестности исполнения обязательств Арендатор передаёт Арендодателю обеспечительный депозит в размере, эквивалентном месячной арендной плате.\n\n1.2. Депозит удерживается Арендодателем на весь срок действия настоящего договора и может быть использован для покрытия возможных расходов, связанных с восстановлением имущества, оплатой задолженности или иными обстоятельствами, возникающими по усмотрению Арендодателя.\n\n1.3. Возврат депозита осуществляется исключительно по усмотрению Арендодателя после проверки состояния квартиры и при отсутствии у него претензий к Арендатору.\n\n1.4. По согласованию сторон акт приёма-передачи имущества не составляется, так как квартира передаётся в технически исправном и надлежащем состоянии, что подтверждается визуальным осмотром Арендатора при заселении.\n\n1.5. Арендатор обязуется вернуть квартиру в том же состоянии, в каком она была получена, за исключением естественного износа, который определяется Арендодателем самостоятельно.\n\n1.6. Настоящий пункт направлен на защиту интересов обеих сторон и не является ограничением прав Арендатора.»',
-      answers: [
-        { id: 1, text: 'Нет, это нарушение закона — возврат депозита и акт передачи обязательны.' },
-        { id: 2, text: 'Да, если квартира в хорошем состоянии, акт можно не составлять.' },
-        { id: 3, text: 'Да, если стороны устно договорились, и арендатор согласился на эти условия.' },
-        { id: 4, text: 'Нет, но арендодатель может вернуть депозит, если захочет.' }
-      ],
-      correct_answers: [1],
-      multiple: false,
-      reference: {
-        type: 'table',
-        headers: ['Формулировка', 'Что нарушает', 'Почему незаконно'],
-        rows: [
-          ['«Возврат депозита осуществляется по усмотрению Арендодателя»', 'Ст. 1102 ГК РФ — неосновательное обогащение', 'Деньги, не возвращённые без законных оснований, подлежат возврату в любом случае'],
-          ['«При отсутствии претензий с его стороны»', 'Ст. 56 ГПК РФ — нельзя ставить возврат денег в зависимость от субъективного мнения', 'Претензии должны быть подтверждены документально'],
-          ['«Акт приёма-передачи не составляется»', 'Ст. 674 ГК РФ — обязательное условие договора найма жилья', 'Без акта нельзя доказать, что имущество было передано в исправном состоянии'],
-          ['«Арендодатель определяет износ самостоятельно»', 'Ст. 210, 622 ГК РФ — ответственность за износ делится по факту', 'Оценку состояния делает комиссия или обе стороны совместно'],
-          ['«Может быть использован для любых обстоятельств»', 'Нарушение принципа конкретности условий договора (ст. 432 ГК РФ)', 'Деньги могут использоваться только для покрытий, прописанных и документально подтверждённых'],
-          ['«Не является ограничением прав арендатора»', 'Маскирует ущемление прав', 'Такая формулировка не делает незаконный пункт законным']
-        ]
-      }
-    },
-    3: {
-      type: 'multiple_choice',
-      title: 'Задание 3 Прочитай фрагмент договора и определи, законно ли арендодатель может так поступать.',
-      text: 'Договор №3\n\n«Пункт 6. Финансовые обязательства сторон\n\n1.1. В случае досрочного выезда Арендатора по любым причинам он обязуется оплатить арендную плату в полном объёме до конца срока действия договора, независимо от фактического проживания и пользования квартирой.\n\n1.2. Уплаченные суммы не подлежат возврату, а внесённые авансовые платежи считаются компенсацией за нарушение условий аренды.\n\n1.3. Коммунальные платежи оплачиваются ежемесячно в двойном размере, включая авансовый расчёт за возможные будущие начисления и перерасход.\n\n1.4. Арендатор подтверждает, что ознакомлен с указанными условиями и не имеет возражений относительно порядка расчётов, предусмотренного настоящим пунктом.\n\n1.5. Данное условие направлено на обеспечение своевременного поступления платежей и защиту имущественных интересов Арендодателя.»',
-      answers: [
-        { id: 1, text: 'Нет, удержание оплаты после выезда и двойная оплата коммунальных услуг — незаконны.' },
-        { id: 2, text: 'Да, если стороны заранее согласовали эти условия.' },
-        { id: 3, text: 'Да, если арендатор подписал договор и согласился с ними.' }
-      ],
-      correct_answers: [1],
-      multiple: false,
-      reference: {
-        type: 'table',
-        headers: ['Формулировка', 'Почему незаконна'],
-        rows: [
-          ['"оплатить аренду до конца срока, независимо от фактического проживания"', 'Нарушает ст. 310 и 450 ГК РФ — одностороннее удержание средств без предоставления услуги не допускается; арендодатель может требовать оплату только за фактически использованный период'],
-          ['"уплаченные суммы не подлежат возврату"', 'Противоречит ст. 1102 ГК РФ — неосновательное обогащение, если квартира не используется'],
-          ['"коммунальные платежи оплачиваются в двойном размере"', 'Нарушает ст. 153 и 155 ЖК РФ — жильцы оплачивают коммунальные услуги только по фактическому потреблению'],
-          ['"в счёт возможных будущих начислений"', 'Противоречит принципу эквивалентности встречных обязательств — нельзя брать аванс без подтверждения услуги'],
-          ['"не имеет возражений относительно порядка расчётов"', 'Лишает арендатора права оспаривать незаконные условия в будущем (нарушает ст. 16 Закона о защите прав потребителей)']
-        ]
-      }
-    },
-    4: {
-      type: 'multiple_choice',
-      title: 'Задание 4 Прочитай фрагмент договора и определи, законно ли арендодатель может так поступать.',
-      text: 'Договор №4\n\n«Пункт 2. Основания передачи квартиры в аренду\n\n2.1. Гражданин Иванов И.И., действующий по устной договорённости с собственником жилого помещения, передаёт в аренду квартиру, расположенную по адресу: г. Москва, ул. Ленина, д. 89, кв. 119.\n\n2.2. Иванов И.И. подтверждает, что действует в интересах и с согласия собственника, который в настоящий момент отсутствует и не имеет возможности лично присутствовать при заключении договора.\n\n2.3. Доверенность от собственника не предоставляется, так как стороны находятся в доверительных отношениях и устно подтвердили согласие на сдачу жилья.\n\n2.4. Подписывая настоящий договор, Арендатор подтверждает, что не имеет претензий к правовому статусу Арендодателя и принимает условия аренды в полном объёме.\n\n2.5. Все спорные вопросы стороны обязуются решать вне судебного порядка, руководствуясь принципами добросовестности и взаимного доверия.»',
-      answers: [
-        { id: 1, text: 'Да, если стороны доверяют друг другу и устно всё согласовали.' },
-        { id: 2, text: 'Да, если Иванов действительно имеет согласие собственника.' },
-        { id: 3, text: 'Нет, сдавать квартиру без доверенности от собственника незаконно.' }
-      ],
-      correct_answers: [3],
-      multiple: false,
-      reference: {
-        type: 'table',
-        headers: ['Формулировка', 'Почему незаконна'],
-        rows: [
-          ['«действующий по устной договорённости с собственником»', 'Нарушает ст. 182 ГК РФ — представитель должен иметь письменную доверенность для распоряжения чужим имуществом.'],
-          ['«доверенность не предоставляется»', 'Без доверенности Иванов не имеет права заключать договор аренды, договор считается ничтожным (ст. 168 ГК РФ).'],
-          ['«арендатор не имеет претензий к правовому статусу арендодателя»', 'Пытается снять ответственность с посредника и лишает арендатора права на защиту в случае мошенничества.'],
-          ['«споры решаются вне судебного порядка»', 'Нарушает ст. 11 Конституции РФ и ст. 3 ГПК РФ — граждане не могут быть лишены права на судебную защиту.'],
-          ['«доверительные отношения»', 'Маскирует отсутствие юридических оснований. В гражданском праве "доверие" не заменяет полномочий.']
-        ]
-      }
-    },
-    5: {
-      type: 'multiple_choice',
-      title: 'Задание 5 Прочитай фрагмент договора и определи, законно ли арендодатель может так поступать.',
-      text: 'Договор №5\n\n«Пункт 3. Общие условия аренды\n\n3.1. Арендодатель передаёт, а Арендатор принимает во временное пользование жилое помещение, расположенное по адресу: г. Москва, ул. Ленина, д. 89, кв. 119.\n\n3.2. Сумма арендной платы, срок проживания, порядок внесения платежей и условия оплаты коммунальных услуг определяются сторонами устно, исходя из взаимного доверия и сложившейся практики взаимоотношений.\n\n3.3. Настоящий документ составлен исключительно в целях подтверждения добрых намерений сторон, не являясь формальным юридическим обязательством.\n\n3.4. Арендатор подтверждает, что условия аренды ему понятны, и обязуется соблюдать договорённости в устной форме.\n\n3.5. В случае возникновения разногласий стороны обязуются урегулировать их самостоятельно, без обращения в компетентные органы.»',
-      answers: [
-        { id: 1, text: 'Да, если обе стороны согласны и доверяют друг другу.' },
-        { id: 2, text: 'Да, если арендатор получил ключи и внёс оплату.' },
-        { id: 3, text: 'Нет, такой договор не имеет юридической силы без указания суммы, срока и условий оплаты.' }
-      ],
-      correct_answers: [3],
-      multiple: false,
-      reference: {
-        type: 'table',
-        headers: ['Формулировка', 'Почему незаконна'],
-        rows: [
-          ['«сумма аренды, срок и условия оплаты оговариваются устно»', 'Нарушает ст. 432 и 674 ГК РФ — договор аренды жилья должен содержать все существенные условия: срок, размер платы и форму расчётов. Без этого договор считается не заключённым.'],
-          ['«документ составлен для подтверждения добрых намерений»', 'Противоречит ст. 420 ГК РФ — договор создаёт права и обязанности, а не просто фиксирует "намерения".'],
-          ['«устные договорённости»', 'Недопустимы в сделках с недвижимостью (ст. 161 ГК РФ) — такие сделки требуют письменной формы.'],
-          ['«урегулировать разногласия самостоятельно, без обращения в органы»', 'Нарушает ст. 11 Конституции РФ и ст. 3 ГПК РФ — нельзя лишать человека права на судебную защиту.'],
-          ['«доверие и устная форма»', 'Используется как завуалированная попытка обойти закон: устная форма не подтверждает обязательств сторон.']
-        ]
-      }
-    },
-    6: {
-      type: 'highlight',
-      title: 'Задание 6 Найди скрытый риск» — найдите все скрытые риски в описании объявления квартиры.',
-      announcementNumber: 'Объявление 1',
-      images: ['6.1.jpg'],
-      text: '«Продаётся уютная 1-комнатная квартира в центре города, всего за 4 000 000 ₽! Светлая, просторная, с новым дизайнерским ремонтом, мебелью и бытовой техникой. Заезжай и живи — ничего делать не нужно. Срочная продажа в связи с переездом, цена действует только сегодня. Осмотр возможен по видеосвязи, так как собственник временно в командировке. Для бронирования просьба внести небольшой задаток — всего 50 000 ₽, чтобы снять с публикации. Документы готовы, покажу сканы по запросу.»',
-      highlights: [
-        { id: 1, text: 'с новым дизайнерским ремонтом', isCorrect: false, startIndex: 87, endIndex: 122 },
-        { id: 2, text: 'ничего делать не нужно', isCorrect: false, startIndex: 159, endIndex: 181 },
-        { id: 3, text: 'Срочная продажа в связи с переездом', isCorrect: false, startIndex: 183, endIndex: 221 },
-        { id: 4, text: 'цена действует только сегодня', isCorrect: true, startIndex: 223, endIndex: 252 },
-        { id: 5, text: 'по видеосвязи, так как собственник временно в командировке', isCorrect: true, startIndex: 269, endIndex: 327 },
-        { id: 6, text: 'всего 50 000 ₽, чтобы снять с публикации', isCorrect: true, startIndex: 374, endIndex: 414 },
-        { id: 7, text: 'покажу сканы по запросу', isCorrect: true, startIndex: 430, endIndex: 453 }
-      ],
-      reference: {
-        type: 'text',
-        text: 'Что нужно делать в таком случае:\n\n• Сравнить цену с аналогичными квартирами в этом районе.\n• Попросить точный адрес и показать квартиру лично, а не «по видеосвязи».\n• Не переводить задаток до личного осмотра и подписания договора.\n• Запросить оригиналы документов и выписку ЕГРН через сайт Росреестра.\n• Проверить телефон и имя продавца через поисковик.'
-      }
-    },
-    7: {
-      type: 'highlight',
-      title: 'Задание 7 Найди скрытый риск» — найдите все скрытые риски в описании объявления квартиры.',
-      announcementNumber: 'Объявление 2',
-      images: ['7.1.jpg'],
-      text: '«Продаётся просторная 2-комнатная квартира в современном ЖК «Элит-Парк». Качественный монолитный дом, развитая инфраструктура, охраняемая территория. Цена указана ориентировочно, актуальные предложения уточняйте у менеджера.  Этот объект уже забронирован, но есть другие аналогичные квартиры в этом же доме. Позвоните, и мы подберём вариант под ваш бюджет — от 5 800 000 ₽. Осмотр возможен по предварительной записи через офис продаж. При необходимости поможем с ипотекой и юридическим сопровождением.»',
-      highlights: [
-        { id: 1, text: 'ориентировочно', isCorrect: true, startIndex: 141, endIndex: 155 },
-        { id: 2, text: 'актуальные предложения уточняйте у менеджера', isCorrect: false, startIndex: 157, endIndex: 203 },
-        { id: 3, text: 'Этот объект уже забронирован', isCorrect: true, startIndex: 206, endIndex: 235 },
-        { id: 4, text: 'Осмотр возможен по предварительной записи через офис продаж', isCorrect: false, startIndex: 319, endIndex: 380 }
-      ],
-      reference: {
-        type: 'text',
-        text: 'Что нужно делать в таком случае:\n\n• Спросить точный адрес, корпус и секцию ЖК.\n• Проверить наличие этой квартиры на официальном сайте застройщика.\n• Не вносить «предоплату за подбор».\n• Проверить юрлицо агентства через ЕГРЮЛ (ФНС) и отзывы.\n• Проверить дату публикации.'
-      }
-    },
-    8: {
-      type: 'highlight',
-      title: 'Задание 8 Найди скрытый риск» — найдите все скрытые риски в описании объявления квартиры.',
-      announcementNumber: 'Объявление 3',
-      images: ['8.1.jpg'],
-      text: '«Срочно продаю 3-комнатную квартиру с видом на реку. Просторная гостиная, раздельные комнаты, свежий ремонт. Цена снижена до 3 000 000 ₽, только при быстрой сделке. Возможен показ после внесения аванса 50 000 ₽ — для подтверждения серьёзности намерений. Все документы в порядке, оригиналы на регистрации, предоставлю копии. Собственник надёжный, работаем через доверенное лицо. Квартира свободна, подходит под ипотеку. Успейте забронировать, предложение ограничено!»',
-      highlights: [
-        { id: 1, text: 'Цена снижена', isCorrect: false, startIndex: 95, endIndex: 108 },
-        { id: 2, text: 'только при быстрой сделке', isCorrect: true, startIndex: 125, endIndex: 152 },
-        { id: 3, text: 'показ после внесения аванса', isCorrect: false, startIndex: 154, endIndex: 183 },
-        { id: 4, text: 'для подтверждения серьёзности намерений', isCorrect: true, startIndex: 192, endIndex: 232 },
-        { id: 5, text: 'оригиналы на регистрации', isCorrect: true, startIndex: 256, endIndex: 280 },
-        { id: 6, text: 'Успейте забронировать, предложение ограничено', isCorrect: false, startIndex: 349, endIndex: 395 }
-      ],
-      reference: {
-        type: 'text',
-        text: 'Что нужно делать в таком случае:\n\n• Никогда не переводить деньги до личного осмотра.\n• Попросить показать оригиналы документов лично.\n• Проверить адрес через Google Maps — реально ли там есть жилой дом.\n• Проверить собственника через выписку ЕГРН.\n• Если продавец настаивает на "доверенном лице" — попросить нотариальную доверенность.'
-      }
-    },
-    9: {
-      type: 'highlight',
-      title: 'Задание 9 Найди скрытый риск» — найдите все скрытые риски в описании объявления квартиры.',
-      announcementNumber: 'Объявление 4',
-      images: ['9.1.jpg'],
-      text: '«Продаётся 1-комнатная квартира в спальном районе. Тихие соседи, рядом магазины, детский сад и транспорт. Все документы заверены и находятся у нотариуса, сделка проводится быстро. Оригиналы сейчас в другом городе, но есть копии — покажу при встрече. При желании можем оформить через знакомого нотариуса, недорого и без проволочек. Осмотр возможен по предварительной договорённости.»',
-      highlights: [
-        { id: 1, text: 'заверены и находятся у нотариуса', isCorrect: true, startIndex: 108, endIndex: 141 },
-        { id: 2, text: 'сделка проводится быстро', isCorrect: false, startIndex: 143, endIndex: 167 },
-        { id: 3, text: 'Оригиналы сейчас в другом городе, но есть копии', isCorrect: false, startIndex: 169, endIndex: 216 },
-        { id: 4, text: 'покажу при встрече', isCorrect: true, startIndex: 219, endIndex: 237 },
-        { id: 5, text: 'через знакомого нотариуса, недорого и без проволочек', isCorrect: true, startIndex: 260, endIndex: 312 },
-        { id: 6, text: 'Осмотр возможен по предварительной договорённости', isCorrect: false, startIndex: 314, endIndex: 365 }
-      ],
-      reference: {
-        type: 'text',
-        text: 'Что нужно делать в таком случае:\n\n• Попросить показать оригиналы документов.\n• Проверить адрес квартиры на карте (Google Maps, Яндекс.Карты) — убедиться, что объект действительно существует.\n• Заказать выписку из ЕГРН и проверить, кто является собственником.\n• Проверить указанного нотариуса через сайт notariat.ru — убедиться, что он реально существует.\n• Не соглашаться на сделку через "знакомого нотариуса" — требовать официальное оформление.\n• Не переводить деньги до личного осмотра квартиры и проверки документов.\n• Проверить номер телефона продавца в интернете — нет ли других объявлений с тем же контактом.\n• Настоять на личной встрече и осмотре квартиры до любых договорённостей.'
-      }
-    },
-    10: {
-      type: 'highlight',
-      title: 'Задание 10 Найди скрытый риск» — найдите все скрытые риски в описании объявления квартиры.',
-      announcementNumber: 'Объявление 5',
-      images: ['10.1.jpg', '10.2.jpg'],
-      text: '«Продаётся уютная 2-комнатная квартира 58 м² в кирпичном доме 1995 года постройки. Квартира чистая, тёплая, в хорошем состоянии: косметический ремонт, стеклопакеты, заменены трубы. Собственник один, в собственности более 5 лет. Выписка ЕГРН и паспорт — при встрече. Осмотр возможен по выходным, торг уместен после просмотра. Тихий двор, рядом школа, магазины, остановка. Подходит под ипотеку, без обременений.»',
-      highlights: [
-        { id: 1, text: 'при встрече', isCorrect: false, startIndex: 201, endIndex: 213 },
-        { id: 2, text: 'Осмотр возможен по выходным', isCorrect: false, startIndex: 215, endIndex: 243 },
-        { id: 3, text: 'Подходит под ипотеку', isCorrect: false, startIndex: 295, endIndex: 316 }
-      ],
-      reference: {
-        type: 'text',
-        text: 'Это объявление выглядит безопасным, но всё равно стоит проверить документы при встрече.'
-      }
-    },
-    11: {
-      type: 'highlight',
-      title: 'Задание 11 Найди скрытый риск» — найдите все скрытые риски в описании объявления квартиры.',
-      announcementNumber: 'Объявление 6',
-      images: ['11.1.jpg', '11.2.jpg'],
-      text: '«Продаётся элитная 4-комнатная квартира 130 м² с панорамным остеклением и дизайнерским ремонтом. Квартира полностью укомплектована техникой и мебелью. Документы готовы, покажем по запросу после внесения брони. Работаем по доверенности от собственника, оформление у нотариуса. Уникальное предложение для тех, кто ценит комфорт и престиж!»',
-      highlights: [
-        { id: 1, text: 'Квартира полностью укомплектована техникой и мебелью. Документы готовы', isCorrect: false, startIndex: 99, endIndex: 168 },
-        { id: 2, text: 'покажем по запросу после внесения брони', isCorrect: true, startIndex: 170, endIndex: 207 },
-        { id: 3, text: 'Работаем по доверенности от собственника', isCorrect: true, startIndex: 209, endIndex: 248 },
-        { id: 4, text: 'оформление у нотариуса', isCorrect: false, startIndex: 250, endIndex: 272 }
-      ],
-      reference: {
-        type: 'text',
-        text: 'Что нужно делать в таком случае:\n\n• Никогда не вносить предоплату или "бронь" до личного осмотра квартиры. Требование оплатить «до показа» — частая схема мошенников.\n• Попросить показать оригиналы документов лично: свидетельство о праве собственности или выписку из ЕГРН.\n• Проверить доверенность, по которой якобы действует продавец: она должна быть нотариальной, с актуальной датой и без истёкшего срока действия.\n• Проверить данные доверенности через нотариальную палату — сайт notariat.ru покажет, существует ли такой документ.\n• Проверить собственника в ЕГРН (через rosreestr.gov.ru или «Госуслуги») — действительно ли продавец имеет право распоряжаться квартирой.\n• Настоять на личной встрече с доверенным лицом и сверить его паспортные данные с доверенностью.\n• Сверить адрес и фото квартиры с картами Google или Яндекса — бывает, что фото "элитного жилья" взяты из интернета.\n• Проверить номер телефона продавца в поиске и на ЦИАН/Авито — если один и тот же номер используется в разных регионах, это явный сигнал мошенничества.\n• Не соглашаться на "ускоренное оформление у знакомого нотариуса" — только через официального специалиста, выбранного обеими сторонами.\n• Заключать сделку только после проверки документов юристом или агентом по недвижимости.'
-      }
-    },
-    12: {
-      type: 'highlight',
-      title: 'Задание 12 Найди скрытый риск» — найдите все скрытые риски в описании объявления квартиры.',
-      announcementNumber: 'Объявление 7',
-      images: ['12.1.jpg', '12.2.jpg'],
-      text: '«Продаётся 1-комнатная квартира площадью 35 м² с просторной кухней 20 м² и потолками 4 м. Квартира идеально подойдёт под сдачу в аренду. Все замеры производились вручную, поэтому возможны незначительные расхождения. Адрес на карте указан верно, но дом пока не отображается в сервисах — новостройка без регистрации. Документы предоставим на сделке, оформление быстрое.»',
-      highlights: [
-        { id: 1, text: 'производились вручную', isCorrect: true, startIndex: 120, endIndex: 140 },
-        { id: 2, text: 'возможны незначительные расхождения', isCorrect: false, startIndex: 152, endIndex: 188 },
-        { id: 3, text: 'пока не отображается в сервисах — новостройка без регистрации', isCorrect: true, startIndex: 220, endIndex: 280 },
-        { id: 4, text: 'Документы предоставим на сделке', isCorrect: false, startIndex: 282, endIndex: 315 }
-      ],
-      reference: {
-        type: 'text',
-        text: 'Что нужно делать в таком случае:\n\n• Не переводить деньги за «бронь» до личного осмотра квартиры и проверки документов.\n• Попросить указать точный адрес и кадастровый номер объекта.\n• Заказать выписку из ЕГРН, чтобы проверить, кто является собственником.\n• Попросить показать оригинал доверенности, если продавец действует «по доверенности от собственника».\n• Проверить доверенность у нотариуса, который её выдал — действительно ли она существует и не отозвана.\n• Сделать обратный поиск фотографий квартиры через Google или Яндекс, чтобы убедиться, что они не взяты из стоков или других объявлений.\n• Проверить, указан ли нотариус в государственном реестре.\n• Не соглашаться на сделку, если продавец избегает встречи, скрывает адрес или требует быстрых решений.'
-      }
-    },
-    13: {
-      type: 'highlight',
-      title: 'Задание 13 Найди скрытый риск» — найдите все скрытые риски в описании объявления квартиры.',
-      announcementNumber: 'Объявление 8',
-      images: ['13.1.jpg'],
-      text: '«Продаётся студия 22 м² после капитального ремонта, с индивидуальным отоплением. Чистая, светлая, окна на юг, тихий двор. Собственник один, без обременений. Все документы в порядке, покажу оригиналы при встрече. Подходит под ипотеку. Осмотр по договорённости, возможен торг при реальном интересе. Отличный вариант для студентов и тех, кто ищет небольшое жильё без лишних хлопот.»',
-      highlights: [
-        { id: 1, text: 'Собственник один', isCorrect: false, startIndex: 108, endIndex: 124 },
-        { id: 2, text: 'покажу оригиналы при встрече', isCorrect: false, startIndex: 161, endIndex: 190 },
-        { id: 3, text: 'Осмотр по договорённости', isCorrect: false, startIndex: 207, endIndex: 231 },
-        { id: 4, text: 'возможен торг при реальном интересе', isCorrect: true, startIndex: 233, endIndex: 267 }
-      ],
-      reference: {
-        type: 'text',
-        text: 'Что нужно делать в таком случае:\n\n• Проверить выписку из ЕГРН, чтобы убедиться, что продавец действительно является собственником.\n• Попросить показать оригиналы документов на квартиру и паспорт владельца при встрече.\n• Осмотреть квартиру лично — проверить соответствие описания (метраж, состояние, окна на юг, наличие индивидуального отопления).\n• Проверить, нет ли обременений (залог, арест, долги по коммуналке) через расширенную выписку ЕГРН.\n• Спросить, есть ли зарегистрированные жильцы, и потребовать их выписку до сделки.\n• Подписывать договор только после проверки всех документов у нотариуса или юриста.\n• Проводить расчёт безопасным способом — через нотариуса, эскроу-счёт или банковскую ячейку.'
-      }
-    },
-    14: {
-      type: 'highlight',
-      title: 'Задание 14 Найди скрытый риск» — найдите все скрытые риски в описании объявления квартиры.',
-      announcementNumber: 'Объявление 9',
-      images: ['14.1.jpg', '14.2.jpg'],
-      text: '«Продаётся 3-комнатная квартира 80 м², вторичка, один собственник, без обременений. Дом кирпичный, тёплый, рядом школа и парк. Выписка ЕГРН и коммунальные чеки предоставляются при осмотре. Осмотр по договорённости, торг уместен. Расчёт через нотариуса или банк, наличные не принимаем. Отличный вариант для семьи, всё готово к заселению.»',
-      highlights: [
-        { id: 1, text: 'чеки предоставляются при осмотре', isCorrect: false, startIndex: 130, endIndex: 163 },
-        { id: 2, text: 'Расчёт через нотариуса или банк, наличные не принимаем', isCorrect: false, startIndex: 195, endIndex: 250 }
-      ],
-      reference: {
-        type: 'text',
-        text: 'Это объявление выглядит безопасным, но всё равно стоит проверить документы при встрече.'
-      }
-    }
-  };
-  
-  return tasks[taskNum] || null;
-};
-
-// Данные заданий для четвертого урока
-const getRentLesson4Tasks = (taskNum) => {
-  const tasks = {
-    1: {
-      type: 'dropdown',
-      title: 'Задание 15 Сопоставьте к каждой ситуации, кто должен платить арендодатель или арендатор и правильное обоснование',
-      options: [
-        { id: 'landlord', text: 'Арендодатель' },
-        { id: 'tenant', text: 'Арендатор' },
-        { id: 'contract', text: 'Как указано в договоре' }
-      ],
-      items: [
-        {
-          id: 1,
-          situation: 'Сломался смеситель, потек кран из-за старости',
-          correct: 'landlord',
-          explanation: 'Капитальный ремонт и замена изношенных элементов – обязанность собственника (ст. 681 ГК РФ).'
-        },
-        {
-          id: 2,
-          situation: 'Арендатор уронил крышку унитаза и треснул бачок',
-          correct: 'tenant',
-          explanation: 'Повреждение имущества по вине жильца возмещается им (ст. 678 ГК РФ).'
-        },
-        {
-          id: 3,
-          situation: 'Перегорела лампочка в прихожей',
-          correct: 'tenant',
-          explanation: 'Мелкий текущий ремонт —ответственность арендатора.'
-        },
-        {
-          id: 4,
-          situation: 'Сгорела розетка или выключатель от старости',
-          correct: 'landlord',
-          explanation: 'Естественный износ инженерных систем — зона ответственности собственника.'
-        },
-        {
-          id: 5,
-          situation: 'Неисправен бойлер (водонагреватель), не включается',
-          correct: 'landlord',
-          explanation: 'Ремонт или замена крупной бытовой техники при естественном износе — обязанность владельца.'
-        },
-        {
-          id: 6,
-          situation: 'Хозяин требует оплатить долги по ЖКХ, накопленные до въезда',
-          correct: 'landlord',
-          explanation: 'Все долги до заключения договора остаются за собственником.'
-        },
-        {
-          id: 7,
-          situation: 'Засорилась раковина из-за остатков пищи',
-          correct: 'tenant',
-          explanation: 'Если засор вызван неправильным использованием — ответственность жильца.'
-        },
-        {
-          id: 8,
-          situation: 'Потекла батарея в отопительный сезон',
-          correct: 'landlord',
-          explanation: 'Элемент инженерной сети — арендодатель обязан вызвать специалистов и устранить проблему.'
-        },
-        {
-          id: 9,
-          situation: 'Замена счётчиков воды по сроку поверки',
-          correct: 'landlord',
-          explanation: 'Счётчики принадлежат собственнику, он отвечает за их поверку и замену.'
-        },
-        {
-          id: 10,
-          situation: 'Интернет и кабельное ТВ',
-          correct: 'tenant',
-          explanation: 'Эти услуги подключаются по желанию жильца.'
-        },
-        {
-          id: 11,
-          situation: 'Налог на доход от сдачи жилья',
-          correct: 'landlord',
-          explanation: 'Собственник обязан уплатить 13% НДФЛ или оформить ИП. Арендатор не несёт налоговых обязанностей.'
-        },
-        {
-          id: 12,
-          situation: 'Хозяин требует покрасить стены перед выездом',
-          correct: 'landlord',
-          explanation: 'Арендатор возвращает жильё с учётом нормального износа (ст. 678 ГК РФ).'
-        },
-        {
-          id: 13,
-          situation: 'Коммунальные услуги (вода, свет, газ)',
-          correct: 'contract',
-          explanation: 'Закон допускает, что арендатор компенсирует фактическое потребление по счётчикам.'
-        },
-        {
-          id: 14,
-          situation: 'Капитальный ремонт дома (взнос на капремонт)',
-          correct: 'landlord',
-          explanation: 'Это взнос собственника по ЖК РФ — не относится к арендаторам.'
-        },
-        {
-          id: 15,
-          situation: 'Замена дверного замка по просьбе арендатора',
-          correct: 'tenant',
-          explanation: 'Если замок исправен, а замена — по инициативе жильца, он оплачивает сам.'
-        }
-      ]
-    }
-  };
-  
-  return tasks[taskNum] || null;
-};
-
-// Данные заданий для пятого урока
-const getRentLesson5Tasks = (taskNum) => {
-  const tasks = {
-    1: {
-      type: 'dropdown',
-      title: 'Задание 16 Прочитай приведённые жизненные ситуации и выбери, имеет ли арендодатель право выселить арендатора в каждом из случаев.',
-      options: [
-        { id: 'yes', text: 'Да, могут' },
-        { id: 'no', text: 'Нет, не могут' }
-      ],
-      items: [
-        {
-          id: 1,
-          situation: 'Арендатор задержал оплату за квартиру уже на 2 месяца и не выходит на связь с хозяином.',
-          correct: 'yes',
-          explanation: 'По ст. 687 ГК РФ — если арендатор не платит более 2 раз подряд, арендодатель имеет право расторгнуть договор и потребовать выселения.'
-        },
-        {
-          id: 2,
-          situation: 'Вы живёте в квартире 8 месяцев, исправно платите, но хозяин решил «сдать подороже» и просит съехать через неделю.',
-          correct: 'no',
-          explanation: 'Расторгнуть договор можно только с уведомлением за 3 месяца, если срок не истёк. Преждевременное выселение без оснований - незаконно.'
-        },
-        {
-          id: 3,
-          situation: 'В квартире после вечеринки соседей вызвали полицию: шум, жалобы, бардак. Хозяин узнал и хочет расторгнуть договор.',
-          correct: 'yes',
-          explanation: 'Систематические нарушения порядка и покоя соседей — законное основание для расторжения (ст. 687 ГК РФ).'
-        },
-        {
-          id: 4,
-          situation: 'Хозяин узнал, что вы держите кошку, хотя в договоре про животных ничего не сказано.',
-          correct: 'no',
-          explanation: 'Если запрета нет в договоре, наличие животного — не повод для выселения. Можно оговорить условия ухода, но не выселять.'
-        },
-        {
-          id: 5,
-          situation: 'В квартире случилась протечка, вы не сообщили сразу, и из-за этого затопило соседей.',
-          correct: 'yes',
-          explanation: 'Если ущерб причинён по вашей вине, арендодатель вправе требовать компенсации и расторгнуть договор (ст. 678, 687 ГК РФ).'
-        },
-        {
-          id: 6,
-          situation: 'Вы перестали жить в квартире, но оставили там вещи и не предупредили арендодателя. Договор не расторгнут.',
-          correct: 'no',
-          explanation: 'Без официального уведомления арендодатель не может выбросить вещи. Он обязан направить письменное уведомление и дождаться окончания договора.'
-        },
-        {
-          id: 7,
-          situation: 'В договоре указано «без поднаёма», но вы разрешили другу пожить пару недель, не уведомив хозяина.',
-          correct: 'yes',
-          explanation: 'Кратковременное проживание гостя — не нарушение. Но регулярный поднаём без согласия — основание для расторжения.'
-        },
-        {
-          id: 8,
-          situation: 'Вы аккуратно живёте, но не хотите пускать арендодателя «проверить квартиру». Он грозит выселением.',
-          correct: 'no',
-          explanation: 'Хозяин не может входить без согласования. Проверка возможна только по взаимной договорённости и с предварительным предупреждением.'
-        },
-        {
-          id: 9,
-          situation: 'В квартире начался капитальный ремонт дома — арендодатель решил расторгнуть договор, потому что «жить нельзя».',
-          correct: 'yes',
-          explanation: 'Если жильё официально признано непригодным для проживания, договор прекращается по закону (ст. 687 ГК РФ).'
-        }
-      ]
-    },
-    17: {
-      type: 'dropdown',
-      title: 'Задание 17 Что считается критическими нарушениями со стороны арендодателя. Сопоставьте ситуацию с нарушением.',
-      options: [
-        { id: 'violation1', text: 'Нарушение неприкосновенности жилища (ст. 25 Конституции РФ)' },
-        { id: 'violation2', text: 'Нарушение ст. 7 ЖК РФ — запрещено ограничивать коммунальные услуги' },
-        { id: 'violation3', text: 'Нарушение ст. 681 ГК РФ' },
-        { id: 'violation4', text: 'Нарушение ст. 678, 681 ГК РФ' },
-        { id: 'violation5', text: 'Нарушение условий договора' },
-        { id: 'violation6', text: 'Нарушение ГК и УК РФ (самоуправство)' },
-        { id: 'violation7', text: 'Нарушение ст. 15, 1102 ГК РФ (неосновательное обогащение)' },
-        { id: 'violation8', text: 'Мошенничество (ст. 159 УК РФ)' },
-        { id: 'violation9', text: 'Нарушение гражданских прав арендатора' },
-        { id: 'violation10', text: 'Нарушение порядка пользования имуществом' }
-      ],
-      items: [
-        {
-          id: 1,
-          situation: 'Хозяин входит без предупреждения, пока вы дома или на работе',
-          correct: 'violation1',
-          explanation: 'Подать заявление в полицию о незаконном проникновении и потребовать расторжения договора без штрафов.'
-        },
-        {
-          id: 2,
-          situation: 'Арендодатель отключает воду, электричество, интернет «в наказание»',
-          correct: 'violation2',
-          explanation: 'Зафиксировать факт (видео, свидетели), составить акт, обратиться в жилищную инспекцию или суд.'
-        },
-        {
-          id: 3,
-          situation: 'Требует платить за капремонт, налоги или долги по ЖКХ',
-          correct: 'violation3',
-          explanation: 'Отказать в оплате, сославшись на закон — эти платежи несёт только собственник.'
-        },
-        {
-          id: 4,
-          situation: 'Отказывается ремонтировать неисправности, не зависящие от арендатора',
-          correct: 'violation4',
-          explanation: 'Направить письменное требование (e-mail, мессенджер), зафиксировать поломку, требовать ремонта или снижения арендной платы.'
-        },
-        {
-          id: 5,
-          situation: 'Выставляет новые условия посреди срока (повышает плату, сокращает срок)',
-          correct: 'violation5',
-          explanation: 'Отказать и сослаться на ст. 450 ГК РФ — изменение договора возможно только по взаимному согласию сторон.'
-        },
-        {
-          id: 6,
-          situation: 'Угрожает выкинуть вещи без решения суда',
-          correct: 'violation6',
-          explanation: 'Подать заявление в полицию, требовать защиты прав и возмещения ущерба через суд.'
-        },
-        {
-          id: 7,
-          situation: 'Не возвращает залог без причин',
-          correct: 'violation7',
-          explanation: 'Направить письменную претензию, при отказе — подать иск в суд о возврате суммы.'
-        },
-        {
-          id: 8,
-          situation: 'Сдаёт квартиру нескольким людям одновременно',
-          correct: 'violation8',
-          explanation: 'Немедленно обратиться в полицию и в банк с заявлением об отмене перевода денег.'
-        },
-        {
-          id: 9,
-          situation: 'Не даёт копию договора или отказывается подписывать',
-          correct: 'violation9',
-          explanation: 'Отказаться от заселения и сообщить в агентство или полицию, если деньги уже были переданы.'
-        },
-        {
-          id: 10,
-          situation: 'Отказывается составлять акт приёма-передачи',
-          correct: 'violation10',
-          explanation: 'Настоять на составлении акта — без него невозможно подтвердить состояние квартиры и вернуть залог при выезде.'
-        }
-      ]
-    }
-  };
-  
-  return tasks[taskNum] || null;
-};
+import { livesAPI, progressAPI, contentAPI, eventsAPI, liveAPI } from '../services/api';
 
 const Task = () => {
   const { topic, lessonNumber, taskNumber } = useParams();
@@ -557,6 +15,7 @@ const Task = () => {
   const [isCorrect, setIsCorrect] = useState(false);
   const [lives, setLives] = useState(null);
   const [taskData, setTaskData] = useState(null);
+  const [taskCount, setTaskCount] = useState(0);
   const [taskState, setTaskState] = useState({});
   const [showReference, setShowReference] = useState(false);
 
@@ -567,14 +26,15 @@ const Task = () => {
         const livesRes = await livesAPI.getMyLives();
         setLives(livesRes.data);
         
-        // Загружаем данные задания
+        // Загружаем урок с заданиями (смещения выделений рассчитаны на сервере)
         let task = null;
-        if (topic === 'rent' && lessonNum === 3) {
-          task = getRentLesson3Tasks(taskNum);
-        } else if (topic === 'rent' && lessonNum === 4) {
-          task = getRentLesson4Tasks(taskNum);
-        } else if (topic === 'rent' && lessonNum === 5) {
-          task = getRentLesson5Tasks(taskNum);
+        try {
+          const lessonRes = await contentAPI.getLesson(topic, lessonNum);
+          const tasks = lessonRes.data.tasks || [];
+          task = tasks[taskNum - 1] || null;
+          setTaskCount(tasks.length);
+        } catch (error) {
+          setTaskCount(0);
         }
         setTaskData(task);
         
@@ -594,6 +54,15 @@ const Task = () => {
     loadData();
   }, [topic, lessonNum, taskNum]);
 
+  // Жизни, потраченные в других вкладках, приходят потоком
+  useEffect(() => liveAPI.subscribe((event) => {
+    if (event.type === 'lives') {
+      setLives(prev => prev && { ...prev, current_lives: event.current_lives, max_lives: event.max_lives });
+    } else if (event.type === 'resync') {
+      livesAPI.getMyLives().then(res => setLives(res.data)).catch(() => {});
+    }
+  }), []);
+
   const initializeTaskState = (task) => {
     if (task.type === 'multiple_choice') {
       setTaskState({ selected: [] });
@@ -635,16 +104,7 @@ const Task = () => {
   };
 
   // Проверяем, есть ли следующее задание
-  const hasNextTask = () => {
-    if (topic === 'rent' && lessonNum === 3) {
-      return taskNum < 14; // Всего 14 заданий в уроке 3
-    } else if (topic === 'rent' && lessonNum === 4) {
-      return taskNum < 1; // 1 задание в уроке 4
-    } else if (topic === 'rent' && lessonNum === 5) {
-      return taskNum < 2; // 2 задания в уроке 5
-    }
-    return false;
-  };
+  const hasNextTask = () => taskNum < taskCount;
 
   const handleSubmit = async () => {
     if (!taskData) return;
@@ -673,14 +133,22 @@ const Task = () => {
       correct = checkDropdown(taskData, taskState.selectedItems || []);
     }
 
+    eventsAPI.send([{
+      type: 'task_answered',
+      topic_slug: topic,
+      lesson_number: lessonNum,
+      task_number: taskNum,
+      payload: { task_type: taskData.type, correct, first_attempt: !answered },
+    }]);
+
     // Если ответ неправильный, снимаем жизнь только один раз (при первом ответе)
     if (!correct && !answered) {
       try {
-        await livesAPI.useLife();
-        const livesRes = await livesAPI.getMyLives();
-        setLives(livesRes.data);
+        // Ответ содержит оставшиеся жизни: повторный запрос не нужен
+        const { data } = await livesAPI.useLife();
+        setLives(prev => ({ ...prev, current_lives: data.remaining_lives, max_lives: data.max_lives }));
         
-        if (livesRes.data.current_lives === 0) {
+        if (data.remaining_lives === 0) {
           toast.error('У вас закончились жизни! Вы не можете выполнять задания.');
         } else {
           toast.error('Неправильный ответ. Снята одна жизнь.');
@@ -1070,27 +538,15 @@ const HighlightTask = ({ task, taskState, handleHighlightClick, answered, isCorr
       return <span>{text}</span>;
     }
 
-    // Сортируем highlights по позиции в тексте
+    // Сортируем highlights по позиции в тексте (смещения приходят с сервера)
     const sortedHighlights = [...highlights].sort((a, b) => a.startIndex - b.startIndex);
     
     const parts = [];
     let lastIndex = 0;
 
     sortedHighlights.forEach((highlight, index) => {
-      // Находим реальную позицию фразы в тексте, если индексы неправильные
-      let actualStartIndex = highlight.startIndex;
-      let actualEndIndex = highlight.endIndex;
-      
-      // Проверяем, что текст по указанным индексам совпадает с искомым
-      const textAtIndices = text.substring(highlight.startIndex, highlight.endIndex);
-      if (textAtIndices !== highlight.text) {
-        // Если не совпадает, ищем фразу в тексте
-        const foundIndex = text.indexOf(highlight.text, lastIndex);
-        if (foundIndex !== -1) {
-          actualStartIndex = foundIndex;
-          actualEndIndex = foundIndex + highlight.text.length;
-        }
-      }
+      const actualStartIndex = highlight.startIndex;
+      const actualEndIndex = highlight.endIndex;
       
       // Добавляем текст до выделения
       if (actualStartIndex > lastIndex) {
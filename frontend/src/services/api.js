@@ -4,6 +4,8 @@ const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000';
 
 const api = axios.create({
   baseURL: API_BASE_URL,
+  // cookie db_primary_until: после своей записи чтение идёт из основной БД
+  withCredentials: true,
   headers: {
     'Content-Type': 'application/json',
   },
@@ -65,7 +67,13 @@ export const topicsAPI = {
   list: () => api.get('/api/topics/'),
 };
 
+export const contentAPI = {
+  getLessons: (topicSlug) => api.get(`/api/content/${topicSlug}/lessons`),
+  getLesson: (topicSlug, lessonNumber) => api.get(`/api/content/${topicSlug}/lessons/${lessonNumber}`),
+};
+
 export const progressAPI = {
+  getAll: (slugs) => api.get('/api/progress', { params: slugs ? { topics: slugs.join(',') } : {} }),
   getByTopic: (slug) => api.get(`/api/progress/${slug}`),
   markCompleted: (topicSlug, lessonNumber) => 
     api.post(`/api/progress/${topicSlug}/lesson/${lessonNumber}`, { status: 'completed' }),
@@ -73,4 +81,71 @@ export const progressAPI = {
     api.post(`/api/progress/${topicSlug}/lesson/${lessonNumber}`, { status: 'active' }),
 };
 
+export const eventsAPI = {
+  // Учебные события для аналитики: ошибки отправки не мешают уроку
+  send: (events) => api.post('/api/events', { events }).catch(() => {}),
+};
+
+// Живые обновления жизней и прогресса (text/event-stream). EventSource не
+// умеет передавать заголовок Authorization, поэтому поток читается через fetch.
+// onEvent получает {type: 'lives' | 'progress' | 'resync', ...}; resync приходит
+// и после переподключения — за время разрыва события могли быть пропущены.
+// Возвращает функцию отписки.
+export const liveAPI = {
+  subscribe: (onEvent) => {
+    const controller = new AbortController();
+    let delay = 1000;
+    let connectedBefore = false;
+
+    const dispatch = (block) => {
+      let type = 'message';
+      let data = '';
+      for (const line of block.split('\n')) {
+        if (line.startsWith('event:')) type = line.slice(6).trim();
+        else if (line.startsWith('data:')) data += line.slice(5).trim();
+        else if (line.startsWith('retry:')) delay = Number(line.slice(6)) || delay;
+      }
+      if (data) onEvent({ type, ...JSON.parse(data) });
+    };
+
+    const connect = async () => {
+      const token = localStorage.getItem('token');
+      if (!token) return;
+      try {
+        const response = await fetch(`${API_BASE_URL}/api/live/stream`, {
+          headers: { Authorization: `Bearer ${token}` },
+          signal: controller.signal,
+        });
+        // Токен больше не действует: переподключение не поможет
+        if (response.status === 401) return;
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        if (connectedBefore) onEvent({ type: 'resync' });
+        connectedBefore = true;
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        for (;;) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+          let end;
+          while ((end = buffer.indexOf('\n\n')) !== -1) {
+            dispatch(buffer.slice(0, end));
+            buffer = buffer.slice(end + 2);
+          }
+        }
+      } catch (error) {
+        // Отписка прерывает чтение; остальные ошибки — сеть, повтор ниже
+        if (controller.signal.aborted) return;
+      }
+      // Сервер закрыл поток (перезапуск воркера) или сеть недоступна
+      setTimeout(connect, delay + Math.random() * 1000);
+    };
+
+    connect();
+    return () => controller.abort();
+  },
+};
+
 export default api;